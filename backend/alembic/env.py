@@ -9,7 +9,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.core.database import Base
-from app.models import user, workspace, data_upload, notification, alert_rule
+from app.models import user, workspace, data_upload, notification, alert_rule, metric_series, metric_rollup, workspace_stats
 
 # --- CHANGED: Call load_dotenv() right at the top ---
 # This will load your .env file (with the Supabase URL)
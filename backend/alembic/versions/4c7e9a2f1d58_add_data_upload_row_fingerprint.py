@@ -0,0 +1,28 @@
+"""add data_uploads.row_fingerprint for row diffs
+
+Revision ID: 4c7e9a2f1d58
+Revises: d1e8b3a56c92
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7e9a2f1d58'
+down_revision: Union[str, Sequence[str], None] = 'd1e8b3a56c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('data_uploads', sa.Column('row_fingerprint', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('data_uploads', 'row_fingerprint')
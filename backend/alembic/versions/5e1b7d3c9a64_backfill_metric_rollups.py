@@ -0,0 +1,76 @@
+"""backfill metric_rollups for history that predates them
+
+Revision ID: 5e1b7d3c9a64
+Revises: 4c7e9a2f1d58
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1b7d3c9a64'
+down_revision: Union[str, Sequence[str], None] = '4c7e9a2f1d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Self-contained on purpose (no app imports): mirrors rollups.record_rollups as of
+# this revision for every (workspace, upload_type) series that has no rollups yet.
+# Upload / hour / day buckets of each describe() metric in summary_stats.
+BACKFILL_SQL = """
+WITH missing AS (
+    SELECT DISTINCT u.workspace_id, u.upload_type
+    FROM data_uploads u
+    WHERE u.analysis_results IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM metric_rollups r
+          WHERE r.workspace_id = u.workspace_id AND r.upload_type = u.upload_type
+      )
+),
+points AS (
+    SELECT u.id AS upload_id, u.workspace_id, u.upload_type, u.uploaded_at,
+           s.key AS column_name, m.metric, (s.value ->> m.metric)::float8 AS value
+    FROM data_uploads u
+    JOIN missing ON missing.workspace_id = u.workspace_id AND missing.upload_type = u.upload_type
+    CROSS JOIN LATERAL jsonb_each(
+        CASE WHEN jsonb_typeof(u.analysis_results -> 'summary_stats') = 'object'
+             THEN u.analysis_results -> 'summary_stats' ELSE '{}'::jsonb END
+    ) AS s
+    CROSS JOIN (VALUES ('mean'), ('max'), ('min'), ('count'), ('std'), ('50%')) AS m(metric)
+    WHERE jsonb_typeof(s.value) = 'object'
+      AND jsonb_typeof(s.value -> m.metric) = 'number'
+),
+bucketed AS (
+    SELECT p.*, b.bucket,
+           CASE b.bucket
+               WHEN 'upload' THEN p.uploaded_at
+               ELSE date_trunc(b.bucket, p.uploaded_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+           END AS bucket_start
+    FROM points p
+    CROSS JOIN (VALUES ('upload'), ('hour'), ('day')) AS b(bucket)
+)
+INSERT INTO metric_rollups (
+    id, workspace_id, upload_type, column_name, metric, bucket, bucket_start,
+    upload_id, count, sum, min, max, last
+)
+SELECT gen_random_uuid(), workspace_id, upload_type, column_name, metric, bucket, bucket_start,
+       CASE WHEN bucket = 'upload' THEN (array_agg(upload_id ORDER BY uploaded_at DESC))[1] END,
+       count(*), sum(value), min(value), max(value),
+       (array_agg(value ORDER BY uploaded_at DESC))[1]
+FROM bucketed
+GROUP BY workspace_id, upload_type, column_name, metric, bucket, bucket_start
+ON CONFLICT ON CONSTRAINT uq_metric_rollups_series_bucket DO NOTHING
+"""
+
+
+def upgrade() -> None:
+    """Upgrade data: replay processed uploads into the trend rollups."""
+    op.execute(sa.text(BACKFILL_SQL))
+
+
+def downgrade() -> None:
+    """Downgrade data: nothing to undo; the rollups stay valid."""
+    pass
@@ -0,0 +1,52 @@
+"""analysis_results to JSONB with sketch-history index
+
+Revision ID: 7d3a5c9e1b62
+Revises: e2b7f4d81a36
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3a5c9e1b62'
+down_revision: Union[str, Sequence[str], None] = 'e2b7f4d81a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        'data_uploads',
+        'analysis_results',
+        existing_type=postgresql.JSON(astext_type=sa.Text()),
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=True,
+        postgresql_using='analysis_results::jsonb',
+    )
+    # Drift baseline lookup: latest uploads of a series that carry sketches
+    op.create_index(
+        'ix_data_uploads_sketch_history',
+        'data_uploads',
+        ['workspace_id', 'upload_type', sa.text('uploaded_at DESC')],
+        unique=False,
+        postgresql_where=sa.text("analysis_results ? 'distribution_sketches'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_data_uploads_sketch_history', table_name='data_uploads')
+    op.alter_column(
+        'data_uploads',
+        'analysis_results',
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        type_=postgresql.JSON(astext_type=sa.Text()),
+        existing_nullable=True,
+        postgresql_using='analysis_results::json',
+    )
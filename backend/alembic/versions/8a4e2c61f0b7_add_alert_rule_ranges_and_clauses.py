@@ -0,0 +1,30 @@
+"""add alert rule ranges and compound clauses
+
+Revision ID: 8a4e2c61f0b7
+Revises: 3f1c9a7b2d40
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4e2c61f0b7'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7b2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('alert_rules', sa.Column('value_max', sa.Float(), nullable=True))
+    op.add_column('alert_rules', sa.Column('clauses', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('alert_rules', 'clauses')
+    op.drop_column('alert_rules', 'value_max')
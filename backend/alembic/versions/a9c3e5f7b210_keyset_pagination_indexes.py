@@ -0,0 +1,65 @@
+"""extend history/feed indexes with id for keyset pagination
+
+b4f19e6c0d85 now creates these indexes with the id tiebreaker, so on a
+fresh database this revision does nothing. Databases that ran the earlier
+b4f19e6c0d85 (without id) get them rebuilt CONCURRENTLY, without blocking
+writes to data_uploads / notifications.
+
+Revision ID: a9c3e5f7b210
+Revises: f6a2d8c34e17
+Create Date: 2026-10-19 14:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3e5f7b210'
+down_revision: Union[str, Sequence[str], None] = 'f6a2d8c34e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, columns)
+INDEXES = [
+    (
+        'ix_data_uploads_ws_type_uploaded_at', 'data_uploads',
+        ['workspace_id', 'upload_type', sa.text('uploaded_at DESC'), sa.text('id DESC')],
+    ),
+    (
+        'ix_data_uploads_ws_uploaded_at', 'data_uploads',
+        ['workspace_id', sa.text('uploaded_at DESC'), sa.text('id DESC')],
+    ),
+    (
+        'ix_notifications_user_created_at', 'notifications',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+    ),
+]
+
+
+def _missing_tiebreaker(bind, name: str) -> bool:
+    indexdef = bind.execute(
+        sa.text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"), {"name": name}
+    ).scalar()
+    return indexdef is not None and not indexdef.rstrip().endswith("id DESC)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    stale = [index for index in INDEXES if _missing_tiebreaker(op.get_bind(), index[0])]
+    if not stale:
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in stale:
+            op.create_index(f'{name}_keyset', table, columns, unique=False, postgresql_concurrently=True)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.execute(f'ALTER INDEX {name}_keyset RENAME TO {name}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # b4f19e6c0d85 owns these indexes and drops them on its own downgrade
+    pass
@@ -0,0 +1,85 @@
+"""add composite and partial indexes for hot read paths
+
+Revision ID: b4f19e6c0d85
+Revises: 7d3a5c9e1b62
+Create Date: 2026-10-19 13:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4f19e6c0d85'
+down_revision: Union[str, Sequence[str], None] = '7d3a5c9e1b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # History / feed indexes end in id DESC: the keyset-pagination tiebreaker
+    op.create_index(
+        'ix_data_uploads_ws_type_uploaded_at',
+        'data_uploads',
+        ['workspace_id', 'upload_type', sa.text('uploaded_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_data_uploads_ws_uploaded_at',
+        'data_uploads',
+        ['workspace_id', sa.text('uploaded_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_notifications_user_created_at',
+        'notifications',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_notifications_user_unread',
+        'notifications',
+        ['user_id'],
+        unique=False,
+        postgresql_where=sa.text('is_read = false'),
+    )
+    op.create_index(
+        'ix_alert_rules_workspace_active',
+        'alert_rules',
+        ['workspace_id', 'is_active'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_workspaces_owner_deleted',
+        'workspaces',
+        ['owner_id', 'is_deleted'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_workspaces_polling_active',
+        'workspaces',
+        ['last_polled_at'],
+        unique=False,
+        postgresql_where=sa.text('is_polling_active = true'),
+    )
+    op.create_index(
+        'ix_workspace_team_user_id',
+        'workspace_team',
+        ['user_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_workspace_team_user_id', table_name='workspace_team')
+    op.drop_index('ix_workspaces_polling_active', table_name='workspaces')
+    op.drop_index('ix_workspaces_owner_deleted', table_name='workspaces')
+    op.drop_index('ix_alert_rules_workspace_active', table_name='alert_rules')
+    op.drop_index('ix_notifications_user_unread', table_name='notifications')
+    op.drop_index('ix_notifications_user_created_at', table_name='notifications')
+    op.drop_index('ix_data_uploads_ws_uploaded_at', table_name='data_uploads')
+    op.drop_index('ix_data_uploads_ws_type_uploaded_at', table_name='data_uploads')
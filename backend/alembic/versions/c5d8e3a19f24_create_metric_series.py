@@ -0,0 +1,47 @@
+"""create metric_series ring buffers
+
+Revision ID: c5d8e3a19f24
+Revises: 8a4e2c61f0b7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d8e3a19f24'
+down_revision: Union[str, Sequence[str], None] = '8a4e2c61f0b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'metric_series',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('workspace_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('upload_type', sa.String(length=50), nullable=False),
+        sa.Column('column_name', sa.String(), nullable=False),
+        sa.Column('metric', sa.String(length=20), nullable=False),
+        sa.Column('capacity', sa.Integer(), nullable=False),
+        sa.Column('values', postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column('head', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('size', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_upload_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('workspace_id', 'upload_type', 'column_name', 'metric'),
+    )
+    op.create_index(op.f('ix_metric_series_workspace_id'), 'metric_series', ['workspace_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_metric_series_workspace_id'), table_name='metric_series')
+    op.drop_table('metric_series')
@@ -0,0 +1,31 @@
+"""add workspace_stats.version for ETags
+
+Revision ID: d1e8b3a56c92
+Revises: a9c3e5f7b210
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1e8b3a56c92'
+down_revision: Union[str, Sequence[str], None] = 'a9c3e5f7b210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'workspace_stats',
+        sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('workspace_stats', 'version')
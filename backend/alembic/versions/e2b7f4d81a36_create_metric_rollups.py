@@ -0,0 +1,53 @@
+"""create metric_rollups trend aggregates
+
+Revision ID: e2b7f4d81a36
+Revises: c5d8e3a19f24
+Create Date: 2026-10-19 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7f4d81a36'
+down_revision: Union[str, Sequence[str], None] = 'c5d8e3a19f24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'metric_rollups',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('workspace_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('upload_type', sa.String(length=50), nullable=False),
+        sa.Column('column_name', sa.String(), nullable=False),
+        sa.Column('metric', sa.String(length=20), nullable=False),
+        sa.Column('bucket', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('upload_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('sum', sa.Float(), nullable=False),
+        sa.Column('min', sa.Float(), nullable=True),
+        sa.Column('max', sa.Float(), nullable=True),
+        sa.Column('last', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        # Also serves the trend range scan (series key + bucket_start)
+        sa.UniqueConstraint(
+            'workspace_id', 'upload_type', 'column_name', 'metric', 'bucket', 'bucket_start',
+            name='uq_metric_rollups_series_bucket',
+        ),
+    )
+    op.create_index(op.f('ix_metric_rollups_upload_id'), 'metric_rollups', ['upload_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_metric_rollups_upload_id'), table_name='metric_rollups')
+    op.drop_table('metric_rollups')
@@ -0,0 +1,62 @@
+"""create workspace_stats counters
+
+Revision ID: f6a2d8c34e17
+Revises: b4f19e6c0d85
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a2d8c34e17'
+down_revision: Union[str, Sequence[str], None] = 'b4f19e6c0d85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'workspace_stats',
+        sa.Column('workspace_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('upload_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('total_size_bytes', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('alert_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('active_alert_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['workspace_id'], ['workspaces.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('workspace_id'),
+    )
+    # Seed from existing rows; the reconciliation job keeps them honest afterwards
+    op.execute(
+        """
+        INSERT INTO workspace_stats
+            (workspace_id, upload_count, total_size_bytes, alert_count, active_alert_count, reconciled_at)
+        SELECT w.id,
+               COALESCE(u.upload_count, 0),
+               COALESCE(u.total_size_bytes, 0),
+               COALESCE(a.alert_count, 0),
+               COALESCE(a.active_alert_count, 0),
+               now()
+        FROM workspaces w
+        LEFT JOIN (
+            SELECT workspace_id, COUNT(*) AS upload_count, COALESCE(SUM(file_size_bytes), 0) AS total_size_bytes
+            FROM data_uploads GROUP BY workspace_id
+        ) u ON u.workspace_id = w.id
+        LEFT JOIN (
+            SELECT workspace_id, COUNT(*) AS alert_count, COUNT(*) FILTER (WHERE is_active) AS active_alert_count
+            FROM alert_rules GROUP BY workspace_id
+        ) a ON a.workspace_id = w.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('workspace_stats')
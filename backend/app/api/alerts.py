@@ -1,29 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, Request
 from sqlalchemy.orm import Session
 import uuid
+from typing import List, Optional
 from app.core.database import get_db
 from app.models.alert_rule import AlertRule
 from app.models.workspace import Workspace
 from app.models.data_upload import DataUpload  # Added this import
 from app.models.user import User
+from app.services.alert_engine import (
+    ALLOWED_CONDITIONS,
+    MAX_EXTRA_CLAUSES,
+    RANGE_CONDITIONS,
+    alert_plan_cache,
+)
+from app.services.drift import DRIFT_METRICS
+from app.services.metric_history import WINDOWED_METRICS
+from app.services.workspace_stats import get_workspace_stats
 from .dependencies import get_current_user, limiter
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, model_validator
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
 # --- CONSTANTS (SaaS Standards) ---
-ALLOWED_METRICS = {"mean", "max", "min", "count", "std", "50%"}
-ALLOWED_CONDITIONS = {"greater_than", "less_than", "equals", "not_equals"}
+ALLOWED_METRICS = {"mean", "max", "min", "count", "std", "50%"} | DRIFT_METRICS | WINDOWED_METRICS
 
 # ==========================
 #  Schemas
 # ==========================
-class AlertRuleCreate(BaseModel):
-    workspace_id: uuid.UUID
+class AlertClause(BaseModel):
     column_name: str
     metric: str
     condition: str
     value: float
+    value_max: Optional[float] = None
 
     @field_validator('metric')
     @classmethod
@@ -39,6 +48,27 @@ class AlertRuleCreate(BaseModel):
             raise ValueError(f"Condition must be one of: {', '.join(ALLOWED_CONDITIONS)}")
         return v.lower()
 
+    @model_validator(mode="after")
+    def validate_range(self):
+        if self.condition in RANGE_CONDITIONS:
+            if self.value_max is None or self.value_max < self.value:
+                raise ValueError("Range conditions need value_max greater than or equal to value")
+        else:
+            self.value_max = None
+        return self
+
+class AlertRuleCreate(AlertClause):
+    workspace_id: uuid.UUID
+    # Compound rule: every clause must hold too
+    clauses: Optional[List[AlertClause]] = None
+
+    @field_validator('clauses')
+    @classmethod
+    def validate_clauses(cls, v):
+        if v is not None and len(v) > MAX_EXTRA_CLAUSES:
+            raise ValueError(f"A rule can combine at most {MAX_EXTRA_CLAUSES} extra conditions")
+        return v or None
+
 class AlertRuleResponse(BaseModel):
     id: uuid.UUID
     workspace_id: uuid.UUID
@@ -46,6 +76,8 @@ class AlertRuleResponse(BaseModel):
     metric: str
     condition: str
     value: float
+    value_max: Optional[float] = None
+    clauses: Optional[List[dict]] = None
     is_active: bool
 
     class Config:
@@ -84,10 +116,7 @@ def create_alert_rule(
         )
 
     # --- QUOTA CHECK ---
-    active_alerts_count = db.query(AlertRule).filter(
-        AlertRule.workspace_id == workspace.id,
-        AlertRule.is_active == True
-    ).count()
+    active_alerts_count = get_workspace_stats(db, workspace.id)["active_alert_count"]
 
     if active_alerts_count >= 10:
         raise HTTPException(
@@ -96,7 +125,12 @@ def create_alert_rule(
         )
 
     # 2. SCHEMA VALIDATION & NULL GUARDS
-    latest_upload = db.query(DataUpload).filter(
+    # Key lookups run in Postgres; neither the row nor the schema document is loaded
+    column_names = [rule.column_name] + [c.column_name for c in rule.clauses or []]
+    latest_upload = db.query(
+        DataUpload.schema_info.isnot(None),
+        *[DataUpload.schema_info[column_name].isnot(None) for column_name in column_names]
+    ).filter(
         DataUpload.workspace_id == workspace.id,
         DataUpload.uploaded_at.isnot(None)
     ).order_by(DataUpload.uploaded_at.desc()).first()
@@ -104,17 +138,20 @@ def create_alert_rule(
     if not latest_upload:
         raise HTTPException(status_code=400, detail="No data found. Upload a file first.")
 
-    if not latest_upload.schema_info:
+    has_schema, *column_found = latest_upload
+    if not has_schema:
         raise HTTPException(status_code=400, detail="Schema processing... try again in a moment.")
 
-    if rule.column_name not in latest_upload.schema_info:
-        raise HTTPException(status_code=400, detail=f"Column '{rule.column_name}' not found.")
+    for column_name, found in zip(column_names, column_found):
+        if not found:
+            raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found.")
 
     # 3. Save the Rule
     new_rule = AlertRule(**rule.model_dump())
     db.add(new_rule)
     db.commit()
     db.refresh(new_rule)
+    alert_plan_cache.invalidate(workspace.id)
     return new_rule
 
 @router.patch("/{rule_id}/toggle", response_model=AlertRuleResponse)
@@ -139,10 +176,7 @@ def toggle_alert_rule(
     # --- NEW: QUOTA CHECK FOR TOGGLE ---
     # Only check the limit if the user is trying to TURN ON an alert
     if not rule.is_active:
-        active_alerts_count = db.query(AlertRule).filter(
-            AlertRule.workspace_id == workspace.id,
-            AlertRule.is_active == True
-        ).count()
+        active_alerts_count = get_workspace_stats(db, workspace.id)["active_alert_count"]
 
         if active_alerts_count >= 10:
             raise HTTPException(
@@ -155,6 +189,7 @@ def toggle_alert_rule(
     rule.is_active = not rule.is_active
     db.commit()
     db.refresh(rule)
+    alert_plan_cache.invalidate(rule.workspace_id)
     return rule
 
 @router.delete("/{rule_id}", status_code=204)
@@ -174,6 +209,8 @@ def delete_alert_rule(
     if not workspace or workspace.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this alert rule")
     
+    workspace_id = rule.workspace_id
     db.delete(rule)
     db.commit()
+    alert_plan_cache.invalidate(workspace_id)
     return Response(status_code=204)
\ No newline at end of file
@@ -27,6 +27,7 @@ from app.models.token import RefreshToken
 from app.core.database import get_db
 from .dependencies import limiter
 from app.api.dependencies import get_current_user
+from app.core.membership_cache import membership_cache
 from app.models.user import LoginHistory 
 from app.services.email_service import send_farewell_email
 from app.models.workspace import workspace_team
@@ -888,6 +889,7 @@ def refresh_token(
 
         db_token.user.token_version += 1
         db.commit()
+        membership_cache.invalidate_user(db_token.user_id)
 
         raise HTTPException(
             status_code=401,
@@ -901,6 +903,7 @@ def refresh_token(
 
         db_token.user.token_version += 1
         db.commit()
+        membership_cache.invalidate_user(db_token.user_id)
 
         raise HTTPException(
             status_code=401,
@@ -987,6 +990,7 @@ async def delete_account(
 ):
     user_email = current_user.email
     user_name = current_user.name
+    user_id = current_user.id
 
     try:
         logger.warning(f"🚨 SCRUB INITIATED: User {user_email}")
@@ -1014,6 +1018,7 @@ async def delete_account(
         # ✅ 3) Delete the user (cascades will delete owned workspaces/uploads from DB)
         db.delete(current_user)
         db.commit()
+        membership_cache.invalidate_user(user_id)
 
         # ✅ 4) Clear Cookies
         cookie_params = {
@@ -1130,6 +1135,7 @@ def logout_from_all_devices(
 
         # Commit all changes
         db.commit()
+        membership_cache.invalidate_user(current_user.id)
 
         response = JSONResponse(content={"message": "Global identity reset successful"})
 
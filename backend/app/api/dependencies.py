@@ -1,5 +1,5 @@
 from typing import Optional
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, HTTPException, Request, WebSocket, status
 from sqlalchemy.orm import Session
 import jwt
 import uuid
@@ -7,8 +7,9 @@ import os
 import logging
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
 from app.models.user import User
+from app.core.membership_cache import member_exists, membership_cache
 
 logger = logging.getLogger(__name__)
 
@@ -18,17 +19,11 @@ JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 limiter = Limiter(key_func=get_remote_address)
 
 
-def get_current_user(
-    request: Request, 
-    db: Session = Depends(get_db),
-    raise_error: bool = True 
-) -> Optional[User]:
-    token = request.cookies.get("access_token")
-    if not token:
-        logger.debug("❌ No access_token cookie found in request")
-        if not raise_error: return None
-        raise HTTPException(status_code=401, detail="Not authenticated")
-
+def decode_access_token(token: str) -> tuple[uuid.UUID, int]:
+    """
+    Verify an access JWT and return (user_id, token_version).
+    Pure CPU work: no DB access.
+    """
     if token.startswith("Bearer "):
         token = token.split(" ")[1]
 
@@ -43,44 +38,101 @@ def get_current_user(
                 "verify_iss": True           
             }
         )
-        
-        user_id = payload.get("sub")
-        token_version = payload.get("ver")
-        token_type = payload.get("type")
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    user_id = payload.get("sub")
+    token_version = payload.get("ver")
+    token_type = payload.get("type")
+
+    if token_version is None:
+        raise HTTPException(status_code=401, detail="Missing security version")
+
+    if token_type != "access":
+        logger.warning(f"❌ Rejected token: Expected 'access', got '{token_type}'")
+        raise HTTPException(status_code=401, detail="Invalid token type")
+    
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Missing user identifier")
+
+    try:
+        user_uuid = uuid.UUID(user_id)
+    except (ValueError, TypeError, AttributeError):
+        raise HTTPException(status_code=401, detail="Invalid user identifier")
+
+    return user_uuid, token_version
 
-        if token_version is None:
-            raise HTTPException(status_code=401, detail="Missing security version")
 
-        if token_type != "access":
-            logger.warning(f"❌ Rejected token: Expected 'access', got '{token_type}'")
-            raise HTTPException(status_code=401, detail="Invalid token type")
+def get_current_user(
+    request: Request, 
+    db: Session = Depends(get_db),
+    raise_error: bool = True 
+) -> Optional[User]:
+    token = request.cookies.get("access_token")
+    if not token:
+        logger.debug("❌ No access_token cookie found in request")
+        if not raise_error: return None
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    user_uuid, token_version = decode_access_token(token)
         
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Missing user identifier")
-
-        try:
-            user_uuid = uuid.UUID(user_id)
-        except (ValueError, TypeError, AttributeError):
-            raise HTTPException(status_code=401, detail="Invalid user identifier")
-            
-        user = db.query(User).filter(User.id == user_uuid).first()
+    user = db.query(User).filter(User.id == user_uuid).first()
+    
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+    if user.token_version != token_version:
+        logger.warning(
+            f"🛡️ Security Reset Kick: User {user.email} "
+            f"(Token v{token_version} vs DB v{user.token_version})"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, 
+            detail="Session invalidated due to security reset"
+        )
         
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return user
 
-        if user.token_version != token_version:
-            logger.warning(
-                f"🛡️ Security Reset Kick: User {user.email} "
-                f"(Token v{token_version} vs DB v{user.token_version})"
-            )
+
+def authenticate_websocket(websocket: WebSocket, workspace_id: str) -> str:
+    """
+    Handshake auth for workspace sockets. Verifies the JWT locally, checks
+    token_version against the cache and membership with one uncached
+    EXISTS query. Returns the user id.
+    """
+    token = websocket.cookies.get("access_token")
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    user_uuid, token_version = decode_access_token(token)
+    user_id = str(user_uuid)
+
+    current_version = membership_cache.get_token_version(user_id)
+    if current_version is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+    if current_version != token_version:
+        # The cached version may be stale right after a login; re-check once
+        membership_cache.invalidate_user(user_id)
+        if membership_cache.get_token_version(user_id) != token_version:
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, 
+                status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Session invalidated due to security reset"
             )
-            
-        return user
 
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
+    try:
+        ws_uuid = uuid.UUID(str(workspace_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid workspace ID")
+
+    db = SessionLocal()
+    try:
+        allowed = member_exists(db, ws_uuid, user_uuid, active_only=True)
+    finally:
+        db.close()
+    if not allowed:
+        raise HTTPException(status_code=403, detail="Not authorized to access this workspace")
+
+    return user_id
@@ -9,6 +9,7 @@ from app.core.database import get_db
 from app.models.notification import Notification
 from app.models.user import User
 from app.api.dependencies import get_current_user 
+from app.core.pagination import finish_page, keyset_page, parse_include
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
@@ -26,21 +27,40 @@ class NotificationResponse(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+# Always-returned columns; ai_insight (LLM text) is opt-out via ?include=
+NOTIFICATION_LIST_COLUMNS = [
+    Notification.id,
+    Notification.workspace_id,
+    Notification.message,
+    Notification.is_read,
+    Notification.is_archived,
+    Notification.notification_type,
+    Notification.priority,
+    Notification.action_url,
+    Notification.created_at,
+]
+NOTIFICATION_OPTIONAL_FIELDS = ("ai_insight",)
+
 # --- Routes ---
 
 @router.get("/", response_model=List[NotificationResponse])
 def get_notifications(
-    limit: int = Query(20, le=100),
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    include: Optional[str] = Query(None, description="Comma-separated optional fields: ai_insight (default: included)"),
     current_user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
-    notifications = db.query(Notification).filter(
+    optional = parse_include(include, NOTIFICATION_OPTIONAL_FIELDS)
+    columns = NOTIFICATION_LIST_COLUMNS + [getattr(Notification, field) for field in optional]
+
+    query = db.query(*columns).filter(
         Notification.user_id == current_user.id,
-    ).order_by(
-        Notification.created_at.desc()
-    ).limit(limit).all()
-    
-    return notifications
+    )
+    notifications = keyset_page(query, Notification.created_at, Notification.id, cursor, limit)
+
+    return finish_page(notifications, limit, response, "created_at")
 
 @router.post("/{notification_id}/read", response_model=NotificationResponse)
 def mark_notification_as_read(
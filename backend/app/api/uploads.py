@@ -1,18 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, Request
+from fastapi import APIRouter, Depends, HTTPException, Response, Request, Header
 from fastapi.responses import StreamingResponse 
 from sqlalchemy.orm import Session
+from sqlalchemy import func, Text
+from typing import Optional
 import uuid
 import io 
 from app.core.database import get_db
 from app.models.data_upload import DataUpload
-from app.models.workspace import Workspace
 from app.models.user import User
+from app.core.membership_cache import member_exists
+from app.core.http_cache import etag_matches
 from .dependencies import get_current_user, limiter
 from app.services.storage_service import delete_file
 
 router = APIRouter(prefix="/uploads", tags=["Uploads"])
 
 
+@router.get("/{upload_id}/analysis")
+def get_upload_analysis(
+    upload_id: uuid.UUID,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Full schema_info + analysis_results for one upload, for clients that
+    list history with ?fields=summary. The ETag is an md5 of the stored
+    documents computed in Postgres, so a revalidation (304) never ships
+    the JSON to Python.
+    """
+    head = db.query(
+        DataUpload.workspace_id,
+        DataUpload.analysis_results.isnot(None).label("is_processed"),
+        func.md5(
+            func.coalesce(DataUpload.analysis_results.cast(Text), "")
+            + func.coalesce(DataUpload.schema_info.cast(Text), "")
+        ).label("digest"),
+    ).filter(DataUpload.id == upload_id).first()
+
+    if not head or not member_exists(db, head.workspace_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    if not head.is_processed:
+        # Still processing: nothing stable to cache yet
+        response.headers["Cache-Control"] = "no-store"
+        return {"id": str(upload_id), "schema_info": None, "analysis_results": None}
+
+    etag = f'"{head.digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    schema_info, analysis_results = db.query(
+        DataUpload.schema_info, DataUpload.analysis_results
+    ).filter(DataUpload.id == upload_id).first()
+
+    response.headers.update(headers)
+    return {"id": str(upload_id), "schema_info": schema_info, "analysis_results": analysis_results}
+
+
 
 @router.delete("/{upload_id}", status_code=204)
 @limiter.limit("5/minute")
@@ -26,8 +73,7 @@ def delete_upload(
     if not upload_record:
         return Response(status_code=204)
 
-    workspace = db.query(Workspace).filter(Workspace.id == upload_record.workspace_id).first()
-    if not workspace or not (workspace.owner_id == current_user.id or current_user in workspace.team_members):
+    if not member_exists(db, upload_record.workspace_id, current_user.id):
         raise HTTPException(status_code=403, detail="Not authorized to delete this upload")
 
     if upload_record.storage_path:
@@ -53,13 +99,8 @@ def get_upload_content(
     if not upload_record:
         raise HTTPException(status_code=404, detail="Upload not found")
 
-    # Permission Check
-    workspace = db.query(Workspace).filter(Workspace.id == upload_record.workspace_id).first()
-    if not workspace:
-        raise HTTPException(status_code=404, detail="Parent workspace not found")
-    is_owner = workspace.owner_id == current_user.id
-    is_member = current_user in workspace.team_members
-    if not (is_owner or is_member):
+    # Permission Check (workspace_id is a CASCADE FK, so the parent always exists)
+    if not member_exists(db, upload_record.workspace_id, current_user.id):
         raise HTTPException(status_code=403, detail="Not authorized to access this content")
     
     file_content = upload_record.file_content
@@ -11,6 +11,7 @@ from app.core.database import get_db
 from app.api.dependencies import get_current_user, limiter
 from app.models.data_upload import DataUpload
 from app.models.workspace import Workspace
+from app.models.workspace_stats import WorkspaceStats
 from app.services.storage_service import create_signed_download_url
 
 logger = logging.getLogger(__name__)
@@ -23,25 +24,28 @@ async def get_export_summary(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    workspaces = db.query(Workspace).filter(
+    # One query: workspaces joined with their denormalized counters
+    workspaces = db.query(
+        Workspace.id,
+        Workspace.name,
+        Workspace.data_source,
+        func.coalesce(WorkspaceStats.total_size_bytes, 0).label("total_size_bytes"),
+        func.coalesce(WorkspaceStats.upload_count, 0).label("file_count"),
+    ).outerjoin(
+        WorkspaceStats, WorkspaceStats.workspace_id == Workspace.id
+    ).filter(
         Workspace.owner_id == current_user.id,
         Workspace.is_deleted == False
     ).all()
 
     summary = []
     for ws in workspaces:
-        total_size_bytes = db.query(func.sum(DataUpload.file_size_bytes)) \
-            .filter(DataUpload.workspace_id == ws.id) \
-            .scalar() or 0
-
-        file_count = db.query(DataUpload).filter(DataUpload.workspace_id == ws.id).count()
-
         summary.append({
             "workspace_id": str(ws.id),
             "name": ws.name,
             "data_source": ws.data_source,
-            "total_size_bytes": int(total_size_bytes),
-            "file_count": file_count
+            "total_size_bytes": int(ws.total_size_bytes),
+            "file_count": int(ws.file_count)
         })
 
     return summary
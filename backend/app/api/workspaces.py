@@ -15,7 +15,7 @@ from fastapi import (
 from pydantic import BaseModel, EmailStr, field_validator, ConfigDict, HttpUrl
 
 # Database & Models
-from sqlalchemy.orm import Session, joinedload, defer
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import func, or_
 from app.core.database import get_db, SessionLocal
 from app.models.user import User
@@ -30,11 +30,20 @@ from app.services.tasks import process_csv_task
 from app.services.storage_service import upload_csv_bytes
 from app.services.storage_service import delete_files
 from app.api.alerts import AlertRuleResponse 
-from app.api.dependencies import get_current_user, limiter
+from app.api.dependencies import get_current_user, authenticate_websocket, limiter
 from app.core.connection_manager import manager
+from app.core.membership_cache import member_exists
+from app.core.workspace_config_cache import workspace_config_cache
+from app.core.pagination import finish_page, keyset_page, parse_include
 from app.services.tasks import process_data_fetch_task
 from app.core.guard import send_telegram_alert
 from app.services.upload_limits import enforce_upload_limit_or_raise
+from app.services.metric_history import BASE_METRICS
+from app.services.pipeline import get_workspace_with_audience
+from app.services.workspace_stats import get_workspace_stats, get_workspace_version
+from app.models.workspace_stats import WorkspaceStats
+from app.core.http_cache import conditional_response, make_etag
+from app.services.rollups import BUCKETS as ROLLUP_BUCKETS, TREND_MAX_POINTS, query_trend
 # --- Setup ---
 logger = logging.getLogger(__name__)
 APP_MODE = os.getenv("APP_MODE", "development")
@@ -88,6 +97,7 @@ class WorkspaceResponse(BaseModel):
     polling_interval: str | None = None
     is_polling_active: bool | None = None
     tracked_column: str | None = None
+    primary_key_column: str | None = None
     description_last_updated_at: datetime | None = None
     
     api_header_name: str | None = None
@@ -113,6 +123,7 @@ class WorkspaceUpdate(BaseModel):
     polling_interval: str | None = None
     is_polling_active: bool | None = None 
     tracked_column: str | None = None
+    primary_key_column: str | None = None
     
     # Auth Fields
     api_header_name: str | None = None
@@ -162,9 +173,33 @@ class DataUploadResponse(BaseModel):
     schema_info: dict | None = None
     analysis_results: dict | None = None
     schema_changed_from_previous: bool = False
+    # headline stats, only in ?fields=summary mode
+    summary: dict | None = None
     
     model_config = ConfigDict(from_attributes=True)
     
+# Always-returned columns of the upload history list
+UPLOAD_LIST_COLUMNS = [
+    DataUpload.id,
+    DataUpload.workspace_id,
+    DataUpload.file_path,
+    DataUpload.uploaded_at,
+    DataUpload.upload_type,
+    DataUpload.schema_changed_from_previous,
+]
+UPLOAD_OPTIONAL_FIELDS = ("schema_info", "analysis_results")
+# analysis_results keys returned as `summary` in ?fields=summary mode (extracted in Postgres)
+UPLOAD_SUMMARY_KEYS = (
+    "row_count",
+    "column_count",
+    "previous_row_count",
+    "previous_column_count",
+    "row_count_changed",
+    "column_count_changed",
+    "schema_has_changed",
+    "is_truncated",
+)
+
 class TaskResponse(BaseModel):
     task_id: str
     message: str
@@ -175,6 +210,8 @@ class TrendDataPoint(BaseModel):
 
 class TrendResponse(BaseModel):
     column_name: str
+    metric: str = "mean"
+    bucket: str = "upload"
     data: List[TrendDataPoint]
     
 class DeleteConfirmation(BaseModel):
@@ -221,36 +258,87 @@ def create_workspace(
     return new_ws
 
 @router.get("/", response_model=List[WorkspaceResponse])
-def list_workspaces(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    workspaces = db.query(Workspace).options(
-        joinedload(Workspace.team_members),
-        joinedload(Workspace.owner)
+def list_workspaces(request: Request, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # ETag from (id, version) of every listed workspace: one narrow query
+    versions = db.query(
+        Workspace.id,
+        func.coalesce(WorkspaceStats.version, 0)
+    ).outerjoin(
+        WorkspaceStats, WorkspaceStats.workspace_id == Workspace.id
     ).filter(
         Workspace.owner_id == current_user.id,
         Workspace.is_deleted == False
-    ).all()
-    
-    return workspaces
+    ).order_by(Workspace.id).all()
+    etag = make_etag("list_workspaces", str(current_user.id), [(str(ws_id), version) for ws_id, version in versions])
+
+    def build():
+        return db.query(Workspace).options(
+            selectinload(Workspace.team_members),
+            joinedload(Workspace.owner)
+        ).filter(
+            Workspace.owner_id == current_user.id,
+            Workspace.is_deleted == False
+        ).all()
+
+    return conditional_response(
+        request, ("list_workspaces", str(current_user.id)), etag, List[WorkspaceResponse], build
+    )
 
 @router.get("/trash", response_model=List[WorkspaceResponse]) 
 def get_trash(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return db.query(Workspace).filter(
+    return db.query(Workspace).options(
+        selectinload(Workspace.team_members),
+        joinedload(Workspace.owner)
+    ).filter(
         Workspace.owner_id == current_user.id,
         Workspace.is_deleted == True  
     ).all()
 
 
 @router.get("/{workspace_id}", response_model=WorkspaceResponse)
+def read_workspace(
+    workspace_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    ws_uuid = authorize_workspace(workspace_id, current_user, db)
+    etag = make_etag("workspace", str(ws_uuid), get_workspace_version(db, ws_uuid))
+
+    return conditional_response(
+        request,
+        ("workspace", str(ws_uuid)),
+        etag,
+        WorkspaceResponse,
+        lambda: get_workspace(workspace_id, current_user, db),
+    )
+
+
+def authorize_workspace(workspace_id: str, current_user: User, db: Session) -> uuid.UUID:
+    """
+    Access check as one EXISTS query (uncached: a removed member loses access
+    on every worker at once). Failures fall back to get_workspace, which
+    raises the precise 400 / 403 / 404.
+    """
+    try:
+        ws_uuid = uuid.UUID(str(workspace_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid workspace ID")
+    if member_exists(db, ws_uuid, current_user.id, active_only=True):
+        return ws_uuid
+    return get_workspace(workspace_id, current_user, db).id
+
+
 def get_workspace(workspace_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
         ws_uuid = uuid.UUID(workspace_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid workspace ID")
     workspace = db.query(Workspace).options(
-        joinedload(Workspace.team_members),
+        selectinload(Workspace.team_members),
         joinedload(Workspace.owner)
     ).filter(
         Workspace.id == ws_uuid,
@@ -439,6 +527,9 @@ async def update_workspace(
     db.commit()
     db.refresh(db_workspace)
 
+    # Pollers must see the new connection settings on their next run
+    workspace_config_cache.invalidate(db_workspace.id)
+
     # --------------------------------------------------
     # Manual run: first enable OR config change
     # --------------------------------------------------
@@ -475,34 +566,14 @@ async def get_notification_settings(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    try:
-        ws_uuid = uuid.UUID(workspace_id)
-    except ValueError:
-        raise HTTPException(400, "Invalid workspace ID")
-
-    workspace = db.query(Workspace).filter(
-        Workspace.id == ws_uuid
-    ).first()
+    ws_uuid = authorize_workspace(workspace_id, current_user, db)
 
+    workspace = get_workspace_with_audience(db, ws_uuid)
     if not workspace:
         raise HTTPException(404, "Workspace not found")
 
-    # --- membership check ---
-    is_member = (
-        current_user.id == workspace.owner_id
-        or current_user in workspace.team_members
-    )
-
-    if not is_member:
-        raise HTTPException(403, "Not part of this workspace")
-
     members = workspace.team_members + [workspace.owner]
-
-    settings = db.query(WorkspaceUserSettings).filter(
-        WorkspaceUserSettings.workspace_id == ws_uuid
-    ).all()
-
-    settings_map = {s.user_id: s for s in settings}
+    settings_map = {s.user_id: s for s in workspace.user_settings}
 
     result = []
 
@@ -529,26 +600,7 @@ async def update_notification_setting(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    try:
-        ws_uuid = uuid.UUID(workspace_id)
-    except ValueError:
-        raise HTTPException(400, "Invalid workspace ID")
-
-    workspace = db.query(Workspace).filter(
-        Workspace.id == ws_uuid
-    ).first()
-
-    if not workspace:
-        raise HTTPException(404, "Workspace not found")
-
-    # --- membership check ---
-    is_member = (
-        current_user.id == workspace.owner_id
-        or current_user in workspace.team_members
-    )
-
-    if not is_member:
-        raise HTTPException(403, "Not part of this workspace")
+    ws_uuid = authorize_workspace(workspace_id, current_user, db)
 
     setting = db.query(WorkspaceUserSettings).filter(
         WorkspaceUserSettings.workspace_id == ws_uuid,
@@ -575,7 +627,7 @@ def get_team_workspaces(
     db: Session = Depends(get_db)
 ):
     return db.query(Workspace).options(
-        joinedload(Workspace.team_members),
+        selectinload(Workspace.team_members),
         joinedload(Workspace.owner)
     ).filter(
         Workspace.team_members.any(User.id == current_user.id),
@@ -677,44 +729,71 @@ async def upload_csv_for_workspace(
 @router.get("/{workspace_id}/uploads", response_model=List[DataUploadResponse])
 def get_workspace_uploads(
     workspace_id: str,
+    response: Response,
     upload_type: Optional[str] = None,
     limit: int = 50, 
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    include: Optional[str] = Query(None, description="Comma-separated JSON fields to return: schema_info, analysis_results (default: both)"),
+    fields: str = Query("full", description="'summary' returns metadata + headline stats only; full analysis via GET /uploads/{id}/analysis"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    if fields not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="fields must be 'full' or 'summary'.")
+
     workspace = get_workspace(workspace_id, current_user, db)
-    limit = min(limit, 100)
-    query = db.query(DataUpload).options(
-        defer(DataUpload.file_content)
-    ).filter(
+    limit = max(1, min(limit, 100))
+
+    # Column projection: large JSON documents only when asked for
+    if fields == "summary":
+        columns = UPLOAD_LIST_COLUMNS + [DataUpload.analysis_results[key].label(key) for key in UPLOAD_SUMMARY_KEYS]
+    else:
+        optional = parse_include(include, UPLOAD_OPTIONAL_FIELDS)
+        columns = UPLOAD_LIST_COLUMNS + [getattr(DataUpload, field) for field in optional]
+
+    query = db.query(*columns).filter(
         DataUpload.workspace_id == workspace.id
     )
     if upload_type:
         query = query.filter(DataUpload.upload_type == upload_type)
 
-    uploads = query.order_by(DataUpload.uploaded_at.desc()).limit(limit).all()
-    
+    uploads = keyset_page(query, DataUpload.uploaded_at, DataUpload.id, cursor, limit)
+    uploads = finish_page(uploads, limit, response, "uploaded_at")
+
+    if fields == "summary":
+        return [
+            {
+                **{column.key: getattr(row, column.key) for column in UPLOAD_LIST_COLUMNS},
+                "summary": {key: getattr(row, key) for key in UPLOAD_SUMMARY_KEYS},
+            }
+            for row in uploads
+        ]
     return uploads
 
 @router.get("/{workspace_id}/schema")
 def get_workspace_schema(
     workspace_id: str, 
+    request: Request,
     user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
-    # 1. Reuse security logic
-    ws = get_workspace(workspace_id, user, db)
+    # 1. Cached access check + version-based ETag
+    ws_id = authorize_workspace(workspace_id, user, db)
+    etag = make_etag("schema", str(ws_id), get_workspace_version(db, ws_id))
+
+    def build():
+        # 2. Fetch ONLY the schema_info from the latest record
+        schema_data = db.query(DataUpload.schema_info).filter(
+            DataUpload.workspace_id == ws_id
+        ).order_by(DataUpload.uploaded_at.desc()).first()
 
-    # 2. Fetch ONLY the schema_info from the latest record
-    schema_data = db.query(DataUpload.schema_info).filter(
-        DataUpload.workspace_id == ws.id
-    ).order_by(DataUpload.uploaded_at.desc()).first()
+        # 3. Clean Response
+        if not schema_data or not schema_data[0]:
+            return {"schema": {}, "has_data": False}
 
-    # 3. Clean Response
-    if not schema_data or not schema_data[0]:
-        return {"schema": {}, "has_data": False}
+        return {"schema": schema_data[0], "has_data": True}
 
-    return {"schema": schema_data[0], "has_data": True}
+    return conditional_response(request, ("schema", str(ws_id)), etag, dict, build)
 
 
 @router.get("/{workspace_id}/uploads/count")
@@ -726,10 +805,8 @@ def get_workspace_upload_count(
     # Security: ensure user has access to workspace
     workspace = get_workspace(workspace_id, current_user, db)
 
-    # Efficient aggregate query
-    upload_count = db.query(DataUpload).filter(
-        DataUpload.workspace_id == workspace.id
-    ).count()
+    # Denormalized counter, single-row read
+    upload_count = get_workspace_stats(db, workspace.id)["upload_count"]
 
     return {
         "count": upload_count
@@ -742,95 +819,77 @@ def get_workspace_upload_count(
 @router.get("/{workspace_id}/trend", response_model=TrendResponse)
 def get_trend_data(
     workspace_id: str,
+    request: Request,
     column_name: str = Query(..., description="The name of the column to get trend data for"),
     upload_type: str = Query(..., description="The type of upload to analyze ('manual' or 'api_poll')"),
+    metric: str = Query("mean", description="describe() metric: mean, max, min, count, std or 50%"),
+    from_: Optional[datetime] = Query(None, alias="from", description="Inclusive start (ISO 8601)"),
+    to: Optional[datetime] = Query(None, description="Inclusive end (ISO 8601)"),
+    bucket: str = Query("upload", description="Granularity: 'upload', 'hour' or 'day'"),
+    max_points: int = Query(TREND_MAX_POINTS, ge=3, le=5000, description="Downsample (LTTB) above this many points"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # 1. Security Check (Uses optimized get_workspace)
-    workspace = get_workspace(workspace_id, current_user, db)
-
-    # 2. Optimized Query: Select ONLY specific columns
-    results = db.query(
-        DataUpload.uploaded_at, 
-        DataUpload.analysis_results
-    ).filter(
-        DataUpload.workspace_id == workspace.id,
-        DataUpload.upload_type == upload_type
-    ).order_by(
-        DataUpload.uploaded_at.asc()
-    ).all()
+    if metric not in BASE_METRICS:
+        raise HTTPException(status_code=400, detail=f"Metric must be one of: {', '.join(BASE_METRICS)}")
+    if bucket not in ROLLUP_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Bucket must be one of: {', '.join(ROLLUP_BUCKETS)}")
+
+    # 1. Cached access check + version-based ETag (covers every query param)
+    ws_id = authorize_workspace(workspace_id, current_user, db)
+    params = (upload_type, column_name, metric, from_, to, bucket, max_points)
+    etag = make_etag("trend", str(ws_id), get_workspace_version(db, ws_id), params)
+
+    def build():
+        # 2. Pre-aggregated series, downsampled server-side (read-only: older
+        # history was backfilled by migration 5e1b7d3c9a64, new uploads by the pipeline)
+        points = query_trend(
+            db,
+            ws_id,
+            upload_type,
+            column_name,
+            metric=metric,
+            bucket=bucket,
+            start=from_,
+            end=to,
+            max_points=max_points,
+        )
 
-    trend_data = []
-    
-    # 3. Processing Loop
-    for uploaded_at, stats in results:
-        # If the date is missing, skip this point entirely. 
-        if uploaded_at is None:
-            continue
+        trend_data = [TrendDataPoint(date=ts, value=value) for ts, value in points]
+        return TrendResponse(column_name=column_name, metric=metric, bucket=bucket, data=trend_data)
 
-        value = None
-        if stats:
-            try:
-                summary = stats.get("summary_stats", {})
-                col_stats = summary.get(column_name, {})
-                
-                # Extract value
-                raw_value = col_stats.get("mean")
-                
-                # Ensure it's a float, otherwise the frontend might break
-                if raw_value is not None:
-                    value = float(raw_value)
-                    
-            except (AttributeError, TypeError, ValueError):
-                pass
-        
-        # Only add to the list if we actually found a value. 
-        if value is not None:
-            trend_data.append(TrendDataPoint(date=uploaded_at, value=value))
-
-    return TrendResponse(column_name=column_name, data=trend_data)
+    return conditional_response(request, ("trend", str(ws_id), params), etag, TrendResponse, build)
 
 
 @router.websocket("/{workspace_id}/ws/{client_id}")
 async def websocket_endpoint(
     websocket: WebSocket, 
     workspace_id: str, 
-    client_id: str
+    client_id: str,
+    last_offset: Optional[int] = None,
+    epoch: Optional[str] = None,
 ):
-    db = SessionLocal() 
     user_id_str = None
 
     try:
-        # Mock request for auth
-        mock_scope = websocket.scope.copy()
-        mock_scope["type"] = "http"
-        mock_scope["method"] = "GET"
-        
-        from fastapi import Request
-        mock_request = Request(mock_scope)
-        
-        # Authenticate
-        from app.api.dependencies import get_current_user
-        user = get_current_user(mock_request, db)
-        user_id_str = str(user.id)
-        
+        # JWT + cached membership index: no DB round trip on the common path
+        user_id_str = await asyncio.to_thread(authenticate_websocket, websocket, workspace_id)
     except Exception as e:
         logger.warning(f"WS authentication failed: {e}")
         try:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         except Exception:
             pass 
-        db.close()
         return
-    db.close() 
 
     await websocket.accept()
-    await manager.connect('workspace', workspace_id, websocket)
-    await manager.connect('user', user_id_str, websocket)
     
     logger.info(f"WS Connected: User {user_id_str} -> Workspace {workspace_id} (Client {client_id})")
     try:
+        # Catch the client up from the event log instead of a full REST refetch;
+        # the socket joins the broadcast lists once it is caught up
+        await manager.replay_missed_events(websocket, workspace_id, user_id_str, last_offset, epoch)
+
         while True:
             data = await websocket.receive_text()
             if data == "ping":
@@ -1035,18 +1094,21 @@ def delete_workspace_permanently(
 @router.get("/{workspace_id}/alerts", response_model=List[AlertRuleResponse])
 def get_workspace_alerts(
     workspace_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # 1. Security Check (Uses our optimized get_workspace)
-    workspace = get_workspace(workspace_id, current_user, db)
+    # 1. Cached access check + version-based ETag
+    ws_id = authorize_workspace(workspace_id, current_user, db)
+    etag = make_etag("alerts", str(ws_id), get_workspace_version(db, ws_id))
 
     # 2. Optimized Query: Filter by workspace and active status
-    rules = db.query(AlertRule).filter(
-        AlertRule.workspace_id == workspace.id
-    ).all()
+    def build():
+        return db.query(AlertRule).filter(
+            AlertRule.workspace_id == ws_id
+        ).all()
 
-    return rules
+    return conditional_response(request, ("alerts", str(ws_id)), etag, List[AlertRuleResponse], build)
 
 @router.get("/{workspace_id}/alerts/count")
 def get_workspace_alert_count(
@@ -1057,10 +1119,8 @@ def get_workspace_alert_count(
     # Security: ensure user has access to workspace
     workspace = get_workspace(workspace_id, current_user, db)
 
-    # Efficient aggregate query
-    alert_count = db.query(AlertRule).filter(
-        AlertRule.workspace_id == workspace.id
-    ).count()
+    # Denormalized counter, single-row read
+    alert_count = get_workspace_stats(db, workspace.id)["alert_count"]
 
     return {
         "count": alert_count
@@ -1,13 +1,66 @@
 # connection_manager.py
 
 import logging
+import os
+import uuid
+from collections import deque
 from fastapi import WebSocket
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Deque, Tuple, Optional
 import asyncio
 from starlette.websockets import WebSocketState
 
 logger = logging.getLogger(__name__)
 
+# How many events each channel keeps for reconnecting clients
+EVENT_LOG_SIZE = int(os.getenv("WS_EVENT_LOG_SIZE", "200"))
+
+
+class EventLog:
+    """
+    Bounded in-memory ring buffer of broadcast events, one per channel.
+
+    Every event gets a process-wide monotonic offset. The `epoch` changes on
+    every restart, so a client holding offsets from a previous process is
+    told to resync instead of silently missing events.
+    """
+    def __init__(self, max_events: int = EVENT_LOG_SIZE):
+        self.max_events = max_events
+        self.epoch = uuid.uuid4().hex[:12]
+        self._offset = 0
+        self._channels: Dict[str, Deque[Tuple[int, dict]]] = {}
+        self._evicted_up_to: Dict[str, int] = {}
+
+    @property
+    def head(self) -> int:
+        return self._offset
+
+    def append(self, channel: str, message: dict) -> dict:
+        self._offset += 1
+        stamped = {**message, "offset": self._offset, "epoch": self.epoch}
+
+        buffer = self._channels.get(channel)
+        if buffer is None:
+            buffer = self._channels[channel] = deque(maxlen=self.max_events)
+        elif len(buffer) == buffer.maxlen:
+            self._evicted_up_to[channel] = buffer[0][0]
+        buffer.append((self._offset, stamped))
+        return stamped
+
+    def since(self, channel: str, last_offset: int) -> Optional[List[dict]]:
+        """
+        Events in `channel` newer than `last_offset`, oldest first.
+        Returns None when the ring buffer has already dropped some of them.
+        """
+        if self._evicted_up_to.get(channel, 0) > last_offset:
+            return None
+
+        buffer = self._channels.get(channel)
+        if not buffer:
+            return []
+
+        return [event for offset, event in buffer if offset > last_offset]
+
+
 class ConnectionManager:
     """
     Manages WebSocket connections for:
@@ -17,11 +70,16 @@ class ConnectionManager:
     def __init__(self):
         self.workspace_connections: Dict[str, List[WebSocket]] = {}
         self.user_connections: Dict[str, List[WebSocket]] = {}
+        self.event_log = EventLog()
 
     async def connect(self, ws_type: str, item_id: str, websocket: WebSocket):
         """
         Register a WebSocket client. Accept must be done by the caller after auth.
+        Resuming clients go through replay_missed_events, which registers them itself.
         """
+        self._register(ws_type, item_id, websocket)
+
+    def _register(self, ws_type: str, item_id: str, websocket: WebSocket):
         if ws_type == 'workspace':
             if item_id not in self.workspace_connections:
                 self.workspace_connections[item_id] = []
@@ -51,6 +109,8 @@ class ConnectionManager:
             logger.warning(f"WS client already disconnected from {conn_name}: {item_id}")
 
     async def broadcast_to_workspace(self, workspace_id: str, message: dict[str, Any]):
+        message = self.event_log.append(f"workspace:{workspace_id}", message)
+
         if workspace_id in self.workspace_connections:
             connections = list(self.workspace_connections[workspace_id])
             logger.info(f"Broadcasting JSON to {len(connections)} clients in workspace {workspace_id}")
@@ -67,6 +127,8 @@ class ConnectionManager:
         """
         Send a JSON message to all active sessions for a specific user.
         """
+        message = self.event_log.append(f"user:{user_id}", message)
+
         if user_id in self.user_connections:
             connections = list(self.user_connections[user_id])
             logger.debug(f"Pushing notification to {len(connections)} sockets for user {user_id}")
@@ -80,6 +142,64 @@ class ConnectionManager:
             if send_tasks:
                 await asyncio.gather(*send_tasks, return_exceptions=True)
 
+    async def replay_missed_events(
+        self,
+        websocket: WebSocket,
+        workspace_id: str,
+        user_id: str,
+        last_offset: Optional[int],
+        epoch: Optional[str],
+    ) -> None:
+        """
+        Send a reconnecting client only the events it missed, then register it.
+
+        Falls back to a single `resync_required` message when the client
+        comes from an older process or fell out of the ring buffer.
+
+        The socket only joins the broadcast lists once a since() check finds
+        nothing new, with no await in between, so live events can neither
+        overtake the replay nor fall into the gap before registration.
+        """
+        workspace_channel = f"workspace:{workspace_id}"
+        user_channel = f"user:{user_id}"
+
+        if last_offset is None:
+            cursor = self.event_log.head
+            await websocket.send_json({"type": "resume_state", "offset": cursor, "epoch": self.event_log.epoch})
+        elif epoch != self.event_log.epoch:
+            cursor = await self._send_resync(websocket, workspace_id)
+        else:
+            cursor = last_offset
+
+        replayed = 0
+        while True:
+            missed_workspace = self.event_log.since(workspace_channel, cursor)
+            missed_user = self.event_log.since(user_channel, cursor)
+
+            if missed_workspace is None or missed_user is None:
+                cursor = await self._send_resync(websocket, workspace_id)
+                continue
+
+            if not missed_workspace and not missed_user:
+                self._register('workspace', workspace_id, websocket)
+                self._register('user', user_id, websocket)
+                break
+
+            # Events appended while these sends are in flight are picked up next round
+            for event in sorted(missed_workspace + missed_user, key=lambda e: e["offset"]):
+                await websocket.send_json(event)
+                cursor = event["offset"]
+                replayed += 1
+
+        if replayed:
+            logger.info(f"Replayed {replayed} missed events to workspace {workspace_id}")
+
+    async def _send_resync(self, websocket: WebSocket, workspace_id: str) -> int:
+        logger.info(f"WS resume gap for workspace {workspace_id}; asking client to resync")
+        head = self.event_log.head
+        await websocket.send_json({"type": "resync_required", "offset": head, "epoch": self.event_log.epoch})
+        return head
+
 
 # Global instance for the app
 manager = ConnectionManager()
\ No newline at end of file
@@ -0,0 +1,109 @@
+# http_cache.py
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_TTL_SECONDS = int(os.getenv("HTTP_CACHE_TTL_SECONDS", "30"))
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "2048"))
+
+# Browsers keep the body and revalidate with If-None-Match on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over the given parts (endpoint name, ids, versions, params)."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, `*` matches anything)."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+class ResponseCache:
+    """
+    Serialized JSON bodies keyed by request identity. An entry is only
+    served while its ETag still equals the current one, so a version bump
+    anywhere (any process) invalidates it; the short TTL bounds memory.
+    """
+    def __init__(self, ttl: int = HTTP_CACHE_TTL_SECONDS, max_entries: int = HTTP_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, etag: str) -> Optional[bytes]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            expires_at, cached_etag, body = entry
+            if expires_at <= now or cached_etag != etag:
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return body
+
+    def set(self, key: Hashable, etag: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Global instance for the app
+response_cache = ResponseCache()
+
+_adapters: dict = {}
+
+
+def _serialize(model: Any, payload: Any) -> bytes:
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    return adapter.dump_json(adapter.validate_python(payload, from_attributes=True))
+
+
+def conditional_response(
+    request: Request,
+    key: Hashable,
+    etag: str,
+    model: Any,
+    build: Callable[[], Any],
+) -> Response:
+    """
+    304 if the client already holds `etag`; otherwise the cached body for
+    (key, etag), or `build()` serialized through `model` (the endpoint's
+    response model) and cached.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key, etag)
+    if body is None:
+        body = _serialize(model, build())
+        response_cache.set(key, etag, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,246 @@
+# instrumentation.py
+
+import os
+import time
+import heapq
+import random
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.database import engine
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+except ImportError:  # metrics are optional; Server-Timing and slow-request logs still work
+    Histogram = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    generate_latest = None
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+# Fraction of slow requests that get a detailed log line (0 disables, 1 logs all)
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "1.0"))
+SLOW_REQUEST_TOP_QUERIES = 3
+
+SKIP_PATHS = {"/ping", "/metrics"}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+METRICS_AVAILABLE = Histogram is not None
+
+if METRICS_AVAILABLE:
+    REQUEST_LATENCY = Histogram(
+        "datapulse_http_request_duration_seconds", "Total request latency.",
+        ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+    )
+    REQUEST_DB_SECONDS = Histogram(
+        "datapulse_http_request_db_seconds", "Time spent in SQL per request.",
+        ["method", "route"], buckets=LATENCY_BUCKETS,
+    )
+    REQUEST_DB_QUERIES = Histogram(
+        "datapulse_http_request_db_queries", "SQL statements per request.",
+        ["method", "route"], buckets=QUERY_COUNT_BUCKETS,
+    )
+    REQUEST_EXTERNAL_SECONDS = Histogram(
+        "datapulse_http_request_external_seconds", "Time spent in outbound HTTP calls per request.",
+        ["method", "route"], buckets=LATENCY_BUCKETS,
+    )
+
+
+class RequestStats:
+    """Per-request accumulators. Mutated from threadpool workers too, so keep updates to plain adds."""
+    __slots__ = ("started", "query_count", "db_seconds", "external_count", "external_seconds", "slowest")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.external_count = 0
+        self.external_seconds = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+
+    def add_query(self, seconds: float, statement: str) -> None:
+        self.query_count += 1
+        self.db_seconds += seconds
+        entry = (seconds, statement)
+        if len(self.slowest) < SLOW_REQUEST_TOP_QUERIES:
+            heapq.heappush(self.slowest, entry)
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def add_external(self, seconds: float) -> None:
+        self.external_count += 1
+        self.external_seconds += seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+# ==========================
+#  SQLAlchemy hooks
+# ==========================
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    starts = conn.info.get("query_start")
+    if stats is None or not starts:
+        return
+    stats.add_query(time.perf_counter() - starts.pop(), statement)
+
+
+# ==========================
+#  Outbound HTTP
+# ==========================
+@contextmanager
+def track_external():
+    """Times a block of outbound I/O against the current request, if any."""
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.add_external(time.perf_counter() - started)
+
+
+def instrument_http_clients() -> None:
+    """
+    Wrap requests / httpx send() so every outbound call made while serving
+    a request (OAuth, email, AI, storage) lands in its external time.
+    """
+    try:
+        import requests
+    except ImportError:
+        requests = None
+    if requests is not None and not getattr(requests.Session.send, "_instrumented", False):
+        original_send = requests.Session.send
+
+        def send(self, *args, **kwargs):
+            with track_external():
+                return original_send(self, *args, **kwargs)
+
+        send._instrumented = True
+        requests.Session.send = send
+
+    try:
+        import httpx
+    except ImportError:
+        httpx = None
+    if httpx is not None and not getattr(httpx.AsyncClient.send, "_instrumented", False):
+        original_sync = httpx.Client.send
+        original_async = httpx.AsyncClient.send
+
+        def sync_send(self, *args, **kwargs):
+            with track_external():
+                return original_sync(self, *args, **kwargs)
+
+        async def async_send(self, *args, **kwargs):
+            with track_external():
+                return await original_async(self, *args, **kwargs)
+
+        sync_send._instrumented = True
+        async_send._instrumented = True
+        httpx.Client.send = sync_send
+        httpx.AsyncClient.send = async_send
+
+
+# ==========================
+#  ASGI middleware
+# ==========================
+def _route_label(scope) -> str:
+    # Templated path keeps label cardinality bounded (no ids)
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def server_timing_header(stats: RequestStats, total_seconds: float) -> str:
+    return ", ".join([
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.query_count} queries"',
+        f'ext;dur={stats.external_seconds * 1000:.1f};desc="{stats.external_count} calls"',
+        f"total;dur={total_seconds * 1000:.1f}",
+    ])
+
+
+class InstrumentationMiddleware:
+    """
+    Per-request query count, DB time, outbound HTTP time and latency.
+    Adds a Server-Timing header, feeds the Prometheus histograms and logs
+    a sampled breakdown (with the slowest statements) for slow requests.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing_header(stats, stats.elapsed()).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._record(scope, stats, status_code)
+
+    def _record(self, scope, stats: RequestStats, status_code: int) -> None:
+        total = stats.elapsed()
+        method = scope["method"]
+        route = _route_label(scope)
+
+        if METRICS_AVAILABLE:
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(total)
+            REQUEST_DB_SECONDS.labels(method, route).observe(stats.db_seconds)
+            REQUEST_DB_QUERIES.labels(method, route).observe(stats.query_count)
+            REQUEST_EXTERNAL_SECONDS.labels(method, route).observe(stats.external_seconds)
+
+        if total * 1000 >= SLOW_REQUEST_MS and random.random() < SLOW_REQUEST_SAMPLE_RATE:
+            slowest = "; ".join(
+                f"{seconds * 1000:.1f}ms {' '.join(statement.split())[:120]}"
+                for seconds, statement in sorted(stats.slowest, reverse=True)
+            )
+            logger.warning(
+                f"🐢 [SLOW] {method} {route} -> {status_code} in {total * 1000:.0f}ms | "
+                f"db {stats.db_seconds * 1000:.0f}ms / {stats.query_count} queries | "
+                f"ext {stats.external_seconds * 1000:.0f}ms / {stats.external_count} calls | "
+                f"slowest: {slowest or '-'}"
+            )
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus exposition for /metrics."""
+    if not METRICS_AVAILABLE:
+        return b"# prometheus_client not installed\n", CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
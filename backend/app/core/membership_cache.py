@@ -0,0 +1,95 @@
+# membership_cache.py
+
+import os
+import time
+import uuid
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import exists, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.models.workspace import Workspace, workspace_team
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_VERSION_CACHE_TTL_SECONDS", "60"))
+
+
+class MembershipCache:
+    """
+    In-process cache of each user's current token_version, for the
+    WebSocket handshake. Entries are loaded from the DB on first use and
+    expire after a short TTL; a mismatch reloads once, and session
+    revocations call invalidate_user.
+
+    Workspace access is not cached: authorization goes through
+    member_exists so a removed member loses access on every worker at once.
+    """
+    def __init__(self, token_version_ttl: int = TOKEN_VERSION_CACHE_TTL_SECONDS):
+        self.token_version_ttl = token_version_ttl
+        self._token_versions: Dict[str, Tuple[float, Optional[int]]] = {}
+        self._lock = threading.Lock()
+
+    # --------------------------
+    # Lookups
+    # --------------------------
+    def get_token_version(self, user_id: str) -> Optional[int]:
+        key = str(user_id)
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._token_versions.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        version = self._load_token_version(key)
+        with self._lock:
+            self._token_versions[key] = (now + self.token_version_ttl, version)
+        return version
+
+    # --------------------------
+    # Invalidation
+    # --------------------------
+    def invalidate_user(self, user_id) -> None:
+        with self._lock:
+            self._token_versions.pop(str(user_id), None)
+
+    # --------------------------
+    # Loader (one short-lived session)
+    # --------------------------
+    def _load_token_version(self, user_id: str) -> Optional[int]:
+        try:
+            user_uuid = uuid.UUID(user_id)
+        except (ValueError, TypeError):
+            return None
+
+        db = SessionLocal()
+        try:
+            return db.execute(
+                select(User.token_version).where(User.id == user_uuid)
+            ).scalar_one_or_none()
+        finally:
+            db.close()
+
+
+# Global instance for the app
+membership_cache = MembershipCache()
+
+
+def member_exists(db: Session, workspace_id, user_id, active_only: bool = False) -> bool:
+    """
+    Uncached owner-or-member check as a single EXISTS query. Covers
+    soft-deleted workspaces too unless `active_only`.
+    """
+    in_team = exists().where(
+        workspace_team.c.workspace_id == Workspace.id,
+        workspace_team.c.user_id == user_id,
+    )
+    conditions = [Workspace.id == workspace_id, or_(Workspace.owner_id == user_id, in_team)]
+    if active_only:
+        conditions.append(Workspace.is_deleted == False)
+    return bool(db.scalar(select(exists().where(*conditions))))
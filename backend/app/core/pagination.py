@@ -0,0 +1,68 @@
+# pagination.py
+
+import json
+import uuid
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: uuid.UUID) -> str:
+    """Opaque, URL-safe cursor for the last row of a page."""
+    payload = json.dumps({"t": sort_value.isoformat(), "id": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), uuid.UUID(payload["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def parse_include(include: Optional[str], optional_fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    `?include=a,b` -> the optional fields to project. Omitted means all of
+    them (unchanged payload for existing clients); `?include=` means none.
+    """
+    if include is None:
+        return optional_fields
+
+    requested = {field.strip() for field in include.split(",") if field.strip()}
+    unknown = requested - set(optional_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include field(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(optional_fields)}",
+        )
+    return tuple(field for field in optional_fields if field in requested)
+
+
+def keyset_page(query, sort_column, id_column, cursor: Optional[str], limit: int):
+    """
+    Newest-first keyset page on (sort_column, id_column). Fetches one extra
+    row to learn whether another page exists; no OFFSET, so every page is
+    an index range scan regardless of depth.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+
+def finish_page(rows: Sequence[Any], limit: int, response: Response, sort_attr: str) -> Sequence[Any]:
+    """Trims the probe row and advertises the next cursor in X-Next-Cursor."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_attr), last.id)
+    return rows
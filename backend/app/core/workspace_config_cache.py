@@ -0,0 +1,274 @@
+# workspace_config_cache.py
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import String, event, inspect, select, type_coerce
+from sqlalchemy.orm import Session, object_session
+
+from app.core.database import SessionLocal
+from app.models.workspace import Workspace, fernet
+
+try:
+    import redis
+except ImportError:  # API-only installs without the Celery extras
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_CONFIG_TTL_SECONDS = int(os.getenv("WORKSPACE_CONFIG_TTL_SECONDS", "300"))
+# Shared tier for Celery workers, opt-in (docker-compose sets it); production runs
+# the pollers in the API process and needs none
+WORKSPACE_CONFIG_REDIS_URL = os.getenv("WORKSPACE_CONFIG_REDIS_URL", "")
+# After a Redis error the shared tier is skipped for this long instead of paying a timeout per read
+WORKSPACE_CONFIG_REDIS_BACKOFF_SECONDS = float(os.getenv("WORKSPACE_CONFIG_REDIS_BACKOFF_SECONDS", "30"))
+
+# What the pollers read. Bookkeeping (last_polled_at, failure_count, ...) is not config.
+CONFIG_FIELDS = (
+    "id", "name", "owner_id", "data_source", "is_polling_active", "is_deleted", "polling_interval",
+    "api_url", "api_header_name", "api_header_value",
+    "db_type", "db_host", "db_port", "db_user", "db_password", "db_name", "db_query",
+    "tracked_column", "primary_key_column",
+)
+SECRET_FIELDS = ("api_header_value", "db_password")
+
+
+class WorkspaceConfig:
+    """Read-only snapshot of a workspace's connection settings, secrets decrypted."""
+    __slots__ = CONFIG_FIELDS
+
+    def __init__(self, **values: Any):
+        for field in CONFIG_FIELDS:
+            object.__setattr__(self, field, values.get(field))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("WorkspaceConfig is read-only")
+
+    def __repr__(self) -> str:
+        return f"<WorkspaceConfig {self.id} '{self.name}' source={self.data_source} polling={self.is_polling_active}>"
+
+
+class WorkspaceConfigCache:
+    """
+    Read-through cache of WorkspaceConfig per workspace.
+
+    Tier 1 is this process (decrypted, TTL-bounded). Tier 2 is Redis, shared
+    by the Celery workers: it holds the row with secrets still encrypted, plus
+    a per-workspace version counter. invalidate() bumps that counter, so a
+    process-local entry is only served while its version is still current.
+    Without Redis, versions are kept in process and the TTL bounds staleness
+    across processes. While Redis is backing off after an error, reads go
+    straight to the database and nothing is cached.
+
+    Commits that change any CONFIG_FIELDS invalidate automatically (see the
+    listeners below); update_workspace also invalidates explicitly.
+    """
+    def __init__(self, ttl: int = WORKSPACE_CONFIG_TTL_SECONDS, redis_url: str = WORKSPACE_CONFIG_REDIS_URL):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, int, WorkspaceConfig]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+
+        if redis is not None and redis_url:
+            try:
+                self._redis = redis.Redis.from_url(
+                    redis_url, decode_responses=True, socket_timeout=0.5, socket_connect_timeout=0.5
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ [WS CONFIG] Redis tier disabled: {e}")
+
+    # --------------------------
+    # Lookups
+    # --------------------------
+    def get(self, workspace_id) -> Optional[WorkspaceConfig]:
+        """Config for a workspace, or None if it does not exist."""
+        key = str(workspace_id)
+        now = time.monotonic()
+        version = self._current_version(key)
+
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached and cached[0] > now and cached[1] == version:
+            return cached[2]
+
+        values = self._read_shared(key, version)
+        if values is None:
+            values = self._load(key)
+            if values is None:
+                return None
+            self._write_shared(key, version, values)
+
+        config = self._decrypt(values)
+        with self._lock:
+            # An invalidation that landed mid-load must not be overwritten by the old row
+            if version >= 0 and (self._redis is not None or self._versions.get(key, 0) == version):
+                self._entries[key] = (now + self.ttl, version, config)
+        return config
+
+    # --------------------------
+    # Invalidation
+    # --------------------------
+    def invalidate(self, workspace_id) -> None:
+        key = str(workspace_id)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+        if self._redis is not None:
+            # Never skipped for backoff: a lost bump would leave other processes serving stale config
+            try:
+                pipe = self._redis.pipeline()
+                pipe.incr(self._version_key(key))
+                pipe.delete(self._entry_key(key))
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"⚠️ [WS CONFIG] Redis invalidation failed for {key}: {e}")
+                self._mark_redis_down()
+
+    # --------------------------
+    # Tiers
+    # --------------------------
+    @staticmethod
+    def _version_key(key: str) -> str:
+        return f"ws_config_version:{key}"
+
+    @staticmethod
+    def _entry_key(key: str) -> str:
+        return f"ws_config:{key}"
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _mark_redis_down(self) -> None:
+        if time.monotonic() >= self._redis_down_until:
+            logger.warning(f"⚠️ [WS CONFIG] Redis unavailable; skipping it for {WORKSPACE_CONFIG_REDIS_BACKOFF_SECONDS:.0f}s")
+        self._redis_down_until = time.monotonic() + WORKSPACE_CONFIG_REDIS_BACKOFF_SECONDS
+
+    def _current_version(self, key: str) -> int:
+        if self._redis is not None:
+            if not self._redis_available():
+                # Unknown version: never trust tier 1 for this read
+                return -1
+            try:
+                return int(self._redis.get(self._version_key(key)) or 0)
+            except Exception as e:
+                logger.debug(f"[WS CONFIG] Redis version read failed: {e}")
+                self._mark_redis_down()
+                return -1
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def _read_shared(self, key: str, version: int) -> Optional[Dict[str, Any]]:
+        if not self._redis_available() or version < 0:
+            return None
+        try:
+            raw = self._redis.get(self._entry_key(key))
+        except Exception as e:
+            logger.debug(f"[WS CONFIG] Redis read failed: {e}")
+            self._mark_redis_down()
+            return None
+        if not raw:
+            return None
+
+        payload = json.loads(raw)
+        if payload.get("version") != version:
+            return None
+        return payload["values"]
+
+    def _write_shared(self, key: str, version: int, values: Dict[str, Any]) -> None:
+        if not self._redis_available() or version < 0:
+            return
+        try:
+            self._redis.set(
+                self._entry_key(key),
+                json.dumps({"version": version, "values": values}),
+                ex=self.ttl,
+            )
+        except Exception as e:
+            logger.debug(f"[WS CONFIG] Redis write failed: {e}")
+            self._mark_redis_down()
+
+    # --------------------------
+    # Loader (one short-lived session, secrets fetched as ciphertext)
+    # --------------------------
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            ws_uuid = uuid.UUID(key)
+        except (ValueError, TypeError):
+            return None
+
+        columns = [
+            type_coerce(getattr(Workspace, field), String).label(field) if field in SECRET_FIELDS
+            else getattr(Workspace, field)
+            for field in CONFIG_FIELDS
+        ]
+
+        db = SessionLocal()
+        try:
+            row = db.execute(select(*columns).where(Workspace.id == ws_uuid)).mappings().first()
+        finally:
+            db.close()
+
+        if row is None:
+            return None
+
+        values = dict(row)
+        values["id"] = str(values["id"])
+        values["owner_id"] = str(values["owner_id"]) if values["owner_id"] else None
+        logger.debug(f"Workspace config loaded for {key}")
+        return values
+
+    @staticmethod
+    def _decrypt(values: Dict[str, Any]) -> WorkspaceConfig:
+        plain = dict(values)
+        plain["id"] = uuid.UUID(plain["id"])
+        plain["owner_id"] = uuid.UUID(plain["owner_id"]) if plain["owner_id"] else None
+        for field in SECRET_FIELDS:
+            if plain.get(field) is not None:
+                plain[field] = fernet.decrypt(plain[field].encode()).decode()
+        return WorkspaceConfig(**plain)
+
+
+# Global instance for the app
+workspace_config_cache = WorkspaceConfigCache()
+
+
+# ==========================
+#  Invalidate on commit
+# ==========================
+_PENDING_KEY = "workspace_config_invalidations"
+
+
+@event.listens_for(Workspace, "after_update")
+def _workspace_config_changed(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[field].history.has_changes() for field in CONFIG_FIELDS if field != "id"):
+        return
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Workspace, "after_delete")
+def _workspace_config_deleted(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_config_invalidations(session):
+    for workspace_id in session.info.pop(_PENDING_KEY, ()):
+        workspace_config_cache.invalidate(workspace_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_config_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
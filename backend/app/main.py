@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware 
 from slowapi.errors import RateLimitExceeded
@@ -10,6 +10,7 @@ from app.api.dependencies import limiter
 from app.core.logging import setup_logging
 import logging
 import os
+import hmac
 import asyncio 
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
@@ -20,14 +21,18 @@ load_dotenv()
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from app.api import auth, workspaces, notifications, uploads, alerts, chat, user_action, feedbacks
-from app.models import user, workspace, data_upload, notification, alert_rule, token, feedback, workspace_user_settings
+from app.models import user, workspace, data_upload, notification, alert_rule, token, feedback, workspace_user_settings, metric_series, metric_rollup, workspace_stats
 from app.core.guard import send_telegram_alert
+from app.core.instrumentation import InstrumentationMiddleware, instrument_http_clients, render_metrics
+from app.services.profiling import PROFILING_WORKERS, warm_profiling_pool, shutdown_profiling_pool
+from app.services.workspace_stats import reconcile_workspace_stats  # also registers the counter listeners
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 APP_MODE_LOCAL = os.getenv("MODE_LOCAL")
 frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5173")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 origins = [
     frontend_url,
@@ -36,6 +41,7 @@ origins = [
 ]
 
 scheduler = AsyncIOScheduler(timezone="UTC")
+STATS_RECONCILE_HOURS = int(os.getenv("STATS_RECONCILE_HOURS", "6"))
 
 async def redis_listener(): 
     import redis.asyncio as aioredis
@@ -53,10 +59,18 @@ async def redis_listener():
                 
                 if message is not None: 
                     data = json.loads(message["data"]) 
+
+                    # User-targeted pings (e.g. NEW_NOTIFICATION_ALERT) from Celery
+                    user_id = data.pop("user_id", None)
+                    if user_id:
+                        await manager.push_to_user(str(user_id), data)
+                        logger.info(f"✅ [RELAY] Signal sent to user: {data['type']} for {user_id}")
+                        continue
+
                     workspace_id = data.get("workspace_id") 
                     
                     # Relay the message to the actual browser connections
-                    await manager.broadcast_to_workspace(str(workspace_id), json.dumps(data)) 
+                    await manager.broadcast_to_workspace(str(workspace_id), data) 
                     logger.info(f"✅ [RELAY] Signal sent to UI: {data['type']} for {workspace_id}") 
                 
                 await asyncio.sleep(0.1) 
@@ -98,6 +112,16 @@ async def lifespan(app: FastAPI):
                     misfire_grace_time=300,
                 )
 
+                scheduler.add_job(
+                    reconcile_workspace_stats,
+                    "interval",
+                    hours=STATS_RECONCILE_HOURS,
+                    id="reconcile_workspace_stats_job",
+                    max_instances=1,
+                    coalesce=True,
+                    misfire_grace_time=600,
+                )
+
                 scheduler.start()
                 logger.info("✅ [APScheduler] 'Smart Watch' has started.")
             except Exception as e:
@@ -105,6 +129,15 @@ async def lifespan(app: FastAPI):
         else:
             logger.warning("🟡 [APScheduler] DISABLED (ENABLE_SCHEDULER=false)")
 
+        # Spawn profiling workers now so the first upload doesn't pay the pandas import
+        if PROFILING_WORKERS > 0:
+            try:
+                await asyncio.to_thread(warm_profiling_pool)
+            except Exception as e:
+                logger.error(f"❌ [PROFILER] Failed to warm process pool: {e}", exc_info=True)
+        else:
+            logger.info("🧮 [PROFILER] Process pool disabled; profiling in-thread.")
+
     yield
   
     if hasattr(app.state, "redis_listener_task"): 
@@ -114,6 +147,8 @@ async def lifespan(app: FastAPI):
         scheduler.shutdown()
         logger.info("[APScheduler] 'Smart Watch' shut down.")
 
+    shutdown_profiling_pool()
+
 app = FastAPI(lifespan=lifespan)
 
 # ---  THE GUARDIAN MIDDLEWARE ---
@@ -208,8 +243,13 @@ app.add_middleware(
     allow_credentials=True, 
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# --- Instrumentation (outermost: sees total latency, adds Server-Timing) ---
+instrument_http_clients()
+app.add_middleware(InstrumentationMiddleware)
+
 # --- Routers ---
 app.include_router(auth.router, prefix="/api")
 app.include_router(user_action.router, prefix="/api")
@@ -230,6 +270,16 @@ async def ping():
     }
     
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    # Fail closed: without a configured METRICS_TOKEN nobody can scrape
+    supplied = request.headers.get("Authorization", "")
+    if not METRICS_TOKEN or not hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/")
 def root():
     return {"msg": "DataPulse backend is running 🔥", "mode": os.getenv("APP_MODE", "dev")}
\ No newline at end of file
@@ -1,6 +1,6 @@
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String, ForeignKey, Boolean, Float
+from sqlalchemy import Column, String, ForeignKey, Boolean, Float, JSON, Index
 from app.core.database import Base
 
 class AlertRule(Base):
@@ -12,8 +12,17 @@ class AlertRule(Base):
     metric = Column(String, nullable=False)
     condition = Column(String, nullable=False) 
     value = Column(Float, nullable=False)
+    # upper bound for between / outside
+    value_max = Column(Float, nullable=True)
+    # extra {column_name, metric, condition, value, value_max} clauses ANDed with this one
+    clauses = Column(JSON, nullable=True)
     is_active = Column(Boolean, default=True, nullable=False, server_default='true')
 
+    __table_args__ = (
+        # rule list + active-rule plan / limit check
+        Index("ix_alert_rules_workspace_active", "workspace_id", "is_active"),
+    )
+
     def to_dict(self):
         """Returns a dictionary representation of the alert rule for email context."""
         return {
@@ -23,5 +32,7 @@ class AlertRule(Base):
             "metric": self.metric,
             "condition": self.condition,
             "value": self.value,
+            "value_max": self.value_max,
+            "clauses": self.clauses,
             "is_active": self.is_active
         }
@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy.dialects.postgresql import UUID, JSON
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Text, func, BigInteger
+from sqlalchemy.dialects.postgresql import UUID, JSON, JSONB
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Text, func, BigInteger, Index, LargeBinary, text
+from sqlalchemy.orm import deferred
 
 from app.core.database import Base
 
@@ -26,6 +27,23 @@ class DataUpload(Base):
         server_default=func.now()
     )
 
+    # JSON (not JSONB) keeps the column order the UI renders
     schema_info = Column(JSON, nullable=True)
     schema_changed_from_previous = Column(Boolean, default=False)
-    analysis_results = Column(JSON, nullable=True)
+    # JSONB so sub-keys can be extracted and indexed in Postgres
+    analysis_results = Column(JSONB, nullable=True)
+    # Key + cell hashes for the next upload's row diff (services/row_diff.py);
+    # cleared once that diff has run, so only the latest upload per type keeps one
+    row_fingerprint = deferred(Column(LargeBinary, nullable=True))
+
+    __table_args__ = (
+        # history list (keyset on uploaded_at, id) / previous-upload lookup, with and without a type filter
+        Index("ix_data_uploads_ws_type_uploaded_at", "workspace_id", "upload_type", uploaded_at.desc(), id.desc()),
+        Index("ix_data_uploads_ws_uploaded_at", "workspace_id", uploaded_at.desc(), id.desc()),
+        # drift baseline: uploads that carry distribution sketches
+        Index(
+            "ix_data_uploads_sketch_history",
+            "workspace_id", "upload_type", uploaded_at.desc(),
+            postgresql_where=text("analysis_results ? 'distribution_sketches'"),
+        ),
+    )
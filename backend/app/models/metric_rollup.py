@@ -0,0 +1,46 @@
+import uuid
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class MetricRollup(Base):
+    """
+    Pre-aggregated describe() metric per (workspace, upload type, column,
+    metric) at one granularity: a single upload, an hour or a day.
+    Maintained incrementally as uploads finish (see services/rollups.py).
+    """
+    __tablename__ = "metric_rollups"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    workspace_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("workspaces.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    upload_type = Column(String(50), nullable=False)
+    column_name = Column(String, nullable=False)
+    metric = Column(String(20), nullable=False)
+
+    # "upload" | "hour" | "day"
+    bucket = Column(String(10), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+
+    # only set for bucket == "upload"
+    upload_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    sum = Column(Float, nullable=False, default=0.0)
+    min = Column(Float, nullable=True)
+    max = Column(Float, nullable=True)
+    last = Column(Float, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "workspace_id", "upload_type", "column_name", "metric", "bucket", "bucket_start",
+            name="uq_metric_rollups_series_bucket",
+        ),
+    )
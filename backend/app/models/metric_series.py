@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+from app.core.database import Base
+
+
+class MetricSeries(Base):
+    """
+    Fixed-capacity ring buffer of one describe() metric for one column,
+    appended once per processed upload. `head` is the next write slot and
+    `size` the number of filled slots (<= capacity).
+    """
+    __tablename__ = "metric_series"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    workspace_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("workspaces.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    upload_type = Column(String(50), nullable=False)
+    column_name = Column(String, nullable=False)
+    metric = Column(String(20), nullable=False)
+
+    capacity = Column(Integer, nullable=False)
+    values = Column(ARRAY(Float), nullable=False)
+    head = Column(Integer, nullable=False, default=0, server_default="0")
+    size = Column(Integer, nullable=False, default=0, server_default="0")
+
+    last_upload_id = Column(UUID(as_uuid=True), nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
+
+    __table_args__ = (
+        UniqueConstraint("workspace_id", "upload_type", "column_name", "metric"),
+    )
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Text, func
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Text, func, Index, text
 from app.core.database import Base
 
 class Notification(Base):
@@ -23,4 +23,11 @@ class Notification(Base):
     notification_type = Column(String, nullable=False, default="alert", server_default="alert")
     priority = Column(String, nullable=False, default="info", server_default="info")
     action_url = Column(String, nullable=True)
-    is_archived = Column(Boolean, default=False, nullable=False, server_default='false')
\ No newline at end of file
+    is_archived = Column(Boolean, default=False, nullable=False, server_default='false')
+
+    __table_args__ = (
+        # notification feed, newest first (keyset on created_at, id)
+        Index("ix_notifications_user_created_at", "user_id", created_at.desc(), id.desc()),
+        # unread badge / mark-all-read
+        Index("ix_notifications_user_unread", "user_id", postgresql_where=text("is_read = false")),
+    )
\ No newline at end of file
@@ -2,8 +2,8 @@ import uuid
 import os
 from datetime import datetime, timezone
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String, DateTime, ForeignKey, Table, Boolean, TypeDecorator, Text, Integer, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, ForeignKey, Table, Boolean, TypeDecorator, Text, Integer, Index, func, text
+from sqlalchemy.orm import deferred, relationship
 from app.core.database import Base
 from cryptography.fernet import Fernet
 
@@ -15,6 +15,7 @@ fernet = Fernet(ENCRYPTION_KEY.encode())
 
 class EncryptedString(TypeDecorator):
     impl = String
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):
         if value is not None:
@@ -41,6 +42,8 @@ workspace_team = Table(
         ForeignKey("users.id", ondelete="CASCADE"), 
         primary_key=True
     ),
+    # "workspaces I've joined" (PK only covers workspace_id-first lookups)
+    Index("ix_workspace_team_user_id", "user_id"),
 )
 
 class Workspace(Base):
@@ -61,9 +64,12 @@ class Workspace(Base):
     polling_interval = Column(String(50), nullable=True)
     last_polled_at = Column(DateTime(timezone=True), nullable=True)
     api_header_name = Column(String(100), nullable=True)
-    api_header_value = Column(EncryptedString, nullable=True) 
+    # Secrets are deferred: list/detail reads never pay for Fernet. The first access
+    # loads (and decrypts) the whole "secrets" group in one query.
+    api_header_value = deferred(Column(EncryptedString, nullable=True), group="secrets")
     is_polling_active = Column(Boolean, default=False, nullable=False, server_default='false') 
     tracked_column = Column(String(100), nullable=True)
+    primary_key_column = Column(String(100), nullable=True)
     owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
     failure_count = Column(Integer, default=0, nullable=False, server_default='0')
     last_failure_reason = Column(Text, nullable=True)
@@ -73,14 +79,28 @@ class Workspace(Base):
     db_host = Column(String(255), nullable=True)
     db_port = Column(Integer, nullable=True)
     db_user = Column(String(100), nullable=True)
-    db_password = Column(EncryptedString, nullable=True) 
+    db_password = deferred(Column(EncryptedString, nullable=True), group="secrets")
     db_name = Column(String(100), nullable=True)
     db_query = Column(Text, nullable=True)
     is_deleted = Column(Boolean, default=False, nullable=False, server_default='false')
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # owned / trashed workspace lists
+        Index("ix_workspaces_owner_deleted", "owner_id", "is_deleted"),
+        # scheduler scan for due polls
+        Index(
+            "ix_workspaces_polling_active",
+            "last_polled_at",
+            postgresql_where=text("is_polling_active = true"),
+        ),
+    )
+
     owner = relationship("User", back_populates="workspaces")
     team_members = relationship(
         "User",
         secondary=workspace_team,
         back_populates="joined_workspaces"
-    )
\ No newline at end of file
+    )
+    # Read side for notification fan-out; rows are still written through WorkspaceUserSettings
+    user_settings = relationship("WorkspaceUserSettings", viewonly=True)
\ No newline at end of file
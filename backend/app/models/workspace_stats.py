@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, func
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.core.database import Base
+
+
+class WorkspaceStats(Base):
+    """
+    Denormalized per-workspace counters, kept in step with data_uploads and
+    alert_rules by ORM flush listeners (services/workspace_stats.py) and
+    corrected by a periodic reconciliation job.
+    """
+    __tablename__ = "workspace_stats"
+
+    workspace_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("workspaces.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    upload_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_size_bytes = Column(BigInteger, nullable=False, default=0, server_default="0")
+    alert_count = Column(Integer, nullable=False, default=0, server_default="0")
+    active_alert_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # bumped on every response-visible write to the workspace, its uploads or its rules (ETags)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.alert_rule import AlertRule
+from app.services.drift import DRIFT_METRICS
+from app.services.metric_history import WINDOWED_METRICS
+
+logger = logging.getLogger(__name__)
+
+# Workers in other processes (Celery) can't see API-side invalidations; the TTL bounds staleness there
+ALERT_PLAN_TTL_SECONDS = int(os.getenv("ALERT_PLAN_TTL_SECONDS", "60"))
+
+# Condition codes used by the compiled plan
+OP_CODES = {
+    "greater_than": 0,
+    "less_than": 1,
+    "equals": 2,
+    "not_equals": 3,
+    "between": 4,
+    "outside": 5,
+    "pct_change_greater_than": 6,
+    "pct_change_less_than": 7,
+}
+RANGE_CONDITIONS = {"between", "outside"}
+PCT_CHANGE_CONDITIONS = {"pct_change_greater_than", "pct_change_less_than"}
+ALLOWED_CONDITIONS = set(OP_CODES)
+
+# Extra clauses a compound rule may AND together
+MAX_EXTRA_CLAUSES = 3
+
+
+def resolve_metric(analysis_results: Optional[dict], column_name: str, metric: str) -> Optional[float]:
+    """
+    describe() metrics come from summary_stats, drift metrics from the drift
+    report, "<transform>:<base>" metrics from the windowed block.
+    """
+    if not analysis_results:
+        return None
+    if metric in WINDOWED_METRICS:
+        source = analysis_results.get("windowed") or {}
+    elif metric in DRIFT_METRICS:
+        source = analysis_results.get("drift") or {}
+    else:
+        source = analysis_results.get("summary_stats") or {}
+    value = (source.get(column_name) or {}).get(metric)
+    return None if value is None else float(value)
+
+
+def _rule_clauses(rule: AlertRule) -> List[Dict[str, Any]]:
+    primary = {
+        "column_name": rule.column_name,
+        "metric": rule.metric,
+        "condition": rule.condition,
+        "value": rule.value,
+        "value_max": rule.value_max,
+    }
+    return [primary] + list(rule.clauses or [])
+
+
+def _condition_label(clause: Dict[str, Any]) -> str:
+    return clause["condition"].replace("pct_change_", "% change ").replace("_", " ")
+
+
+def _threshold_label(clause: Dict[str, Any]) -> Any:
+    value = round(float(clause["value"]), 4)
+    if clause["condition"] in RANGE_CONDITIONS:
+        return f"{value} – {round(float(clause['value_max']), 4)}"
+    return value
+
+
+class AlertPlan:
+    """
+    A workspace's active rules flattened into clause arrays.
+
+    Every clause is one (column, metric) lookup plus an op code and bounds;
+    compound rules own several consecutive clauses and fire only when all
+    of them hold. Evaluation gathers each distinct (column, metric) value
+    once, then compares every clause in a single vectorized pass.
+    """
+    def __init__(self, rules: List[AlertRule]):
+        self.rules: List[Dict[str, Any]] = []
+        keys: Dict[Tuple[str, str], int] = {}
+        key_index, ops, lows, highs, rule_starts = [], [], [], [], []
+
+        for rule in rules:
+            clauses = _rule_clauses(rule)
+            if any(c.get("condition") not in OP_CODES for c in clauses):
+                logger.warning(f"⚠️ [ENGINE] Skipping rule {rule.id}: unknown condition.")
+                continue
+
+            rule_starts.append(len(ops))
+            for clause in clauses:
+                key = (clause["column_name"], clause["metric"])
+                key_index.append(keys.setdefault(key, len(keys)))
+                ops.append(OP_CODES[clause["condition"]])
+                lows.append(float(clause["value"]))
+                value_max = clause.get("value_max")
+                highs.append(float(value_max) if value_max is not None else np.nan)
+
+            self.rules.append({"id": str(rule.id), "clauses": clauses})
+
+        self.keys: List[Tuple[str, str]] = list(keys)
+        self.key_index = np.asarray(key_index, dtype=np.int64)
+        self.ops = np.asarray(ops, dtype=np.int8)
+        self.lows = np.round(np.asarray(lows, dtype="float64"), 4)
+        self.highs = np.round(np.asarray(highs, dtype="float64"), 4)
+        self.rule_starts = np.asarray(rule_starts, dtype=np.int64)
+        self.uses_pct_change = bool(np.isin(self.ops, (6, 7)).any())
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @property
+    def window_keys(self) -> List[Tuple[str, str]]:
+        """(column, metric) pairs that need windowed metrics computed."""
+        return [key for key in self.keys if key[1] in WINDOWED_METRICS]
+
+    def _gather(self, analysis_results: Optional[dict]) -> np.ndarray:
+        values = [resolve_metric(analysis_results, col, metric) for col, metric in self.keys]
+        return np.asarray([np.nan if v is None else v for v in values], dtype="float64")
+
+    def evaluate(
+        self,
+        analysis_results: dict,
+        previous_results: Optional[dict] = None,
+        previous_values: Optional[Callable[[List[Tuple[str, str]]], np.ndarray]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the triggered-alert dicts (email/notification shape) for
+        rules whose clauses all hold. Percent-change clauses compare with
+        the previous upload: `previous_values` (per-key lookup over the
+        metric history) first, `previous_results` for keys it lacks.
+        """
+        if not self.rules:
+            return []
+
+        current = self._gather(analysis_results)[self.key_index]
+        values = current
+
+        if self.uses_pct_change:
+            prev = self._gather(previous_results)
+            if previous_values is not None:
+                stored = np.asarray(previous_values(self.keys), dtype="float64")
+                prev = np.where(np.isnan(stored), prev, stored)
+            prev = prev[self.key_index]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pct = (current - prev) / np.abs(prev) * 100.0
+            pct[~np.isfinite(pct)] = np.nan
+            values = np.where(np.isin(self.ops, (6, 7)), pct, current)
+
+        values = np.round(values, 4)
+        lo, hi, op = self.lows, self.highs, self.ops
+
+        with np.errstate(invalid="ignore"):
+            hits = np.select(
+                [op == 0, op == 1, op == 2, op == 3, op == 4, op == 5, op == 6, op == 7],
+                [
+                    values > lo,
+                    values < lo,
+                    values == lo,
+                    values != lo,
+                    (values >= lo) & (values <= hi),
+                    (values < lo) | (values > hi),
+                    values > lo,
+                    values < lo,
+                ],
+                default=False,
+            )
+        # Missing metric never fires (NaN != x would otherwise be True)
+        hits &= ~np.isnan(values)
+
+        fired = np.logical_and.reduceat(hits, self.rule_starts)
+
+        triggered = []
+        for rule_pos in np.flatnonzero(fired):
+            rule = self.rules[rule_pos]
+            primary = rule["clauses"][0]
+            extra = len(rule["clauses"]) - 1
+            condition = _condition_label(primary)
+            if extra:
+                condition = f"{condition} (+{extra} conditions)"
+            triggered.append({
+                "rule_id": rule["id"],
+                "column_name": primary["column_name"],
+                "metric": primary["metric"].replace("50%", "median").upper(),
+                "condition": condition,
+                "threshold": _threshold_label(primary),
+                "actual": float(values[self.rule_starts[rule_pos]]),
+            })
+        return triggered
+
+
+class AlertPlanCache:
+    """
+    Compiled AlertPlan per workspace. alerts.py invalidates on rule
+    create / toggle / delete; entries also expire after ALERT_PLAN_TTL_SECONDS.
+    """
+    def __init__(self, ttl: int = ALERT_PLAN_TTL_SECONDS):
+        self.ttl = ttl
+        self._plans: Dict[str, Tuple[float, AlertPlan]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, workspace_id) -> AlertPlan:
+        key = str(workspace_id)
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._plans.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        rules = db.query(AlertRule).filter(
+            AlertRule.workspace_id == workspace_id,
+            AlertRule.is_active == True
+        ).all()
+        plan = AlertPlan(rules)
+
+        with self._lock:
+            self._plans[key] = (now + self.ttl, plan)
+        return plan
+
+    def invalidate(self, workspace_id) -> None:
+        with self._lock:
+            self._plans.pop(str(workspace_id), None)
+
+
+# Global instance for the app
+alert_plan_cache = AlertPlanCache()
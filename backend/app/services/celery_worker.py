@@ -7,18 +7,18 @@ import logging
 import datetime as dt
 import json
 import re 
+import time
 from celery import Celery
-from sqlalchemy.orm import Session
+from celery.signals import worker_init, worker_process_shutdown
+from kombu import Queue
+from sqlalchemy.orm import Session, load_only
 from sqlalchemy import create_engine, text  
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
-import google.generativeai as genai
-import markdown2
 import pytz
 from urllib.parse import quote_plus
 from io import StringIO 
 import numpy as np
-import operator
 from typing import Coroutine, Any 
 
 # Project Imports
@@ -27,31 +27,84 @@ from app.models.workspace import Workspace
 from app.models.data_upload import DataUpload
 from app.models.user import User
 from app.models.notification import Notification
-from app.models.alert_rule import AlertRule
 from app.services.email_service import send_detailed_alert_email, send_threshold_alert_email, send_otp_email
 from app.core.connection_manager import manager
+from app.core.workspace_config_cache import workspace_config_cache
 from app.models.token import RefreshToken
 from app.models.feedback import Feedback
+from app.services.pipeline import PipelineExecutor, run_csv_pipeline, is_fetch_due
+from app.services.stage_timing import StageTimer, export_fetch_metrics
+from app.services.storage_service import upload_csv_bytes
+from app.services.upload_limits import is_workspace_upload_limit_reached
+from app.services.workspace_stats import reconcile_workspace_stats as reconcile_stats
 
 # --- Setup & Safety Config ---
 logger = logging.getLogger(__name__)
 redis_url = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 APP_MODE = os.getenv("APP_MODE", "development") 
 
-# Initialize Gemini model (Defensive initialization)
-gemini_model = None
-if GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model = genai.GenerativeModel('gemini-2.5-flash')
-        logger.info(f"✅ Gemini AI model initialized (Mode: {APP_MODE})")
-    except Exception as e:
-        logger.error(f"⚠️ Failed to initialize Gemini AI: {e}")
-
 # Define the Celery app
 celery_app = Celery("tasks", broker=redis_url, backend=redis_url)
 
+# --- METRICS ---
+# Stage / fetch histograms (stage_timing.py) are recorded in the prefork children.
+# With PROMETHEUS_MULTIPROC_DIR set (before start) the children write them to that
+# directory and the parent serves the merged view on CELERY_METRICS_PORT.
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "0"))
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    if not CELERY_METRICS_PORT:
+        return
+    if not PROMETHEUS_MULTIPROC_DIR:
+        logger.warning("⚠️ [METRICS] CELERY_METRICS_PORT set without PROMETHEUS_MULTIPROC_DIR; exporter not started.")
+        return
+    try:
+        from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+    except ImportError:
+        logger.warning("⚠️ [METRICS] prometheus_client not installed; exporter not started.")
+        return
+
+    # Stale files from a previous run would be merged into this one
+    Path(PROMETHEUS_MULTIPROC_DIR).mkdir(parents=True, exist_ok=True)
+    for stale in Path(PROMETHEUS_MULTIPROC_DIR).glob("*.db"):
+        stale.unlink()
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(CELERY_METRICS_PORT, registry=registry)
+    logger.info(f"📈 [METRICS] Worker metrics exporter listening on :{CELERY_METRICS_PORT}")
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    if not (CELERY_METRICS_PORT and PROMETHEUS_MULTIPROC_DIR):
+        return
+    try:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
+    except Exception as e:
+        logger.debug(f"[METRICS] mark_process_dead failed: {e}")
+
+# --- QUEUES ---
+# One queue per workload so a burst of heavy CSVs never delays OTP emails.
+# Run one worker per queue group (see docker-compose.yml), e.g.
+#   celery ... worker -Q email -c 2
+#   celery ... worker -Q scheduling,fetch -c 4
+#   celery ... worker -Q process -c 2
+QUEUE_SCHEDULING = "scheduling"
+QUEUE_FETCH = "fetch"
+QUEUE_PROCESS = "process"
+QUEUE_EMAIL = "email"
+
+# Redis transport: 0 is the highest priority
+PRIORITY_EMAIL = 0
+PRIORITY_SCHEDULING = 3
+PRIORITY_FETCH = 5
+PRIORITY_PROCESS = 7
+
 # --- (PROD-READY) CELERY CONFIGURATION ---
 celery_app.conf.update(
     task_track_started=True,
@@ -60,7 +113,33 @@ celery_app.conf.update(
     accept_content=['json'],  # Strict content type for safety
     result_serializer='json',
     task_time_limit=300,      # Hard limit: tasks can't run forever (Survival)
-    task_soft_time_limit=240  # Soft limit: allows cleanup before being killed
+    task_soft_time_limit=240, # Soft limit: allows cleanup before being killed
+
+    task_queues=(
+        Queue(QUEUE_SCHEDULING, routing_key=QUEUE_SCHEDULING),
+        Queue(QUEUE_FETCH, routing_key=QUEUE_FETCH),
+        Queue(QUEUE_PROCESS, routing_key=QUEUE_PROCESS),
+        Queue(QUEUE_EMAIL, routing_key=QUEUE_EMAIL),
+    ),
+    task_default_queue=QUEUE_PROCESS,
+    task_routes={
+        "schedule_data_fetches": {"queue": QUEUE_SCHEDULING},
+        "fetch_api_data": {"queue": QUEUE_FETCH},
+        "fetch_db_data": {"queue": QUEUE_FETCH},
+        "process_csv_task": {"queue": QUEUE_PROCESS},
+        "send_otp_email_task": {"queue": QUEUE_EMAIL},
+        "reconcile_workspace_stats": {"queue": QUEUE_SCHEDULING},
+    },
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "queue_order_strategy": "priority",
+    },
+
+    # Long CPU tasks: take one message at a time and ack only when done,
+    # so a crashed worker hands the job back instead of losing it.
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
 )
 
 celery_app.conf.beat_schedule = {
@@ -68,86 +147,21 @@ celery_app.conf.beat_schedule = {
         "task": "schedule_data_fetches",
         "schedule": 60.0,
     },
+    "reconcile-workspace-stats": {
+        "task": "reconcile_workspace_stats",
+        "schedule": float(os.getenv("STATS_RECONCILE_HOURS", "6")) * 3600,
+    },
 }
 redis_client = redis.Redis(host='redis', port=6379, db=0, decode_responses=True)
 
-# Utility - Identical Parity
-def convert_utc_to_ist_str(utc_dt):
-    if not utc_dt: return "N/A"
-    try:
-        ist_zone = pytz.timezone('Asia/Kolkata')
-        aware_utc_dt = pytz.utc.localize(utc_dt) if utc_dt.tzinfo is None else utc_dt
-        ist_dt = aware_utc_dt.astimezone(ist_zone)
-        return ist_dt.strftime("%B %d, %Y, %I:%M %p %Z")
-    except Exception:
-        return "Invalid Date"
-
-# Move this to the top of your celery_service.py
-AI_SYSTEM_PROMPT = """
-SYSTEM PROMPT (DO NOT CHANGE OUTPUT FORMAT):
-You are a Senior Data Analyst generating insights for a production SaaS dashboard.
-
-CRITICAL OUTPUT RULES:
-- Output ONLY plain Markdown
-- NO HTML tags (<p>, <ul>, etc.)
-- NO code blocks (no ``` or ` )
-- NO emojis or headings
-- NO assumptions beyond the provided data
-
-REQUIRED STRUCTURE:
-1. Exactly ONE paragraph (1-2 sentences) summarizing the impact.
-2. Exactly TWO bullet points using - (dash + space), each a business question.
-
-FAILURE HANDLING:
-If no meaningful insight can be derived, output a single plain sentence explaining that clearly.
-""".strip()
-
-def get_ai_insight(schema_changes: dict) -> str | None:
-    # 1. Fast Exit: Mirroring both versions
-    if not gemini_model:
-        logger.warning("Gemini model not available. Skipping AI insight.")
-        return None
-
-    added = schema_changes.get('added', [])
-    removed = schema_changes.get('removed', [])
-    
-    # 2. Logic Check: Save API costs/quota
-    if not added and not removed:
-        # We use the tasks.py plain text version here, not the HTML version
-        return "No significant schema changes were detected to analyze."
-
-    # 3. Defensive Prompting: Use the strict Cloud prompt
-    user_query = (
-        f"Analyze these schema changes:\n"
-        f"Added Columns: {', '.join(added) if added else 'None'}\n"
-        f"Removed Columns: {', '.join(removed) if removed else 'None'}"
-    )
-
-    try:
-        logger.info("🧠 [AI] Requesting strict markdown insight (Prod Guardrails)...")
-        
-        # Merge the System Prompt with the User Query
-        full_prompt = f"{AI_SYSTEM_PROMPT}\n\nUSER INPUT:\n{user_query}"
-        
-        # 4. Execution
-        response = gemini_model.generate_content(full_prompt)
-        
-        # 5. Strict Cleaning: Ported from tasks.py
-        # This removes any potential Markdown wrappers the AI might hallucinate
-        raw_text = response.text.strip()
-        clean_text = raw_text.replace("```markdown", "").replace("```", "").strip()
-        
-        logger.info("✨ [AI] Insight generated successfully.")
-        return clean_text
-
-    except Exception as e:
-        # 6. Graceful Degradation: Ported from tasks.py
-        logger.error(f"❌ [AI] Error generating insight: {e}", exc_info=True)
-        return "AI analysis is currently unavailable due to a technical error."
-
 # --- TASKS ---
 
-@celery_app.task(name="schedule_data_fetches")
+@celery_app.task(
+    name="schedule_data_fetches",
+    priority=PRIORITY_SCHEDULING,
+    acks_late=False,  # a missed beat tick is re-sent a minute later anyway
+    expires=55,
+)
 def schedule_data_fetches():
     logger.info("⏰ [BEAT] Checking for due data fetches (Mirroring Cloud Logic)...")
     
@@ -170,36 +184,11 @@ def schedule_data_fetches():
             logger.info("-> No active workspaces found.")
             return
         
-        buffer = timedelta(seconds=150)
         triggered_count = 0
 
         for ws in workspaces:
             try:
-                is_due = False
-                last_polled = ws.last_polled_at
-                interval = ws.polling_interval
-
-                # PORTED FROM CLOUD: Strict Interval Matching
-                if not last_polled:
-                    is_due = True
-                elif interval == '15min':
-                    if (now - last_polled) >= (timedelta(minutes=15) - buffer): 
-                        is_due = True
-                elif interval == 'hourly':
-                    if (now - last_polled) >= (timedelta(hours=1) - buffer): 
-                        is_due = True
-                elif interval == '3hours':
-                    if (now - last_polled) >= (timedelta(hours=3) - buffer): 
-                        is_due = True
-                elif interval == '12hours':
-                    if (now - last_polled) >= (timedelta(hours=12) - buffer): 
-                        is_due = True
-                elif interval == 'daily':
-                    if (now - last_polled) >= (timedelta(days=1) - buffer): 
-                        is_due = True
-                elif interval == 'every_minute': # Keeping your local dev interval too
-                    if (now - last_polled) > timedelta(minutes=1): 
-                        is_due = True
+                is_due = is_fetch_due(ws.polling_interval, ws.last_polled_at, now)
 
                 if is_due:
                     # Offload directly to Celery (No need for 'process_data_fetch_task' gate)
@@ -242,7 +231,9 @@ def run_sync(coro):
 # --- PORTED: KILL_POLLER ---
 def kill_poller(db: Session, workspace_id: str, user_message: str, internal_reason: str, is_hard_fail: bool = True):
     try:
-        ws = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+        ws = db.query(Workspace).options(
+            load_only(Workspace.id, Workspace.name, Workspace.is_polling_active, Workspace.failure_count)
+        ).filter(Workspace.id == workspace_id).first()
         if not ws: return
 
         now = datetime.now(timezone.utc)
@@ -280,15 +271,32 @@ def kill_poller(db: Session, workspace_id: str, user_message: str, internal_reas
         db.rollback()
         logger.error(f"🔥 [KILL_POLLER] DB Update Failed: {e}")
 
+def mark_polled(db: Session, workspace_id) -> None:
+    # Bookkeeping columns only; the config itself comes from workspace_config_cache
+    ws = db.query(Workspace).options(
+        load_only(Workspace.id, Workspace.last_polled_at, Workspace.failure_count)
+    ).filter(Workspace.id == workspace_id).first()
+    if ws:
+        ws.last_polled_at = datetime.now(timezone.utc)
+        ws.failure_count = 0
+
 # --- PORTED: FETCH_API_DATA ---
-@celery_app.task(name="fetch_api_data")
+@celery_app.task(
+    name="fetch_api_data",
+    priority=PRIORITY_FETCH,
+    rate_limit="30/m",
+    soft_time_limit=90,
+    time_limit=120,
+)
 def fetch_api_data(workspace_id: str):
     logger.info(f"🤖 [API FETCHER] Starting API fetch: {workspace_id}")
     db: Session = SessionLocal()
     MAX_BYTES = 5 * 1024 * 1024
+    timer = StageTimer()
     
     try:
-        workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+        with timer.stage("config"):
+            workspace = workspace_config_cache.get(workspace_id)
         if not workspace or not workspace.is_polling_active:
             return
             
@@ -306,6 +314,7 @@ def fetch_api_data(workspace_id: str):
 
         headers = {header_name: header_value} if header_name and header_value else {}
         
+        network_started = time.perf_counter()
         try:
             response = requests.get(workspace.api_url, headers=headers, timeout=(10, 30), stream=True)
             
@@ -326,6 +335,7 @@ def fetch_api_data(workspace_id: str):
                 if len(content) > MAX_BYTES:
                     kill_poller(db, workspace_id, user_message="Data stream exceeds the 5MB limit allowed on this plan.", internal_reason="Hard Fail: Stream exceeded 5MB limit", is_hard_fail=True)
                     return
+            timer.add("source_fetch", time.perf_counter() - network_started)
 
         except requests.exceptions.HTTPError as http_err:
             kill_poller(db, workspace_id, user_message="The API responded with an error while processing the request. We'll retry automatically.", internal_reason=f"HTTP Error: {http_err}", is_hard_fail=False)
@@ -337,31 +347,45 @@ def fetch_api_data(workspace_id: str):
             kill_poller(db, workspace_id, user_message="We couldn't reach the API due to a network issue. We'll retry automatically.", internal_reason=f"Request error: {str(req_err)[:120]}", is_hard_fail=False)
             return
 
-        data = json.loads(content)
+        with timer.stage("json_parse"):
+            data = json.loads(content)
         del content
         if not data:
             kill_poller(db, workspace_id, user_message="The API request succeeded but returned no data. Please check filters or response format.", internal_reason="Soft Fail: API returned empty response", is_hard_fail=False)
             return
 
-        df = pd.json_normalize(data)
-        csv_content = df.to_csv(index=False)
+        with timer.stage("to_csv"):
+            df = pd.json_normalize(data)
+            csv_bytes = df.to_csv(index=False).encode("utf-8")
+        timer.count(bytes=len(csv_bytes), rows=len(df), columns=len(df.columns))
         del data     
         del df
+
+        if is_workspace_upload_limit_reached(db, workspace.id):
+            kill_poller(db, workspace_id, user_message="Upload limit reached (50 files). Please delete old files to continue polling.", internal_reason="Hard Fail: Upload limit reached (50)", is_hard_fail=True)
+            return
         
         new_upload = DataUpload(
             workspace_id=workspace.id, 
             file_path=f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_api.csv",
-            file_content=csv_content,
-            upload_type='api_poll'
+            file_content=None,
+            upload_type='api_poll',
+            file_size_bytes=len(csv_bytes),
         )
         db.add(new_upload)
+        db.flush()
+
+        storage_path = f"workspaces/{workspace.id}/uploads/{new_upload.id}.csv"
+        with timer.stage("store"):
+            upload_csv_bytes(storage_path, csv_bytes)
+        new_upload.storage_path = storage_path
 
-        workspace.last_polled_at = datetime.now(timezone.utc)
-        workspace.failure_count = 0 
+        mark_polled(db, workspace.id)
         
         db.commit()
         db.refresh(new_upload)
         
+        export_fetch_metrics(timer, "api", workspace_id)
         process_csv_task.delay(str(new_upload.id))
 
     except Exception as e:
@@ -371,15 +395,23 @@ def fetch_api_data(workspace_id: str):
         db.close()
 
 # --- PORTED: FETCH_DB_DATA ---
-@celery_app.task(name="fetch_db_data")
+@celery_app.task(
+    name="fetch_db_data",
+    priority=PRIORITY_FETCH,
+    rate_limit="30/m",
+    soft_time_limit=90,
+    time_limit=120,
+)
 def fetch_db_data(workspace_id: str):
     MAX_ROWS = 25000
     logger.info(f"🤖 [DB FETCHER] Starting DB fetch for workspace: {workspace_id}")
     db: Session = SessionLocal()
     engine = None
+    timer = StageTimer()
     
     try:
-        workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+        with timer.stage("config"):
+            workspace = workspace_config_cache.get(workspace_id)
         
         if not workspace:
             logger.warning(f"-> [DB FETCHER] Workspace {workspace_id} not found.")
@@ -437,7 +469,8 @@ def fetch_db_data(workspace_id: str):
                 
                 # Ported Row-Limit Logic
                 safe_query = f"SELECT * FROM ({clean_query}) AS user_query LIMIT {MAX_ROWS + 1}"
-                df = pd.read_sql(text(safe_query), connection)
+                with timer.stage("source_fetch"):
+                    df = pd.read_sql(text(safe_query), connection)
 
             if len(df) > MAX_ROWS:
                 kill_poller(db, workspace_id, user_message=f"Query result too large (Max {MAX_ROWS} rows).", internal_reason="Hard Fail: SQL row limit exceeded", is_hard_fail=True)
@@ -457,19 +490,33 @@ def fetch_db_data(workspace_id: str):
             kill_poller(db, workspace_id, user_message="Your query ran successfully but didn't return any data.", internal_reason="Soft Fail: Query returned 0 rows", is_hard_fail=False)
             return
 
-        csv_content = df.to_csv(index=False)
+        if is_workspace_upload_limit_reached(db, workspace.id):
+            kill_poller(db, workspace_id, user_message="Upload limit reached (50 files). Please delete old files to continue polling.", internal_reason="Hard Fail: Upload limit reached (50)", is_hard_fail=True)
+            return
+
+        with timer.stage("to_csv"):
+            csv_bytes = df.to_csv(index=False).encode("utf-8")
+        timer.count(bytes=len(csv_bytes), rows=len(df), columns=len(df.columns))
         new_upload = DataUpload(
             workspace_id=workspace.id, 
-            file_path=f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_db.csv",
-            file_content=csv_content,
-            upload_type='db_query'
+            file_path=f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_db_query.csv",
+            file_content=None,
+            upload_type='db_query',
+            file_size_bytes=len(csv_bytes),
         )
         db.add(new_upload)
-        workspace.last_polled_at = datetime.now(timezone.utc)
-        workspace.failure_count = 0
+        db.flush()
+
+        storage_path = f"workspaces/{workspace.id}/uploads/{new_upload.id}.csv"
+        with timer.stage("store"):
+            upload_csv_bytes(storage_path, csv_bytes)
+        new_upload.storage_path = storage_path
+
+        mark_polled(db, workspace.id)
         db.commit()
         db.refresh(new_upload)
 
+        export_fetch_metrics(timer, "db", workspace_id)
         process_csv_task.delay(str(new_upload.id))
 
     except Exception as e:
@@ -480,306 +527,57 @@ def fetch_db_data(workspace_id: str):
         if engine: engine.dispose()
         db.close()
 
-def check_alert_rules(
-    db: Session, 
-    workspace: Workspace, 
-    current_upload: DataUpload, 
-    analysis_results: dict
-) -> None:
+class CeleryExecutor(PipelineExecutor):
     """
-    PORTED FROM CLOUD: Evaluates alert rules with Idempotency and Batching.
-    Now optimized for Celery workers.
-    """
-    logger.info(f"🔍 [ENGINE] Scanning rules for Workspace: {workspace.name}...")
-
-    # 1. Fetch Active Rules
-    rules = db.query(AlertRule).filter(
-        AlertRule.workspace_id == workspace.id, 
-        AlertRule.is_active == True
-    ).all()
-    
-    if not rules:
-        logger.info("-> No active alert rules found.")
-        return
-
-    stats = analysis_results.get("summary_stats", {})
-    if not stats:
-        logger.warning("-> Engine aborted: No statistics found in upload.")
-        return
-
-    # 2. IDEMPOTENCY GUARD (Prevents duplicate alerts for the same upload)
-    execution_fingerprint = f"upload_{current_upload.id}_ws_{workspace.id}"
-    already_processed = db.query(Notification).filter(
-        Notification.workspace_id == workspace.id,
-        Notification.idempotency_key == execution_fingerprint
-    ).first()
-
-    if already_processed:
-        logger.info(f"🛡️ [GUARD] Already processed {execution_fingerprint}. Skipping.")
-        return
-
-    ops = {
-        'greater_than': operator.gt,
-        'less_than': operator.lt,
-        'equals': operator.eq,
-        'not_equals': operator.ne
-    }
-
-    triggered_alerts = []
-    users_to_notify = list(set(workspace.team_members + [workspace.owner]))
-
-    # 3. Process Rules and Collect (Batching)
-    for rule in rules:
-        try:
-            col_stats = stats.get(rule.column_name)
-            if not col_stats:
-                continue 
-            
-            actual_value_raw = col_stats.get(rule.metric)
-            if actual_value_raw is None:
-                continue
-
-            # Strict Precision Logic from Cloud
-            actual_value = round(float(actual_value_raw), 4)
-            threshold_value = round(float(rule.value), 4)
-
-            compare_func = ops.get(rule.condition)
-            if not compare_func or not compare_func(actual_value, threshold_value):
-                continue
+    Pipeline side effects from a Celery worker. The worker holds no
+    WebSockets, so realtime events are published to Redis and relayed by
+    the API process (see redis_listener in main.py).
 
-            # Rule triggered - Add to the batch
-            triggered_alerts.append({
-                "rule_id": str(rule.id),
-                "column_name": rule.column_name,
-                "metric": rule.metric.replace('50%', 'median').upper(),
-                "condition": rule.condition.replace('_', ' '),
-                "threshold": threshold_value,
-                "actual": actual_value
-            })
-
-        except Exception as e:
-            logger.error(f"⚠️ Error evaluating rule {rule.id}: {e}")
-            continue
-        
-    # 4. Handle Triggered Alerts (Side Effects)
-    if triggered_alerts:
-        try:
-            summary_msg = f"Alert: {len(triggered_alerts)} violations detected in '{workspace.name}'."
-            
-            # Create DB notifications for all users
-            for user in users_to_notify:
-                new_notif = Notification(
-                    user_id=user.id,
-                    workspace_id=workspace.id,
-                    message=summary_msg,
-                    idempotency_key=execution_fingerprint 
-                )
-                db.add(new_notif)
-            
-            db.commit()
-            logger.info(f"💾 Records committed for fingerprint: {execution_fingerprint}")
+    Profiling stays in the worker process (base run_profile): prefork
+    children are daemonic and cannot own a process pool, and the process
+    queue is already isolated from the API.
+    """
+    name = "celery"
 
-        except Exception as e:
-            db.rollback()
-            logger.error(f"❌ Database error, aborting alerts: {e}")
-            return
+    def broadcast_to_workspace(self, workspace_id: str, payload: dict) -> None:
+        redis_client.publish("workspace_updates", json.dumps(payload))
+        logger.info(f"📡 Published '{payload.get('type')}' to Redis for {workspace_id}")
 
-        # Prepare Email Context
-        recipients = [user.email for user in users_to_notify]
-        timestamp_to_use = current_upload.uploaded_at or datetime.now(timezone.utc)
-        email_context = { 
-            "workspace_name": workspace.name, 
-            "triggered_alerts": triggered_alerts, 
-            "file_name": current_upload.file_path,
-            "upload_time": convert_utc_to_ist_str(timestamp_to_use),
-            "workspace_id": str(workspace.id),
-            "idempotency_key": execution_fingerprint
-        }
+    def push_to_user(self, user_id: str, message: dict) -> None:
+        redis_client.publish("workspace_updates", json.dumps({**message, "user_id": user_id}))
 
-        # 5. ASYNC BROADCASTS (UI + Email)
-        # Using run_sync helper to manage loops within the Celery worker
-        for user in users_to_notify:
-            run_sync(
-                manager.push_to_user(
-                    user_id=str(user.id),
-                    message={"type": "NEW_NOTIFICATION_ALERT", "count": len(triggered_alerts)}
-                )
-            )
+    def send_change_email(self, recipients, email_context) -> None:
+        run_sync(send_detailed_alert_email(recipients, email_context))
 
-        # Batch Email: One email with ALL violations (Cloud Standard)
+    def send_threshold_email(self, recipients, email_context) -> None:
         run_sync(send_threshold_alert_email(recipients, email_context))
-        
-        logger.info(f"✅ Side effects sent for {len(triggered_alerts)} alerts.")
-    else:
-        logger.info("✅ Scan complete: No violations found.")
-            
-def clean_nan(obj):
-    if isinstance(obj, dict):
-        return {k: clean_nan(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [clean_nan(v) for v in obj]
-    elif isinstance(obj, float):
-        if np.isnan(obj) or np.isinf(obj):
-            return None
-    return obj
-
-@celery_app.task(name="process_csv_task")
-def process_csv_task(upload_id: str):
-    logger.info(f"🚀 [WORKER] Starting REAL processing for upload ID: {upload_id}...")
-    db: Session = SessionLocal()
-    workspace_id_str = None
-    status_message = "job_error"
-    new_notifications_created = False
-    
-    # PORTED FROM CLOUD: The RAM Bouncer (Strict 25k limit)
-    MAX_ROWS = 25000 
-    
-    try:
-        current_upload = db.query(DataUpload).filter(DataUpload.id == upload_id).first()
-        if not current_upload: 
-            logger.warning(f"[WORKER] Upload ID {upload_id} not found.")
-            return
-        
-        workspace_id_str = str(current_upload.workspace_id)
-        csv_content = current_upload.file_content
-        if not csv_content: 
-            logger.warning(f"[WORKER] No content for upload {upload_id}.")
-            return
 
-        is_truncated = False
-        try:
-            # PORTED FROM CLOUD: nrows logic to protect RAM
-            df = pd.read_csv(StringIO(csv_content), nrows=MAX_ROWS + 1)
-            original_row_count = len(df)
-            
-            if original_row_count > MAX_ROWS:
-                is_truncated = True
-                logger.warning(f"⚠️ [WORKER] Truncating file {upload_id} to {MAX_ROWS} rows for RAM safety.")
-                df = df.head(MAX_ROWS)
-
-            # PORTED FROM CLOUD: Fixed column-by-column numeric conversion
-            for col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='ignore')
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to parse CSV: {e}")
-            status_message = "job_error"
-            return {"status": "error"}
 
-        new_schema = {col: str(dtype) for col, dtype in df.dtypes.items()}
-        new_row_count = len(df)
-        
-        # Comparison logic (Identical to tasks.py)
-        previous_upload = db.query(DataUpload).filter(
-            DataUpload.workspace_id == current_upload.workspace_id, 
-            DataUpload.upload_type == current_upload.upload_type, 
-            DataUpload.id != current_upload.id
-        ).order_by(DataUpload.uploaded_at.desc()).first()
-        
-        schema_has_changed, row_count_has_changed = False, False
-        new_cols, old_cols = set(new_schema.keys()), set()
-        old_row_count = 0
-        
-        if previous_upload and previous_upload.analysis_results:
-            old_schema = previous_upload.schema_info or {}
-            old_cols = set(old_schema.keys())
-            if old_cols != new_cols: schema_has_changed = True
-            
-            old_row_count = previous_upload.analysis_results.get("row_count", 0)
-            if old_row_count != new_row_count: row_count_has_changed = True
-
-        # Generate and Clean Stats
-        stats_df = df.describe(include='all')
-        raw_summary = stats_df.to_dict()
-        summary_stats = clean_nan(raw_summary) 
-        
-        analysis_results = {
-            "row_count": new_row_count, 
-            "column_count": len(df.columns), 
-            "summary_stats": summary_stats,
-            "is_truncated": is_truncated
-        }
-        
-        current_upload.schema_info = new_schema
-        current_upload.analysis_results = analysis_results
-        current_upload.schema_changed_from_previous = schema_has_changed
-        
-        # PORTED FROM CLOUD: FORCE RELEASE RAM immediately
-        del df
-        del stats_df
-
-        workspace = db.query(Workspace).filter(Workspace.id == current_upload.workspace_id).first()
-        if workspace:
-            if schema_has_changed or row_count_has_changed:
-                ai_insight_text = None
-                schema_changes_dict = {}
-                
-                if schema_has_changed:
-                    schema_changes_dict = {'added': list(new_cols - old_cols), 'removed': list(old_cols - new_cols)}
-                    ai_insight_text = get_ai_insight(schema_changes_dict)
-                
-                notification_message = f"Structural change detected in workspace '{workspace.name}'."
-                users_to_notify = list(set(workspace.team_members + [workspace.owner]))
-                
-                for user in users_to_notify:
-                    db.add(Notification(
-                        user_id=user.id, 
-                        workspace_id=workspace.id, 
-                        message=notification_message, 
-                        ai_insight=ai_insight_text
-                    ))
-                    new_notifications_created = True
-                
-                # Email preparation (Cloud Wording Identical)
-                percent_change = "0%"
-                if old_row_count > 0:
-                    percent_change = f"{((new_row_count - old_row_count) / old_row_count) * 100:+.1f}%"
-                
-                email_context = { 
-                    "workspace_name": workspace.name, 
-                    "upload_type": current_upload.upload_type, 
-                    "new_file_name": current_upload.file_path, 
-                    "old_file_name": previous_upload.file_path if previous_upload else "N/A", 
-                    "upload_time_str": convert_utc_to_ist_str(current_upload.uploaded_at),
-                    "owner_info": {"name": workspace.owner.name, "email": workspace.owner.email}, 
-                    "team_info": [{"name": member.name, "email": member.email} for member in workspace.team_members], 
-                    "ai_insight": ai_insight_text, 
-                    "schema_changes": schema_changes_dict, 
-                    "metric_changes": {'old_rows': old_row_count, 'new_rows': new_row_count, 'percent_change': percent_change} if row_count_has_changed else {} 
-                }
-                
-                recipients = [user.email for user in users_to_notify]
-                run_sync(send_detailed_alert_email(recipients, email_context))
-
-            # Run Alert Rules
-            check_alert_rules(db, workspace, current_upload, analysis_results)
-            
-        db.commit()
-        status_message = "job_complete"
-
-        # Signal UI update via WebSocket (Mirroring tasks.py push_to_user)
-        if new_notifications_created:
-            for user in users_to_notify:
-                run_sync(manager.push_to_user(str(user.id), {"type": "NEW_NOTIFICATION_ALERT"}))
+@celery_app.task(
+    name="process_csv_task",
+    priority=PRIORITY_PROCESS,
+    rate_limit="12/m",
+)
+def process_csv_task(upload_id: str):
+    return run_csv_pipeline(upload_id, CeleryExecutor())
 
-        return {"status": "success"}
 
-    except Exception as e:
-        logger.error(f"❌ [WORKER] Error: {e}", exc_info=True)
-        status_message = "job_error"
-        return {"status": "error", "message": str(e)}
-    
-    finally:
-        # FINAL BROADCAST: Signals the UI to stop the loading state (As is tasks.py)
-        if workspace_id_str:
-            payload = {"type": status_message, "workspace_id": workspace_id_str}
-            redis_client.publish("workspace_updates", json.dumps(payload))
-            logger.info(f"📡 Published '{status_message}' to Redis for {workspace_id_str}")
-        
-        db.close()
+@celery_app.task(
+    name="reconcile_workspace_stats",
+    priority=PRIORITY_SCHEDULING,
+    acks_late=False,  # the next beat tick reconciles anyway
+)
+def reconcile_workspace_stats():
+    return reconcile_stats()
 
 
-@celery_app.task(name="send_otp_email_task")
+@celery_app.task(
+    name="send_otp_email_task",
+    priority=PRIORITY_EMAIL,
+    acks_late=False,  # never resend an OTP twice after a worker crash
+    soft_time_limit=20,
+    time_limit=30,
+)
 def send_otp_email_task(to_email: str, otp: str, subject_type: str) -> None:
     """
     Background task to send OTP/Password Reset emails.
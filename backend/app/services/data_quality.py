@@ -1,10 +1,38 @@
 from __future__ import annotations
 
-import re
-from typing import Any, Dict, List, Tuple
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+import numpy as np
 import pandas as pd
 
+from app.services.duplicates import count_duplicate_rows
+from app.services.semantic_types import detect_semantic_types
+
+# Wide frames are reduced in column chunks on a small thread pool
+PARALLEL_COLUMN_THRESHOLD = int(os.getenv("QUALITY_PARALLEL_COLUMN_THRESHOLD", "64"))
+COLUMN_CHUNK_SIZE = int(os.getenv("QUALITY_COLUMN_CHUNK_SIZE", "32"))
+QUALITY_COLUMN_WORKERS = int(os.getenv("QUALITY_COLUMN_WORKERS", "4"))
+
+# unique, but not identifiers
+NOT_ID_SEMANTIC_TYPES = {"email", "name"}
+
+PER_COLUMN_REPORT_KEYS = (
+    "missing_by_column",
+    "missing_percent_by_column",
+    "unique_count_by_column",
+    "unique_percent_by_column",
+)
+
+
+def can_reuse_column_report(previous_report: Optional[Dict[str, Any]], col: str, is_numeric: bool) -> bool:
+    """True when the previous report holds every per-column stat for `col`."""
+    if not previous_report:
+        return False
+    keys = PER_COLUMN_REPORT_KEYS + (("outliers_by_column",) if is_numeric else ())
+    return all(col in (previous_report.get(key) or {}) for key in keys)
+
 
 def _looks_like_id_column_name(col: str) -> bool:
     c = col.lower().strip()
@@ -15,25 +43,57 @@ def _looks_like_id_column_name(col: str) -> bool:
     return has_id_keyword and not is_bad
 
 
-def _looks_like_email_series(s: pd.Series) -> bool:
-    sample = s.dropna().astype(str).head(30)
-    if sample.empty:
-        return False
-    hits = sum(bool(re.search(r"@.+\.", v)) for v in sample)
-    return (hits / len(sample)) >= 0.6
+def _chunk_counts(chunk: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    return chunk.isna().sum(), chunk.nunique(dropna=True)
 
 
-def _looks_like_name_series(s: pd.Series) -> bool:
-    sample = s.dropna().astype(str).head(30)
-    if sample.empty:
-        return False
+def _missing_and_unique_counts(df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    """
+    Null and distinct counts for every column. Narrow frames use one
+    reduction each; wide frames are split into column chunks reduced on a
+    thread pool (the hashing in nunique runs in C and releases the GIL).
+    """
+    n_cols = df.shape[1]
+
+    if n_cols < PARALLEL_COLUMN_THRESHOLD or QUALITY_COLUMN_WORKERS <= 1:
+        return _chunk_counts(df)
+
+    chunks = [df.iloc[:, i:i + COLUMN_CHUNK_SIZE] for i in range(0, n_cols, COLUMN_CHUNK_SIZE)]
+    with ThreadPoolExecutor(max_workers=QUALITY_COLUMN_WORKERS) as pool:
+        results = list(pool.map(_chunk_counts, chunks))
+
+    missing = pd.concat([r[0] for r in results])
+    unique = pd.concat([r[1] for r in results])
+    return missing, unique
+
+
+def _iqr_outlier_counts(df: pd.DataFrame, num_cols: List[Any]) -> Dict[Any, int]:
+    """
+    IQR outliers for all numeric columns at once: one quantile() call for
+    Q1/Q3, then broadcast comparisons against per-column fences. Columns
+    with fewer than 10 values or a zero IQR report 0.
+    """
+    if not num_cols:
+        return {}
+
+    num_df = df[num_cols]
+    quartiles = num_df.quantile([0.25, 0.75])
+    q1 = quartiles.loc[0.25]
+    q3 = quartiles.loc[0.75]
+    iqr = q3 - q1
+
+    lower = q1 - 1.5 * iqr
+    upper = q3 + 1.5 * iqr
+
+    values = num_df.to_numpy(dtype="float64", na_value=np.nan)
+    with np.errstate(invalid="ignore"):
+        is_outlier = (values < lower.to_numpy()) | (values > upper.to_numpy())
+    counts = is_outlier.sum(axis=0)
+
+    eligible = (num_df.count().to_numpy() >= 10) & (iqr.to_numpy() != 0)
+    counts = np.where(eligible, counts, 0)
 
-    hits = 0
-    for v in sample:
-        v = v.strip()
-        if 2 <= len(v) <= 40 and re.fullmatch(r"[A-Za-z\s\.\-']+", v):
-            hits += 1
-    return (hits / len(sample)) >= 0.6
+    return {col: int(cnt) for col, cnt in zip(num_cols, counts)}
 
 
 def _top_missing_columns(missing_percent_by_column: Dict[str, float], top_n: int = 5) -> List[Tuple[str, float]]:
@@ -43,11 +103,20 @@ def _top_missing_columns(missing_percent_by_column: Dict[str, float], top_n: int
 def analyze_dataframe_quality(
     df: pd.DataFrame,
     max_insights: int = 10,
+    semantic_types: Optional[Dict[str, Dict[str, Any]]] = None,
+    previous_report: Optional[Dict[str, Any]] = None,
+    reuse_columns: Optional[Set[str]] = None,
 ) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
     """
     Returns:
       quality_report: machine-friendly numbers
       insights: human-friendly messages (rule-based, no ML)
+
+    semantic_types: output of detect_semantic_types(); detected here when
+    not supplied.
+    previous_report / reuse_columns: per-column stats for `reuse_columns`
+    are copied from the previous upload's report instead of recomputed
+    (their content hash is unchanged). Duplicates are always recomputed.
     """
 
     quality_report: Dict[str, Any] = {
@@ -70,17 +139,25 @@ def analyze_dataframe_quality(
     quality_report["numeric_columns"] = num_cols
     quality_report["categorical_columns"] = cat_cols
 
-    # Missing + Unique stats
+    reuse_columns = set(reuse_columns or ()) if previous_report else set()
+    changed_cols = [c for c in df.columns if str(c) not in reuse_columns]
+
+    # Missing + Unique stats (whole-frame reductions, chunked on wide frames)
+    missing_counts, unique_counts = _missing_and_unique_counts(df[changed_cols])
+
     for col in df.columns:
-        s = df[col]
+        if str(col) in reuse_columns:
+            for key in PER_COLUMN_REPORT_KEYS:
+                quality_report[key][col] = previous_report[key][str(col)]
+            continue
 
-        missing_count = int(s.isna().sum())
+        missing_count = int(missing_counts[col])
         quality_report["missing_by_column"][col] = missing_count
         quality_report["missing_percent_by_column"][col] = (
             round((missing_count / total_rows) * 100, 2) if total_rows > 0 else 0.0
         )
 
-        unique_count = int(s.nunique(dropna=True))
+        unique_count = int(unique_counts[col])
         quality_report["unique_count_by_column"][col] = unique_count
         quality_report["unique_percent_by_column"][col] = (
             round((unique_count / total_rows) * 100, 2) if total_rows > 0 else 0.0
@@ -88,30 +165,18 @@ def analyze_dataframe_quality(
 
     # Duplicate rows
     try:
-        quality_report["duplicate_rows"] = int(df.duplicated().sum())
+        quality_report["duplicate_rows"] = count_duplicate_rows(df)
     except Exception:
         quality_report["duplicate_rows"] = 0
 
     # Outliers for numeric columns (IQR)
+    changed_num_cols = [c for c in num_cols if str(c) not in reuse_columns]
+    outliers = _iqr_outlier_counts(df, changed_num_cols)
     for col in num_cols:
-        s = df[col].dropna()
-        if len(s) < 10:
-            quality_report["outliers_by_column"][col] = 0
-            continue
-
-        q1 = s.quantile(0.25)
-        q3 = s.quantile(0.75)
-        iqr = q3 - q1
-
-        if iqr == 0:
-            quality_report["outliers_by_column"][col] = 0
-            continue
-
-        lower = q1 - 1.5 * iqr
-        upper = q3 + 1.5 * iqr
-
-        outlier_count = int(((s < lower) | (s > upper)).sum())
-        quality_report["outliers_by_column"][col] = outlier_count
+        if col in outliers:
+            quality_report["outliers_by_column"][col] = outliers[col]
+        else:
+            quality_report["outliers_by_column"][col] = previous_report["outliers_by_column"][str(col)]
 
     # -------------------------------
     # Insights (human readable)
@@ -170,14 +235,15 @@ def analyze_dataframe_quality(
 
     # Possible ID column (avoid noise like Name/Email/Location)
     if total_rows >= 50:
+        if semantic_types is None:
+            semantic_types = detect_semantic_types(df)
+
         for col, upct in quality_report["unique_percent_by_column"].items():
             if upct < 95:
                 continue
 
-            s = df[col]
-
             # skip obvious cases
-            if _looks_like_email_series(s) or _looks_like_name_series(s):
+            if (semantic_types.get(str(col)) or {}).get("type") in NOT_ID_SEMANTIC_TYPES:
                 continue
 
             if _looks_like_id_column_name(col):
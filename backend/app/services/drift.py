@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Quantile sketch resolution for numeric columns (0%, 1%, ..., 100%)
+QUANTILE_POINTS = 101
+# Most frequent values kept per categorical column; the rest fold into OTHER
+TOP_K = int(os.getenv("DRIFT_TOP_K", "20"))
+# Past uploads averaged into the rolling baseline
+DRIFT_BASELINE_UPLOADS = int(os.getenv("DRIFT_BASELINE_UPLOADS", "5"))
+
+PSI_BINS = 10
+OTHER = "__other__"
+EPS = 1e-6
+
+# Alert metrics served from analysis_results["drift"]
+DRIFT_METRICS = {"psi", "ks", "js", "psi_baseline", "ks_baseline", "js_baseline"}
+
+_PROBS = np.linspace(0.0, 1.0, QUANTILE_POINTS)
+
+
+# ==========================
+#  Sketches (stored per upload)
+# ==========================
+def build_sketches(df: pd.DataFrame, num_cols: List[Any], cat_cols: List[Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    {"numeric": {col: {"quantiles": [...101], "count": n}},
+     "categorical": {col: {"top": {value: share}, "count": n}}}
+
+    One quantile() call covers every numeric column. Identifier-like
+    categoricals (more than half the values distinct) are skipped.
+    """
+    sketches: Dict[str, Dict[str, Any]] = {"numeric": {}, "categorical": {}}
+
+    if num_cols:
+        num_df = df[num_cols]
+        quantiles = num_df.quantile(_PROBS)
+        counts = num_df.count()
+        for col in num_cols:
+            n = int(counts[col])
+            if n == 0:
+                continue
+            sketches["numeric"][str(col)] = {
+                "quantiles": [float(v) for v in quantiles[col].to_numpy(dtype="float64")],
+                "count": n,
+            }
+
+    for col in cat_cols:
+        s = df[col].dropna()
+        n = int(len(s))
+        if n == 0:
+            continue
+        freqs = s.astype(str).value_counts(normalize=True)
+        if len(freqs) > n / 2:
+            continue
+        top = freqs.head(TOP_K)
+        shares = {str(k): round(float(v), 6) for k, v in top.items()}
+        other = 1.0 - float(top.sum())
+        if other > EPS:
+            shares[OTHER] = round(other, 6)
+        sketches["categorical"][str(col)] = {"top": shares, "count": n}
+
+    return sketches
+
+
+# ==========================
+#  Distances
+# ==========================
+def _psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    e = np.clip(expected, EPS, None)
+    a = np.clip(actual, EPS, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def _js(p: np.ndarray, q: np.ndarray) -> float:
+    """Jensen-Shannon divergence, base 2 (0 = identical, 1 = disjoint)."""
+    p = np.clip(p, 0.0, None)
+    q = np.clip(q, 0.0, None)
+    p = p / p.sum() if p.sum() > 0 else p
+    q = q / q.sum() if q.sum() > 0 else q
+    m = 0.5 * (p + q)
+
+    def kl(x, y):
+        mask = x > 0
+        return float(np.sum(x[mask] * np.log2(x[mask] / y[mask])))
+
+    return 0.5 * kl(p, m) + 0.5 * kl(q, m)
+
+
+def _mixture_cdf(reference: List[List[float]], x: np.ndarray) -> np.ndarray:
+    """Average CDF of several quantile sketches, evaluated at x."""
+    cdfs = [np.interp(x, np.asarray(q, dtype="float64"), _PROBS, left=0.0, right=1.0) for q in reference]
+    return np.mean(cdfs, axis=0)
+
+
+def numeric_drift(reference: List[List[float]], current: List[float]) -> Dict[str, float]:
+    """
+    KS on the union of sketch points; PSI and JS on PSI_BINS bins cut at
+    the reference distribution's quantiles.
+    """
+    current_q = np.asarray(current, dtype="float64")
+    grid = np.unique(np.concatenate([np.asarray(q, dtype="float64") for q in reference] + [current_q]))
+
+    ref_cdf = _mixture_cdf(reference, grid)
+    cur_cdf = _mixture_cdf([current], grid)
+    ks = float(np.max(np.abs(ref_cdf - cur_cdf))) if grid.size else 0.0
+
+    # inner bin edges = reference deciles (inverse of the mixture CDF)
+    levels = np.linspace(0.0, 1.0, PSI_BINS + 1)[1:-1]
+    edges = np.unique(np.interp(levels, ref_cdf, grid))
+
+    ref_at = np.concatenate([[0.0], _mixture_cdf(reference, edges), [1.0]])
+    cur_at = np.concatenate([[0.0], _mixture_cdf([current], edges), [1.0]])
+    expected = np.diff(ref_at)
+    actual = np.diff(cur_at)
+
+    return {"psi": _psi(expected, actual), "ks": ks, "js": _js(expected, actual)}
+
+
+def categorical_drift(reference: List[Dict[str, float]], current: Dict[str, float]) -> Dict[str, float]:
+    categories = sorted(set(current).union(*[set(r) for r in reference]))
+    ref = np.mean([[r.get(c, 0.0) for c in categories] for r in reference], axis=0)
+    cur = np.asarray([current.get(c, 0.0) for c in categories], dtype="float64")
+    return {"psi": _psi(ref, cur), "js": _js(ref, cur)}
+
+
+# ==========================
+#  Drift report
+# ==========================
+def _column_drift(kind: str, reference: List[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, float]:
+    if kind == "numeric":
+        return numeric_drift([r["quantiles"] for r in reference], current["quantiles"])
+    return categorical_drift([r["top"] for r in reference], current["top"])
+
+
+def _finite(values: Dict[str, float], suffix: str = "") -> Dict[str, float]:
+    return {f"{k}{suffix}": round(v, 4) for k, v in values.items() if np.isfinite(v)}
+
+
+def compute_drift(
+    current: Optional[Dict[str, Dict[str, Any]]],
+    history: List[Dict[str, Dict[str, Any]]],
+) -> Dict[str, Dict[str, float]]:
+    """
+    Drift per column from stored sketches only (no CSV reads).
+
+    `history` holds the sketches of earlier uploads, newest first: the
+    first entry gives psi/ks/js against the previous upload, all entries
+    together the *_baseline metrics against the rolling baseline.
+    """
+    if not current or not history:
+        return {}
+
+    results: Dict[str, Dict[str, float]] = {}
+
+    for kind in ("numeric", "categorical"):
+        for col, sketch in (current.get(kind) or {}).items():
+            past = [h[kind][col] for h in history if col in ((h or {}).get(kind) or {})]
+            if not past:
+                continue
+            try:
+                metrics = {}
+                if col in ((history[0] or {}).get(kind) or {}):
+                    metrics.update(_finite(_column_drift(kind, [history[0][kind][col]], sketch)))
+                metrics.update(_finite(_column_drift(kind, past, sketch), "_baseline"))
+                results[col] = metrics
+            except (ValueError, TypeError, KeyError):
+                continue
+
+    return results
@@ -326,6 +326,8 @@ async def send_detailed_alert_email(recipients: List[EmailStr], context: dict) -
     change_summary = []
     if metric_changes.get("percent_change"): change_summary.append(f"Rows changed by {metric_changes['percent_change']}")
     if schema_changes.get("added"): change_summary.append(f"{len(schema_changes['added'])} columns added")
+    row_diff = context.get("row_diff") or {}
+    if row_diff.get("updated_rows"): change_summary.append(f"{row_diff['updated_rows']} rows updated")
     preview_text = f"Update in {workspace_name}: {', '.join(change_summary)}." if change_summary else f"New data synced to {workspace_name}."
     preheader_html = f'<div style="display:none;font-size:1px;color:#333333;line-height:1px;max-height:0px;max-width:0px;opacity:0;overflow:hidden;">{preview_text} &zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;&zwnj;&nbsp;</div>'
     subject = f"{workspace_name} · {source_title} Data Change Detected [{short_id}]"
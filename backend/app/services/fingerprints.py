@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Rows hashed per pass; bounds the temporary uint64 buffer per column
+COLUMN_HASH_CHUNK_ROWS = int(os.getenv("COLUMN_HASH_CHUNK_ROWS", "50000"))
+
+
+def _new_digest(s: pd.Series) -> "hashlib._Hash":
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(str(s.dtype).encode("utf-8"))
+    return digest
+
+
+def column_fingerprint(s: pd.Series) -> str:
+    """Content hash of a column (dtype + values), stable across uploads."""
+    digest = _new_digest(s)
+    digest.update(pd.util.hash_pandas_object(s, index=False).to_numpy(dtype=np.uint64).tobytes())
+    return digest.hexdigest()
+
+
+def column_hashes(df: pd.DataFrame, chunk_rows: int = COLUMN_HASH_CHUNK_ROWS) -> Dict[str, str]:
+    """
+    column_fingerprint() for every column, hashed in row chunks. Value
+    hashes are per-row, so the chunked digest equals the one-shot one.
+    """
+    digests = {str(col): _new_digest(df[col]) for col in df.columns}
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        for col in chunk.columns:
+            values = pd.util.hash_pandas_object(chunk[col], index=False).to_numpy(dtype=np.uint64)
+            digests[str(col)].update(values.tobytes())
+
+    return {col: digest.hexdigest() for col, digest in digests.items()}
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+import math
+import uuid
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.data_upload import DataUpload
+from app.models.metric_series import MetricSeries
+
+logger = logging.getLogger(__name__)
+
+SERIES_CAPACITY = int(os.getenv("METRIC_SERIES_CAPACITY", "32"))
+MOVING_AVERAGE_WINDOW = 7
+ZSCORE_MIN_HISTORY = 3
+
+# describe() metrics tracked per numeric column
+BASE_METRICS = ("mean", "max", "min", "count", "std", "50%")
+WINDOW_TRANSFORMS = ("ma7", "zscore", "pct_change")
+
+# Alert metrics of the form "<transform>:<base>", e.g. "zscore:mean"
+WINDOWED_METRICS = {f"{t}:{m}" for t in WINDOW_TRANSFORMS for m in BASE_METRICS}
+
+SeriesKey = Tuple[str, str]
+
+
+# ==========================
+#  Ring buffer
+# ==========================
+def ring_append(values: List[float], head: int, size: int, capacity: int, value: float) -> Tuple[List[float], int, int]:
+    values = list(values) if len(values) == capacity else list(values) + [math.nan] * (capacity - len(values))
+    values[head] = value
+    return values, (head + 1) % capacity, min(size + 1, capacity)
+
+
+def ring_tail(values: List[float], head: int, size: int, n: Optional[int] = None) -> List[float]:
+    """Last `n` values (all when None), oldest first. O(n)."""
+    n = size if n is None else min(n, size)
+    capacity = len(values)
+    return [values[(head - n + i) % capacity] for i in range(n)]
+
+
+# ==========================
+#  Store
+# ==========================
+def record_upload_metrics(
+    db: Session,
+    upload: DataUpload,
+    summary_stats: Dict[str, Dict[str, float]],
+) -> Dict[SeriesKey, List[float]]:
+    """
+    Append this upload's describe() metrics to the workspace's ring buffers
+    (one row per column x metric, created on first sight).
+
+    Returns the history *before* this upload, oldest first, keyed by
+    (column, metric). Re-running for the same upload does not append twice.
+    """
+    wanted = {
+        (column_name, metric): float(stats[metric])
+        for column_name, stats in (summary_stats or {}).items()
+        for metric in BASE_METRICS
+        if (stats or {}).get(metric) is not None
+    }
+    if not wanted:
+        return {}
+
+    # Create missing series without racing a concurrent first upload on the unique key
+    stmt = pg_insert(MetricSeries).values([
+        {
+            "id": uuid.uuid4(),
+            "workspace_id": upload.workspace_id,
+            "upload_type": upload.upload_type,
+            "column_name": column_name,
+            "metric": metric,
+            "capacity": SERIES_CAPACITY,
+            "values": [],
+            "head": 0,
+            "size": 0,
+        }
+        for column_name, metric in wanted
+    ]).on_conflict_do_nothing(
+        index_elements=["workspace_id", "upload_type", "column_name", "metric"]
+    )
+    db.execute(stmt)
+
+    # Row locks (taken in a fixed order) serialize appends from concurrent uploads
+    rows = db.query(MetricSeries).filter(
+        MetricSeries.workspace_id == upload.workspace_id,
+        MetricSeries.upload_type == upload.upload_type,
+        MetricSeries.column_name.in_(sorted({column_name for column_name, _ in wanted})),
+    ).order_by(MetricSeries.column_name, MetricSeries.metric).with_for_update().populate_existing().all()
+    series = {(row.column_name, row.metric): row for row in rows}
+
+    history: Dict[SeriesKey, List[float]] = {}
+
+    for key, value in wanted.items():
+        row = series.get(key)
+        if row is None:
+            continue
+
+        tail = ring_tail(row.values or [], row.head, row.size) if row.size else []
+
+        if row.last_upload_id == upload.id:
+            # retry of an upload that was already appended
+            history[key] = tail[:-1]
+            continue
+
+        history[key] = tail
+        row.values, row.head, row.size = ring_append(
+            row.values or [], row.head, row.size, row.capacity, value
+        )
+        row.last_upload_id = upload.id
+
+    return history
+
+
+# ==========================
+#  Windowed metrics
+# ==========================
+def _window_value(transform: str, current: float, past: List[float]) -> Optional[float]:
+    past = [v for v in past if v is not None and not math.isnan(v)]
+
+    if transform == "ma7":
+        window = (past + [current])[-MOVING_AVERAGE_WINDOW:]
+        return sum(window) / len(window)
+
+    if transform == "pct_change":
+        if not past or past[-1] == 0:
+            return None
+        return (current - past[-1]) / abs(past[-1]) * 100.0
+
+    if transform == "zscore":
+        if len(past) < ZSCORE_MIN_HISTORY:
+            return None
+        mean = sum(past) / len(past)
+        var = sum((v - mean) ** 2 for v in past) / (len(past) - 1)
+        if var <= 0:
+            return None
+        return (current - mean) / math.sqrt(var)
+
+    return None
+
+
+def windowed_metrics(
+    summary_stats: Dict[str, Dict[str, float]],
+    history: Dict[SeriesKey, List[float]],
+    keys: Iterable[SeriesKey],
+) -> Dict[str, Dict[str, float]]:
+    """
+    {column: {"zscore:mean": ..., ...}} for the requested (column,
+    "<transform>:<base>") keys only; each costs O(capacity).
+    """
+    results: Dict[str, Dict[str, float]] = {}
+
+    for column_name, windowed_metric in keys:
+        transform, _, base = windowed_metric.partition(":")
+        current = ((summary_stats or {}).get(column_name) or {}).get(base)
+        if current is None:
+            continue
+
+        value = _window_value(transform, float(current), history.get((column_name, base), []))
+        if value is not None and math.isfinite(value):
+            results.setdefault(column_name, {})[windowed_metric] = round(value, 4)
+
+    return results
+
+
+def previous_value_lookup(history: Dict[SeriesKey, List[float]]):
+    """Last stored value per (column, metric), for percent-change conditions."""
+    def lookup(keys: List[SeriesKey]) -> List[float]:
+        out = []
+        for key in keys:
+            past = history.get(key) or []
+            out.append(past[-1] if past else math.nan)
+        return out
+    return lookup
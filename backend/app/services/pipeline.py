@@ -0,0 +1,776 @@
+import logging
+from io import BytesIO
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pytz
+from sqlalchemy.orm import Session, defer, joinedload, selectinload
+
+from app.core.database import SessionLocal
+from app.models.workspace import Workspace
+from app.models.data_upload import DataUpload
+from app.models.notification import Notification
+from app.models.workspace_user_settings import WorkspaceUserSettings  # noqa: F401 (target of Workspace.user_settings)
+from app.services.profiling import compute_profile
+from app.services.alert_engine import alert_plan_cache
+from app.services.drift import DRIFT_BASELINE_UPLOADS, compute_drift
+from app.services.metric_history import previous_value_lookup, record_upload_metrics, windowed_metrics
+from app.services.rollups import update_rollups
+from app.services.stage_timing import StageTimer, export_pipeline_metrics
+from app.services.row_diff import (
+    RowFingerprint,
+    detect_primary_key,
+    diff_fingerprints,
+    has_row_changes,
+    row_fingerprint,
+    summarize_row_diff,
+)
+from app.services.storage_service import download_file_bytes
+
+logger = logging.getLogger(__name__)
+
+# SAFE LIMIT: Prevent OOM on Render Free Tier (512MB)
+MAX_ROWS = 25000
+
+# Polling intervals understood by both schedulers (APScheduler + Celery beat).
+# "15min" and "every_minute" are kept for older rows / local dev.
+POLLING_INTERVALS = {
+    "every_minute": timedelta(minutes=1),
+    "15min": timedelta(minutes=15),
+    "30min": timedelta(minutes=30),
+    "hourly": timedelta(hours=1),
+    "3hours": timedelta(hours=3),
+    "12hours": timedelta(hours=12),
+    "daily": timedelta(days=1),
+}
+SCHEDULER_BUFFER = timedelta(seconds=180)
+
+# analysis_results keys handed to the next upload's profiler for column reuse
+REUSABLE_PROFILE_KEYS = (
+    "column_hashes",
+    "summary_stats",
+    "quality_report",
+    "semantic_types",
+    "distribution_sketches",
+)
+# Sub-keys of the previous upload's analysis_results the pipeline reads;
+# extracted in Postgres instead of loading the whole document
+PREVIOUS_RESULT_KEYS = REUSABLE_PROFILE_KEYS + ("row_count", "column_count", "drift")
+
+
+# ==========================
+#  Shared helpers
+# ==========================
+def convert_utc_to_ist_str(utc_dt):
+    if not utc_dt: return "N/A"
+    try:
+        ist_zone = pytz.timezone('Asia/Kolkata')
+        aware_utc_dt = pytz.utc.localize(utc_dt) if utc_dt.tzinfo is None else utc_dt
+        ist_dt = aware_utc_dt.astimezone(ist_zone)
+        return ist_dt.strftime("%B %d, %Y, %I:%M %p %Z")
+    except Exception:
+        return "Invalid Date"
+
+
+def is_fetch_due(polling_interval: Optional[str], last_polled_at: Optional[datetime], now: datetime) -> bool:
+    if not last_polled_at:
+        return True
+
+    interval = POLLING_INTERVALS.get(polling_interval)
+    if interval is None:
+        return False
+
+    if interval <= SCHEDULER_BUFFER:
+        return (now - last_polled_at) >= interval
+    return (now - last_polled_at) >= (interval - SCHEDULER_BUFFER)
+
+
+def get_workspace_with_audience(db: Session, workspace_id) -> Optional[Workspace]:
+    """
+    Workspace plus everything the alert / change fan-out reads: owner
+    (joined), team members and per-user settings (one SELECT ... IN each).
+    Fixed query count regardless of team size.
+    """
+    return db.query(Workspace).options(
+        joinedload(Workspace.owner),
+        selectinload(Workspace.team_members),
+        selectinload(Workspace.user_settings),
+    ).filter(Workspace.id == workspace_id).first()
+
+
+def get_users_to_notify(workspace: Workspace) -> list:
+    # Team members + owner, de-duplicated by id
+    users_map = {str(u.id): u for u in (list(workspace.team_members) + [workspace.owner])}
+    return list(users_map.values())
+
+
+def get_email_recipients(db: Session, workspace: Workspace, users: list) -> List[str]:
+    # user_settings is preloaded by get_workspace_with_audience
+    enabled_user_ids = {s.user_id for s in workspace.user_settings if s.email_notifications_enabled}
+
+    return [user.email for user in users if user.id in enabled_user_ids]
+
+
+# ==========================
+#  Executors
+# ==========================
+class PipelineExecutor:
+    """
+    Side effects the pipeline needs from the engine running it.
+
+    tasks.py provides the inline (thread pool) implementation and
+    celery_worker.py the Celery one; the stages themselves are shared.
+    """
+    name = "base"
+
+    def broadcast_to_workspace(self, workspace_id: str, payload: dict) -> None:
+        raise NotImplementedError
+
+    def push_to_user(self, user_id: str, message: dict) -> None:
+        raise NotImplementedError
+
+    def send_change_email(self, recipients: List[str], email_context: dict) -> None:
+        raise NotImplementedError
+
+    def send_threshold_email(self, recipients: List[str], email_context: dict) -> None:
+        raise NotImplementedError
+
+    def run_profile(self, df: pd.DataFrame, previous: Optional[dict] = None) -> Dict[str, Any]:
+        # Default: profile in the calling thread
+        return compute_profile(df, previous)
+
+
+# ==========================
+#  Stage 1: fetch
+# ==========================
+def fetch_upload_bytes(upload: DataUpload) -> Optional[bytes]:
+    """
+    Load the raw CSV for an upload: object storage first, then the legacy
+    `file_content` column for uploads created before storage existed.
+    """
+    csv_bytes: Optional[bytes] = None
+
+    if upload.storage_path:
+        csv_bytes = download_file_bytes(upload.storage_path)
+
+    if csv_bytes is None and upload.file_content:
+        csv_bytes = upload.file_content.encode("utf-8")
+
+    return csv_bytes
+
+
+# ==========================
+#  Stage 2: parse
+# ==========================
+def parse_csv_bytes(csv_bytes: bytes, max_rows: int = MAX_ROWS, coerce: bool = True) -> Tuple[pd.DataFrame, bool]:
+    """
+    Parse with a row cap for RAM safety. Returns (df, is_truncated).
+    `coerce=False` leaves numeric coercion to the caller (timed separately).
+    """
+    df = pd.read_csv(BytesIO(csv_bytes), nrows=max_rows + 1)
+
+    is_truncated = False
+    if len(df) > max_rows:
+        is_truncated = True
+        df = df.head(max_rows)
+
+    if coerce:
+        coerce_numeric_columns(df)
+
+    return df, is_truncated
+
+
+def coerce_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.columns:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except Exception:
+            # keep original as-is (string/object/etc)
+            pass
+    return df
+
+
+# ==========================
+#  Stage 3: profile
+# ==========================
+def profile_dataframe(
+    df: pd.DataFrame,
+    executor: PipelineExecutor,
+    previous_results: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    The engine decides where the CPU-bound work runs (thread or process
+    pool). Stats stored on the previous upload of the same type are handed
+    over so columns with unchanged content hashes are not re-profiled.
+    """
+    previous_results = previous_results or {}
+    previous_profile = {key: previous_results.get(key) for key in REUSABLE_PROFILE_KEYS}
+    return executor.run_profile(df, previous_profile)
+
+
+# ==========================
+#  Stage 4: diff
+# ==========================
+def get_previous_upload(db: Session, current_upload: DataUpload) -> Optional[DataUpload]:
+    # analysis_results is read key-by-key via get_previous_results
+    return (
+        db.query(DataUpload)
+        .options(defer(DataUpload.file_content), defer(DataUpload.analysis_results))
+        .filter(
+            DataUpload.workspace_id == current_upload.workspace_id,
+            DataUpload.upload_type == current_upload.upload_type,
+            DataUpload.id != current_upload.id,
+        )
+        .order_by(DataUpload.uploaded_at.desc())
+        .first()
+    )
+
+
+def get_previous_results(
+    db: Session,
+    previous_upload: Optional[DataUpload],
+    keys: Tuple[str, ...] = PREVIOUS_RESULT_KEYS,
+) -> Dict[str, Any]:
+    """`{key: analysis_results -> key}` for the previous upload, one query."""
+    if not previous_upload:
+        return {}
+
+    row = (
+        db.query(*[DataUpload.analysis_results[key] for key in keys])
+        .filter(DataUpload.id == previous_upload.id)
+        .first()
+    )
+    if not row:
+        return {}
+    return {key: value for key, value in zip(keys, row) if value is not None}
+
+
+def diff_against_previous(
+    df: pd.DataFrame,
+    previous_upload: Optional[DataUpload],
+    previous_results: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    new_schema = {col: str(dtype) for col, dtype in df.dtypes.items()}
+    new_row_count = int(len(df))
+    new_col_count = int(len(df.columns))
+
+    new_cols = set(new_schema.keys())
+    old_cols = set()
+    old_row_count = 0
+    old_col_count = 0
+
+    schema_has_changed = False
+    row_count_has_changed = False
+    col_count_has_changed = False
+
+    if previous_upload:
+        old_cols = set((previous_upload.schema_info or {}).keys())
+        previous_results = previous_results or {}
+
+        try:
+            old_row_count = int(previous_results.get("row_count", 0))
+        except Exception:
+            old_row_count = 0
+
+        try:
+            old_col_count = int(previous_results.get("column_count", 0))
+        except Exception:
+            old_col_count = 0
+
+        schema_has_changed = old_cols != new_cols
+        row_count_has_changed = old_row_count != new_row_count
+        col_count_has_changed = old_col_count != new_col_count
+
+    return {
+        "new_schema": new_schema,
+        "row_count": new_row_count,
+        "column_count": new_col_count,
+        "previous_row_count": old_row_count,
+        "previous_column_count": old_col_count,
+        "row_count_changed": row_count_has_changed,
+        "column_count_changed": col_count_has_changed,
+        "schema_has_changed": schema_has_changed,
+        "schema_changes": {
+            "added": sorted(list(new_cols - old_cols)),
+            "removed": sorted(list(old_cols - new_cols)),
+        },
+    }
+
+
+def load_previous_fingerprint(db: Session, previous_upload: DataUpload, key: str) -> Optional[RowFingerprint]:
+    """
+    The fingerprint stored when the previous upload was processed. Falls back
+    to re-reading its CSV (same row cap) for uploads that predate fingerprints,
+    were keyed differently, or whose fingerprint was already released.
+    """
+    raw = db.query(DataUpload.row_fingerprint).filter(DataUpload.id == previous_upload.id).scalar()
+    if raw:
+        fingerprint = RowFingerprint.from_bytes(raw)
+        if fingerprint.key == key:
+            return fingerprint
+
+    previous_bytes = fetch_upload_bytes(previous_upload)
+    if not previous_bytes:
+        return None
+    previous_df, _ = parse_csv_bytes(previous_bytes)
+    del previous_bytes
+    return row_fingerprint(previous_df, key)
+
+
+def diff_rows_against_previous(
+    db: Session,
+    df: pd.DataFrame,
+    current_upload: DataUpload,
+    previous_upload: Optional[DataUpload],
+    workspace: Optional[Workspace],
+    semantic_types: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Row-level diff on the workspace's declared primary key (or a detected
+    one), against the fingerprint persisted with the previous upload.
+    Stores this upload's fingerprint for the next one and releases the
+    previous fingerprint, which nothing reads any more.
+    """
+    key = (workspace.primary_key_column if workspace else None) or detect_primary_key(df, semantic_types)
+    if not key or key not in df.columns:
+        return None
+
+    try:
+        current = row_fingerprint(df, key)
+        if current is None:
+            return None
+        current_upload.row_fingerprint = current.to_bytes()
+
+        if not previous_upload:
+            return None
+        previous = load_previous_fingerprint(db, previous_upload, key)
+        if previous is None:
+            return None
+
+        row_diff = diff_fingerprints(previous, current)
+        # Bulk update: no flush listeners, no ETag bump for bookkeeping
+        db.query(DataUpload).filter(DataUpload.id == previous_upload.id).update(
+            {DataUpload.row_fingerprint: None}, synchronize_session=False
+        )
+        return row_diff
+    except Exception as e:
+        logger.error(f"⚠️ [WORKER] Row diff skipped: {e}", exc_info=True)
+        return None
+
+
+def drift_against_history(
+    db: Session,
+    current_upload: DataUpload,
+    sketches: Optional[Dict[str, Any]],
+) -> Dict[str, Dict[str, float]]:
+    """
+    PSI/KS/JS per column against the previous upload and a rolling
+    baseline of the last DRIFT_BASELINE_UPLOADS uploads of the same type.
+    Only the stored sketches are read (JSON path extracted in Postgres).
+    """
+    if not sketches:
+        return {}
+
+    rows = (
+        db.query(DataUpload.analysis_results["distribution_sketches"])
+        .filter(
+            DataUpload.workspace_id == current_upload.workspace_id,
+            DataUpload.upload_type == current_upload.upload_type,
+            DataUpload.id != current_upload.id,
+            # matches the partial index ix_data_uploads_sketch_history
+            DataUpload.analysis_results.has_key("distribution_sketches"),
+        )
+        .order_by(DataUpload.uploaded_at.desc())
+        .limit(DRIFT_BASELINE_UPLOADS)
+        .all()
+    )
+    history = [row[0] for row in rows if row[0]]
+    return compute_drift(sketches, history)
+
+
+# ==========================
+#  Stage 6: alert
+# ==========================
+def check_alert_rules(
+    db: Session,
+    workspace: Workspace,
+    current_upload: DataUpload,
+    analysis_results: dict,
+    executor: PipelineExecutor,
+    previous_results: Optional[dict] = None,
+    history: Optional[dict] = None,
+) -> None:
+
+    logger.info(f"🔍 [ENGINE] Scanning rules for Workspace: {workspace.name}...")
+
+    plan = alert_plan_cache.get(db, workspace.id)
+
+    if not plan:
+        logger.info("-> No active alert rules found.")
+        return
+
+    if not analysis_results.get("summary_stats") and not analysis_results.get("drift"):
+        logger.warning("-> Engine aborted: No statistics found in upload.")
+        return
+
+    try:
+        previous_values = previous_value_lookup(history) if history else None
+        triggered_alerts = plan.evaluate(analysis_results, previous_results, previous_values)
+    except Exception as e:
+        logger.error(f"⚠️ Error evaluating alert plan: {e}", exc_info=True)
+        return
+
+    if not triggered_alerts:
+        logger.info("✅ Scan complete: No violations found.")
+        return
+
+    # Idempotency guard only matters once something fired
+    execution_fingerprint = f"upload_{current_upload.id}_ws_{workspace.id}"
+
+    already_processed = db.query(Notification.id).filter(
+        Notification.workspace_id == workspace.id,
+        Notification.idempotency_key == execution_fingerprint
+    ).first()
+
+    if already_processed:
+        logger.info(f"🛡️ [GUARD] Already processed {execution_fingerprint}. Skipping.")
+        return
+
+    users_to_notify = get_users_to_notify(workspace)
+
+    try:
+        summary_msg = f"Alert: {len(triggered_alerts)} violations detected in '{workspace.name}'."
+
+        for user in users_to_notify:
+            db.add(Notification(
+                user_id=user.id,
+                workspace_id=workspace.id,
+                message=summary_msg,
+                idempotency_key=execution_fingerprint
+            ))
+        db.commit()
+        logger.info(f"💾 Records committed for fingerprint: {execution_fingerprint}")
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Database error, aborting: {e}")
+        return
+
+    recipients = get_email_recipients(db, workspace, users_to_notify)
+
+    timestamp_to_use = current_upload.uploaded_at or datetime.now(timezone.utc)
+    email_context = {
+        "workspace_name": workspace.name,
+        "triggered_alerts": triggered_alerts,
+        "file_name": current_upload.file_path,
+        "upload_time": convert_utc_to_ist_str(timestamp_to_use),
+        "workspace_id": str(workspace.id),
+        "idempotency_key": execution_fingerprint
+    }
+
+    for user in users_to_notify:
+        executor.push_to_user(
+            str(user.id),
+            {"type": "NEW_NOTIFICATION_ALERT", "count": len(triggered_alerts)},
+        )
+
+    if recipients:
+        executor.send_threshold_email(recipients, email_context)
+
+    logger.info(f"✅ Side effects sent for {len(triggered_alerts)} alerts.")
+
+
+# ==========================
+#  Stage 5: notify
+# ==========================
+def notify_data_changes(
+    db: Session,
+    workspace: Workspace,
+    current_upload: DataUpload,
+    previous_upload: Optional[DataUpload],
+    diff: Dict[str, Any],
+    executor: PipelineExecutor,
+) -> list:
+    """
+    Create change notifications and schedule the change email.
+    Returns the users that received a notification (pinged after commit).
+    """
+    row_diff = diff.get("row_diff")
+    if not (
+        diff["schema_has_changed"]
+        or diff["row_count_changed"]
+        or diff["column_count_changed"]
+        or has_row_changes(row_diff)
+    ):
+        return []
+
+    schema_changes = diff["schema_changes"]
+    old_row_count, new_row_count = diff["previous_row_count"], diff["row_count"]
+    old_col_count, new_col_count = diff["previous_column_count"], diff["column_count"]
+
+    change_parts = []
+
+    if diff["schema_has_changed"]:
+        added = len(schema_changes.get("added", []))
+        removed = len(schema_changes.get("removed", []))
+        if added or removed:
+            change_parts.append(f"schema updated (+{added} / -{removed})")
+
+    if diff["row_count_changed"]:
+        change_parts.append(f"rows {old_row_count} → {new_row_count}")
+
+    if diff["column_count_changed"]:
+        change_parts.append(f"columns {old_col_count} → {new_col_count}")
+
+    if has_row_changes(row_diff):
+        change_parts.append(summarize_row_diff(row_diff))
+
+    notification_message = f"Data updated in '{workspace.name}': {', '.join(change_parts)}"
+
+    # Keyed by upload so a re-run of the same upload does not notify twice
+    execution_fingerprint = f"changes_upload_{current_upload.id}_ws_{workspace.id}"
+
+    already_processed = db.query(Notification.id).filter(
+        Notification.workspace_id == workspace.id,
+        Notification.idempotency_key == execution_fingerprint
+    ).first()
+
+    if already_processed:
+        logger.info(f"🛡️ [GUARD] Already processed {execution_fingerprint}. Skipping.")
+        return []
+
+    users_to_notify = get_users_to_notify(workspace)
+
+    for user in users_to_notify:
+        db.add(Notification(
+            user_id=user.id,
+            workspace_id=workspace.id,
+            message=notification_message,
+            ai_insight=None,
+            idempotency_key=execution_fingerprint,
+        ))
+
+    logger.info(f"🔔 [WORKER] Created {len(users_to_notify)} notifications.")
+
+    percent_change = "0%"
+    if old_row_count > 0:
+        percent_change = f"{((new_row_count - old_row_count) / old_row_count) * 100:+.1f}%"
+
+    email_context = {
+        "workspace_name": workspace.name,
+        "upload_type": current_upload.upload_type,
+        "new_file_name": current_upload.file_path,
+        "old_file_name": previous_upload.file_path if previous_upload else "N/A",
+        "upload_time_str": convert_utc_to_ist_str(current_upload.uploaded_at),
+        "owner_info": {"name": workspace.owner.name, "email": workspace.owner.email},
+        "team_info": [{"name": member.name, "email": member.email} for member in workspace.team_members],
+        "ai_insight": None,
+        "schema_changes": schema_changes,
+        "metric_changes": {
+            "old_rows": old_row_count,
+            "new_rows": new_row_count,
+            "percent_change": percent_change,
+            "old_cols": old_col_count,
+            "new_cols": new_col_count,
+        },
+        "row_diff": row_diff,
+    }
+
+    recipients = get_email_recipients(db, workspace, users_to_notify)
+
+    if recipients:
+        logger.info("[WORKER] Scheduling detailed alert email (non-blocking)...")
+        executor.send_change_email(recipients, email_context)
+
+    return users_to_notify
+
+
+# ==========================
+#  The "Analyzer Robot"
+# ==========================
+def run_csv_pipeline(upload_id: str, executor: PipelineExecutor) -> Optional[dict]:
+    """
+    fetch → parse → profile → diff → notify → alert for one upload.
+    Shared by the inline thread-pool engine and the Celery engine.
+    """
+    logger.info(f"🚀 [WORKER:{executor.name}] Starting processing for upload ID: {upload_id}...")
+    db: Session = SessionLocal()
+
+    workspace_id_str = None
+    upload_type = None
+    status_message = "job_error"
+    error_msg = None
+    users_to_notify = []
+    timer = StageTimer()
+
+    try:
+        current_upload = db.query(DataUpload).filter(DataUpload.id == upload_id).first()
+        if not current_upload:
+            logger.warning(f"[WORKER] Upload ID {upload_id} not found.")
+            return
+
+        # "timings" is only written by the final commit: a redelivered message
+        # (acks_late after a crash) must not re-run notifications and emails
+        if current_upload.analysis_results and "timings" in current_upload.analysis_results:
+            logger.info(f"🛡️ [GUARD] Upload {upload_id} already processed. Skipping.")
+            return {"status": "skipped"}
+
+        workspace_id_str = str(current_upload.workspace_id)
+        upload_type = current_upload.upload_type
+
+        # 1) FETCH
+        try:
+            with timer.stage("download"):
+                csv_bytes = fetch_upload_bytes(current_upload)
+        except Exception as e:
+            logger.error(f"❌ [WORKER] Failed to load CSV bytes: {e}", exc_info=True)
+            return
+
+        if not csv_bytes:
+            logger.warning(f"[WORKER] No CSV content found for upload {upload_id}.")
+            return
+        timer.count(bytes=len(csv_bytes))
+
+        # 2) PARSE
+        try:
+            with timer.stage("parse"):
+                df, is_truncated = parse_csv_bytes(csv_bytes, coerce=False)
+            with timer.stage("coerce"):
+                coerce_numeric_columns(df)
+            del csv_bytes
+        except Exception as e:
+            logger.error(f"❌ Failed to parse CSV: {e}", exc_info=True)
+            return {"status": "error", "message": "Failed to parse CSV"}
+
+        if is_truncated:
+            logger.warning(f"⚠️ [WORKER] Truncated file {upload_id} to {MAX_ROWS} rows for RAM safety.")
+
+        with timer.stage("previous"):
+            previous_upload = get_previous_upload(db, current_upload)
+            previous_results = get_previous_results(db, previous_upload)
+
+        # 3) PROFILE (describe + quality; the breakdown is measured where it runs)
+        with timer.stage("profile"):
+            profile = profile_dataframe(df, executor, previous_results)
+        timer.breakdown.update(profile.get("timings_ms") or {})
+        if profile["reused_column_count"]:
+            logger.info(f"♻️ [WORKER] Reused stats for {profile['reused_column_count']} unchanged columns.")
+
+        # 4) DIFF
+        with timer.stage("diff"):
+            workspace = get_workspace_with_audience(db, current_upload.workspace_id)
+            diff = diff_against_previous(df, previous_upload, previous_results)
+            diff["row_diff"] = diff_rows_against_previous(
+                db, df, current_upload, previous_upload, workspace, profile["semantic_types"]
+            )
+        with timer.stage("drift"):
+            drift = drift_against_history(db, current_upload, profile["distribution_sketches"])
+        timer.count(rows=diff["row_count"], columns=diff["column_count"])
+
+        # RELEASE RAM
+        del df
+
+        analysis_results = {
+            "row_count": diff["row_count"],
+            "column_count": diff["column_count"],
+            "summary_stats": profile["summary_stats"],
+            "is_truncated": is_truncated,
+            "quality_report": profile["quality_report"],
+            "insights": profile["insights"],
+            "semantic_types": profile["semantic_types"],
+            "column_hashes": profile["column_hashes"],
+
+            # ✅ extra fields for frontend change summary
+            "previous_row_count": diff["previous_row_count"],
+            "previous_column_count": diff["previous_column_count"],
+            "row_count_changed": diff["row_count_changed"],
+            "column_count_changed": diff["column_count_changed"],
+            "schema_has_changed": diff["schema_has_changed"],
+            "schema_changes": diff["schema_changes"],
+            "row_diff": diff["row_diff"],
+            "distribution_sketches": profile["distribution_sketches"],
+            "drift": drift,
+        }
+
+        # Windowed alert metrics read the per-column ring buffers, not old uploads
+        history = {}
+        if workspace:
+            with timer.stage("metric_history"):
+                # savepoint like rollups: a failed append costs the windowed metrics, not the upload
+                try:
+                    with db.begin_nested():
+                        history = record_upload_metrics(db, current_upload, profile["summary_stats"])
+                except Exception as e:
+                    history = {}
+                    logger.error(f"⚠️ [WORKER] Metric history update failed: {e}", exc_info=True)
+                plan = alert_plan_cache.get(db, workspace.id)
+                analysis_results["windowed"] = windowed_metrics(profile["summary_stats"], history, plan.window_keys)
+
+        current_upload.schema_info = diff["new_schema"]
+        current_upload.analysis_results = analysis_results
+        current_upload.schema_changed_from_previous = diff["schema_has_changed"]
+
+        if workspace:
+            # 5) NOTIFY (pending until the alert stage or the final commit)
+            with timer.stage("notify"):
+                users_to_notify = notify_data_changes(
+                    db, workspace, current_upload, previous_upload, diff, executor
+                )
+
+            # 6) ALERT (commits its notifications together with the ones above)
+            with timer.stage("alerts"):
+                check_alert_rules(
+                    db, workspace, current_upload, analysis_results, executor, previous_results, history
+                )
+
+            # 6b) TREND ROLLUPS (savepoint: a failed upsert must not abort the upload's commit)
+            try:
+                with timer.stage("rollups"), db.begin_nested():
+                    update_rollups(db, current_upload, profile["summary_stats"])
+            except Exception as e:
+                logger.error(f"⚠️ [WORKER] Rollup update failed: {e}", exc_info=True)
+
+        # Commit and broadcast come after this snapshot; they are exported as metrics only
+        current_upload.analysis_results = {**analysis_results, "timings": timer.as_dict()}
+
+        with timer.stage("commit"):
+            db.commit()
+        logger.info(f"💾 [WORKER] Success. Upload {upload_id} committed.")
+
+        for user in users_to_notify:
+            executor.push_to_user(str(user.id), {"type": "NEW_NOTIFICATION_ALERT"})
+        if users_to_notify:
+            logger.info("📡 [WORKER] Pushed NEW_NOTIFICATION_ALERT signal to affected users.")
+
+        status_message = "job_complete"
+        return {"status": "success"}
+
+    except Exception as e:
+        logger.error(f"❌ [WORKER] Processing Error: {e}", exc_info=True)
+        error_msg = str(e)
+        status_message = "job_error"
+        return {"status": "error", "message": error_msg}
+
+    finally:
+        if workspace_id_str:
+            payload = {
+                "type": status_message,
+                "workspace_id": workspace_id_str,
+            }
+
+            if status_message == "job_error" and error_msg:
+                payload["error"] = error_msg
+
+            logger.info(f"📡 [WORKER] Broadcasting {status_message} to workspace {workspace_id_str}...")
+            with timer.stage("broadcast"):
+                executor.broadcast_to_workspace(workspace_id_str, payload)
+
+        if timer.stages:
+            export_pipeline_metrics(timer, upload_type)
+            logger.info(f"⏱️ [WORKER] Upload {upload_id} stages: {timer.summary()} (total {timer.total_ms:.0f}ms)")
+
+        try:
+            db.close()
+        except Exception:
+            pass
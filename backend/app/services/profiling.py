@@ -0,0 +1,378 @@
+import os
+import time
+import pickle
+import tempfile
+import logging
+import threading
+import queue
+import multiprocessing
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.data_quality import analyze_dataframe_quality, can_reuse_column_report
+from app.services.drift import build_sketches
+from app.services.fingerprints import column_hashes
+from app.services.semantic_types import detect_semantic_types
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: falls back to pickle protocol 5
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the pool and profiles in the calling thread. Each worker is a full
+# pandas/numpy process, so production (512MB) stays in-thread: opt in there by
+# setting PROFILING_WORKERS explicitly (pyarrow is optional; pickle is used without it).
+_DEFAULT_WORKERS = "0" if os.getenv("APP_MODE") == "production" else str(min(2, os.cpu_count() or 1))
+PROFILING_WORKERS = int(os.getenv("PROFILING_WORKERS", _DEFAULT_WORKERS))
+PROFILING_TIMEOUT_SECONDS = int(os.getenv("PROFILING_TIMEOUT_SECONDS", "120"))
+# Arrow files handed to workers; disk-backed so the page cache can evict them
+PROFILING_SPOOL_DIR = os.getenv("PROFILING_SPOOL_DIR") or tempfile.gettempdir()
+
+_pool: Optional["ProfilingPool"] = None
+_pool_lock = threading.Lock()
+
+
+def clean_nan(obj):
+    if isinstance(obj, dict):
+        return {k: clean_nan(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [clean_nan(v) for v in obj]
+    elif isinstance(obj, float):
+        if np.isnan(obj) or np.isinf(obj):
+            return None
+    return obj
+
+
+def _reusable_columns(
+    df: pd.DataFrame,
+    num_cols: List[Any],
+    hashes: Dict[str, str],
+    previous: Dict[str, Any],
+) -> Set[str]:
+    """Columns whose content hash matches the previous upload and whose stats are all stored."""
+    prev_hashes = previous.get("column_hashes") or {}
+    prev_summary = previous.get("summary_stats") or {}
+    prev_report = previous.get("quality_report") or {}
+    num_keys = {str(c) for c in num_cols}
+
+    reuse = set()
+    for col in df.columns:
+        key = str(col)
+        if prev_hashes.get(key) != hashes[key]:
+            continue
+        is_numeric = key in num_keys
+        if is_numeric and key not in prev_summary:
+            continue
+        if not can_reuse_column_report(prev_report, key, is_numeric):
+            continue
+        reuse.add(key)
+    return reuse
+
+
+def _merge_sketches(
+    df: pd.DataFrame,
+    num_cols: List[Any],
+    reuse: Set[str],
+    previous_sketches: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Drift sketches for changed columns; unchanged columns keep the previous sketch."""
+    previous_sketches = previous_sketches or {}
+    changed_num = [c for c in num_cols if str(c) not in reuse]
+    changed_cat = [c for c in df.columns if c not in num_cols and str(c) not in reuse]
+    sketches = build_sketches(df, changed_num, changed_cat)
+
+    for kind in ("numeric", "categorical"):
+        prev_kind = previous_sketches.get(kind) or {}
+        for col in reuse:
+            if col in prev_kind:
+                sketches[kind][col] = prev_kind[col]
+    return sketches
+
+
+def compute_profile(df: pd.DataFrame, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    describe() + semantic types + quality report for one parsed upload.
+    Pure CPU, no I/O.
+
+    `previous` is the prior upload's stored profile (column_hashes,
+    summary_stats, quality_report, semantic_types). Columns whose content
+    hash is unchanged reuse those stats; only changed columns are profiled.
+    """
+    previous = previous or {}
+    timings: Dict[str, float] = {}
+    mark = time.perf_counter()
+
+    def lap(name: str) -> None:
+        nonlocal mark
+        now = time.perf_counter()
+        timings[name] = round((now - mark) * 1000, 2)
+        mark = now
+
+    hashes = column_hashes(df)
+    num_cols = list(df.select_dtypes(include="number").columns)
+    reuse = _reusable_columns(df, num_cols, hashes, previous)
+    lap("hashing")
+
+    changed_num_cols = [c for c in num_cols if str(c) not in reuse]
+    if changed_num_cols:
+        fresh_stats = clean_nan(df[changed_num_cols].describe().to_dict())
+    else:
+        fresh_stats = {}
+    lap("describe")
+
+    prev_summary = previous.get("summary_stats") or {}
+    summary_stats = {
+        col: fresh_stats[col] if col in fresh_stats else prev_summary[str(col)]
+        for col in num_cols
+    }
+
+    sketches = _merge_sketches(df, num_cols, reuse, previous.get("distribution_sketches"))
+    lap("sketches")
+
+    semantic_types = detect_semantic_types(df, previous.get("semantic_types"), hashes)
+    lap("semantic_types")
+    quality_report, insights = analyze_dataframe_quality(
+        df,
+        semantic_types=semantic_types,
+        previous_report=previous.get("quality_report"),
+        reuse_columns=reuse,
+    )
+    lap("quality")
+
+    return {
+        "summary_stats": summary_stats,
+        "quality_report": quality_report,
+        "insights": insights,
+        "semantic_types": semantic_types,
+        "column_hashes": hashes,
+        "distribution_sketches": sketches,
+        "reused_column_count": len(reuse),
+        "timings_ms": timings,
+    }
+
+
+# ==========================
+#  Frame transport
+# ==========================
+def encode_frame(df: pd.DataFrame) -> Tuple[str, Any]:
+    """
+    Hand a frame to a worker process. With pyarrow the frame is written
+    once to an Arrow IPC file and only its path crosses the pool pipe;
+    the child memory-maps it. Frames Arrow cannot type (mixed object
+    columns) are pickled (protocol 5) through the pipe instead.
+    Callers must release_frame() the payload when the worker is done.
+    """
+    if pa is not None:
+        fd, path = tempfile.mkstemp(prefix="profile-", suffix=".arrow", dir=PROFILING_SPOOL_DIR)
+        os.close(fd)
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            return "arrow_file", path
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            os.unlink(path)
+        except Exception:
+            os.unlink(path)
+            raise
+
+    return "pickle", pickle.dumps(df, protocol=5)
+
+
+def decode_frame(fmt: str, payload: Any) -> pd.DataFrame:
+    if fmt == "arrow_file":
+        # The Arrow table references the mapped pages; to_pandas is the one materialization
+        with pa.memory_map(payload, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+    return pickle.loads(payload)
+
+
+def release_frame(fmt: str, payload: Any) -> None:
+    if fmt == "arrow_file":
+        try:
+            os.unlink(payload)
+        except FileNotFoundError:
+            pass
+
+
+# ==========================
+#  Worker side
+# ==========================
+def _warm_worker() -> None:
+    # Runs once per child: pay pandas/numpy import + first-call costs up front
+    pd.DataFrame({"x": [1.0, 2.0]}).describe()
+
+
+def _worker_main(conn) -> None:
+    """Child loop: one (fmt, payload, previous) job in, one (status, value) reply out."""
+    _warm_worker()
+    while True:
+        try:
+            fmt, payload, previous = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send(("ok", compute_profile(decode_frame(fmt, payload), previous)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+# ==========================
+#  Parent side
+# ==========================
+class ProfilingWorker:
+    """
+    One spawned child process and its pipe, used by one caller at a time.
+    Owning the Process (instead of going through ProcessPoolExecutor) is
+    what lets a stuck job be terminated with the public API.
+    """
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), name="profiler", daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def run(self, fmt: str, payload: Any, previous: Optional[Dict[str, Any]], timeout: float) -> Dict[str, Any]:
+        self.conn.send((fmt, payload, previous))
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Profiling timed out after {timeout:.0f}s")
+        status, value = self.conn.recv()
+        if status != "ok":
+            raise RuntimeError(value)
+        return value
+
+    def kill(self) -> None:
+        self.process.terminate()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1)
+        self.conn.close()
+
+
+class ProfilingPool:
+    """
+    Up to `size` ProfilingWorkers, started on demand. A worker that times
+    out or dies is killed and replaced by a fresh one on the next job.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        # spawn: never fork a process that already runs threads + an event loop
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[ProfilingWorker]" = queue.Queue()
+        self._started = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> ProfilingWorker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            spawn = self._started < self.size
+            if spawn:
+                self._started += 1
+        if not spawn:
+            return self._idle.get()
+        try:
+            return ProfilingWorker(self._ctx)
+        except Exception:
+            with self._lock:
+                self._started -= 1
+            raise
+
+    def release(self, worker: ProfilingWorker) -> None:
+        if self._closed:
+            self.discard(worker)
+        else:
+            self._idle.put(worker)
+
+    def discard(self, worker: ProfilingWorker) -> None:
+        worker.kill()
+        with self._lock:
+            self._started -= 1
+
+    def warm(self) -> None:
+        workers = [self.acquire() for _ in range(self.size)]
+        for worker in workers:
+            self.release(worker)
+        logger.info(f"🧮 [PROFILER] Process pool started with {self.size} workers.")
+
+    def shutdown(self) -> None:
+        # Busy workers are killed when their caller releases them
+        self._closed = True
+        while True:
+            try:
+                self.discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def get_profiling_pool() -> Optional[ProfilingPool]:
+    global _pool
+
+    if PROFILING_WORKERS <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProfilingPool(PROFILING_WORKERS)
+        return _pool
+
+
+def warm_profiling_pool() -> None:
+    """Start every worker now instead of on the first upload."""
+    pool = get_profiling_pool()
+    if pool is not None:
+        pool.warm()
+
+
+def shutdown_profiling_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def profile_in_process(df: pd.DataFrame, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Profile in a worker process so CPU work is not serialized by the GIL
+    of the API process. Falls back to the calling thread if the pool is
+    disabled or the worker fails. A timeout kills that worker and fails the
+    stage: re-profiling in-thread would double the work on an overloaded box.
+    """
+    pool = get_profiling_pool()
+    if pool is None:
+        return compute_profile(df, previous)
+
+    fmt, payload, worker = None, None, None
+    try:
+        fmt, payload = encode_frame(df)
+        worker = pool.acquire()
+        result = worker.run(fmt, payload, previous, PROFILING_TIMEOUT_SECONDS)
+        pool.release(worker)
+        return result
+    except TimeoutError:
+        logger.error(f"⏳ [PROFILER] Profiling exceeded {PROFILING_TIMEOUT_SECONDS}s; killing the worker.")
+        pool.discard(worker)
+        raise
+    except (EOFError, OSError) as e:
+        logger.error(f"❌ [PROFILER] Worker died, replacing it on the next upload: {e}")
+        if worker is not None:
+            pool.discard(worker)
+    except Exception as e:
+        logger.error(f"❌ [PROFILER] Out-of-process profiling failed: {e}", exc_info=True)
+        if worker is not None:
+            pool.release(worker)
+    finally:
+        if fmt is not None:
+            release_frame(fmt, payload)
+
+    return compute_profile(df, previous)
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import os
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, delete, event, exists, func, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.data_upload import DataUpload
+from app.models.metric_rollup import MetricRollup
+from app.services.downsampling import lttb
+from app.services.metric_history import BASE_METRICS
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = ("upload", "hour", "day")
+BUCKET_SPANS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+TREND_MAX_POINTS = int(os.getenv("TREND_MAX_POINTS", "500"))
+
+_backfill_locks: Dict[str, threading.Lock] = {}
+_backfill_locks_guard = threading.Lock()
+
+
+def _bucket_start(ts: datetime, bucket: str) -> datetime:
+    ts = ts.astimezone(timezone.utc) if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    if bucket == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts
+
+
+# ==========================
+#  Write path (per finished upload)
+# ==========================
+def record_rollups(db: Session, upload: DataUpload, summary_stats: Dict[str, Dict[str, float]]) -> int:
+    """
+    Fold one upload's describe() metrics into the upload/hour/day rollups
+    with a single INSERT ... ON CONFLICT DO UPDATE. Skipped if the upload
+    was already recorded (retries). Returns the number of rows written.
+    """
+    if not summary_stats:
+        return 0
+
+    already = db.query(MetricRollup.id).filter(MetricRollup.upload_id == upload.id).first()
+    if already:
+        return 0
+
+    uploaded_at = upload.uploaded_at or datetime.now(timezone.utc)
+    rows = []
+    for column_name, stats in summary_stats.items():
+        for metric in BASE_METRICS:
+            value = (stats or {}).get(metric)
+            if value is None:
+                continue
+            value = float(value)
+            for bucket in BUCKETS:
+                rows.append({
+                    "id": uuid.uuid4(),
+                    "workspace_id": upload.workspace_id,
+                    "upload_type": upload.upload_type,
+                    "column_name": column_name,
+                    "metric": metric,
+                    "bucket": bucket,
+                    "bucket_start": _bucket_start(uploaded_at, bucket),
+                    "upload_id": upload.id if bucket == "upload" else None,
+                    "count": 1,
+                    "sum": value,
+                    "min": value,
+                    "max": value,
+                    "last": value,
+                })
+
+    if not rows:
+        return 0
+
+    stmt = pg_insert(MetricRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_metric_rollups_series_bucket",
+        set_={
+            "count": MetricRollup.count + stmt.excluded.count,
+            "sum": MetricRollup.sum + stmt.excluded.sum,
+            "min": func.least(MetricRollup.min, stmt.excluded.min),
+            "max": func.greatest(MetricRollup.max, stmt.excluded.max),
+            "last": stmt.excluded.last,
+        },
+    )
+    db.execute(stmt)
+    return len(rows)
+
+
+def remove_upload_rollups(connection, upload: DataUpload) -> None:
+    """
+    Take a deleted upload back out of its series: drop its per-upload rows
+    and recompute the hour/day buckets it fell into from the per-upload rows
+    that remain (buckets left empty are deleted). Runs on the deleting
+    connection, so it commits or rolls back with the delete.
+    """
+    table = MetricRollup.__table__
+    removed = connection.execute(
+        delete(table).where(table.c.upload_id == upload.id, table.c.bucket == "upload")
+    ).rowcount
+    if not removed or upload.uploaded_at is None:
+        return
+
+    series = and_(table.c.workspace_id == upload.workspace_id, table.c.upload_type == upload.upload_type)
+
+    for bucket, span in BUCKET_SPANS.items():
+        start = _bucket_start(upload.uploaded_at, bucket)
+        remaining = table.alias("remaining")
+        in_bucket = and_(
+            remaining.c.workspace_id == upload.workspace_id,
+            remaining.c.upload_type == upload.upload_type,
+            remaining.c.bucket == "upload",
+            remaining.c.bucket_start >= start,
+            remaining.c.bucket_start < start + span,
+        )
+        agg = (
+            select(
+                remaining.c.column_name,
+                remaining.c.metric,
+                func.count().label("count"),
+                func.sum(remaining.c.last).label("sum"),
+                func.min(remaining.c.last).label("min"),
+                func.max(remaining.c.last).label("max"),
+                func.array_agg(aggregate_order_by(remaining.c.last, remaining.c.bucket_start.desc()))[1].label("last"),
+            )
+            .where(in_bucket)
+            .group_by(remaining.c.column_name, remaining.c.metric)
+            .subquery()
+        )
+        target = and_(series, table.c.bucket == bucket, table.c.bucket_start == start)
+
+        connection.execute(
+            update(table)
+            .where(target, table.c.column_name == agg.c.column_name, table.c.metric == agg.c.metric)
+            .values(count=agg.c.count, sum=agg.c.sum, min=agg.c.min, max=agg.c.max, last=agg.c.last)
+        )
+        connection.execute(
+            delete(table).where(
+                target,
+                ~exists().where(
+                    in_bucket,
+                    remaining.c.column_name == table.c.column_name,
+                    remaining.c.metric == table.c.metric,
+                ),
+            )
+        )
+
+
+@event.listens_for(DataUpload, "after_delete")
+def _upload_deleted(mapper, connection, target):
+    remove_upload_rollups(connection, target)
+
+
+def backfill_rollups(db: Session, workspace_id, upload_type: str, commit: bool = True) -> int:
+    """
+    One-time build for history that predates rollups: replays every
+    processed upload of this type through record_rollups.
+    """
+    key = f"{workspace_id}:{upload_type}"
+    with _backfill_locks_guard:
+        lock = _backfill_locks.setdefault(key, threading.Lock())
+
+    with lock:
+        if has_rollups(db, workspace_id, upload_type):
+            return 0
+
+        # Projected rows (no file_content); record_rollups only reads these attributes
+        uploads = db.query(
+            DataUpload.id,
+            DataUpload.workspace_id,
+            DataUpload.upload_type,
+            DataUpload.uploaded_at,
+            DataUpload.analysis_results["summary_stats"].label("summary_stats"),
+        ).filter(
+            DataUpload.workspace_id == workspace_id,
+            DataUpload.upload_type == upload_type,
+            DataUpload.analysis_results.isnot(None),
+        ).order_by(DataUpload.uploaded_at.asc()).all()
+
+        written = 0
+        for upload in uploads:
+            written += record_rollups(db, upload, upload.summary_stats)
+        if commit:
+            db.commit()
+
+        logger.info(f"📈 [ROLLUPS] Backfilled {written} rollup rows for workspace {workspace_id} ({upload_type}).")
+        return written
+
+
+def update_rollups(db: Session, upload: DataUpload, summary_stats: Dict[str, Dict[str, float]]) -> int:
+    """
+    Pipeline hook. The first upload of a series after rollups exist
+    backfills the older history too (the current upload is included via
+    autoflush); afterwards each upload is a single upsert. No commit.
+    """
+    if not has_rollups(db, upload.workspace_id, upload.upload_type):
+        return backfill_rollups(db, upload.workspace_id, upload.upload_type, commit=False)
+    return record_rollups(db, upload, summary_stats)
+
+
+def has_rollups(db: Session, workspace_id, upload_type: str) -> bool:
+    return db.query(MetricRollup.id).filter(
+        MetricRollup.workspace_id == workspace_id,
+        MetricRollup.upload_type == upload_type,
+    ).first() is not None
+
+
+# ==========================
+#  Read path (trend endpoint)
+# ==========================
+def _bucket_value_expr(bucket: str, metric: str):
+    if bucket == "upload":
+        return MetricRollup.last
+    if metric == "max":
+        return MetricRollup.max
+    if metric == "min":
+        return MetricRollup.min
+    return MetricRollup.sum / MetricRollup.count
+
+
+def query_trend(
+    db: Session,
+    workspace_id,
+    upload_type: str,
+    column_name: str,
+    metric: str = "mean",
+    bucket: str = "upload",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: int = TREND_MAX_POINTS,
+) -> List[Tuple[datetime, float]]:
+    """
+    Points for one series from the rollup table (index range scan on the
+    series key + bucket_start), downsampled with LTTB to `max_points`.
+    """
+    query = db.query(
+        MetricRollup.bucket_start,
+        _bucket_value_expr(bucket, metric),
+    ).filter(
+        MetricRollup.workspace_id == workspace_id,
+        MetricRollup.upload_type == upload_type,
+        MetricRollup.column_name == column_name,
+        MetricRollup.metric == metric,
+        MetricRollup.bucket == bucket,
+    )
+    if start is not None:
+        query = query.filter(MetricRollup.bucket_start >= start)
+    if end is not None:
+        query = query.filter(MetricRollup.bucket_start <= end)
+
+    points = [(ts, float(v)) for ts, v in query.order_by(MetricRollup.bucket_start.asc()).all() if v is not None]
+
+    if len(points) > max_points:
+        x = np.asarray([ts.timestamp() for ts, _ in points], dtype="float64")
+        y = np.asarray([v for _, v in points], dtype="float64")
+        points = [points[i] for i in lttb(x, y, max_points)]
+
+    return points
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import io
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Example keys kept per change kind (inserted / deleted / updated)
+ROW_DIFF_SAMPLE_KEYS = 10
+
+_KEY_NAME_HINTS = ("id", "uuid", "guid", "key", "code", "sku")
+
+
+# ==========================
+#  Primary key
+# ==========================
+def _is_key_candidate(s: pd.Series) -> bool:
+    if len(s) == 0 or pd.api.types.is_float_dtype(s):
+        return False
+    return bool(s.notna().all() and s.is_unique)
+
+
+def _is_id_like(name: str) -> bool:
+    name = name.lower()
+    return any(name == hint or name.endswith(f"_{hint}") or name.startswith(f"{hint}_") for hint in _KEY_NAME_HINTS)
+
+
+def detect_primary_key(
+    df: pd.DataFrame,
+    semantic_types: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Optional[str]:
+    """
+    First non-null, unique, non-float column with an id-like name (id,
+    order_id, sku_code, ...) or a uuid/email semantic type, preferring the
+    names. None otherwise: a column that merely happens to be unique (a
+    measure, a timestamp) would turn every changed value into a
+    delete + insert.
+    """
+    semantic_types = semantic_types or {}
+
+    def score(col) -> Optional[int]:
+        if _is_id_like(str(col)):
+            return 0
+        if (semantic_types.get(str(col)) or {}).get("type") in ("uuid", "email"):
+            return 1
+        return None
+
+    candidates = [
+        (rank, position, col)
+        for position, col in enumerate(df.columns)
+        if (rank := score(col)) is not None and _is_key_candidate(df[col])
+    ]
+    if not candidates:
+        return None
+    return str(min(candidates)[2])
+
+
+def _key_strings(s: pd.Series) -> pd.Series:
+    # Stringify so "42" and 42 match across uploads parsed with different dtypes
+    return s.astype(str).str.strip()
+
+
+def _hash_strings(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def _normalized_cells(s: pd.Series) -> pd.Series:
+    """
+    Canonical text per cell so dtype drift between uploads is not a change:
+    numbers compare as float64 ("1", 1 and 1.0 are equal), other values as
+    stripped text, missing values as "".
+    """
+    numbers = pd.to_numeric(s, errors="coerce")
+    text = s.astype(str).str.strip()
+    text = text.where(numbers.isna(), numbers.astype("float64").astype(str))
+    return text.where(s.notna(), "")
+
+
+def _cell_hashes(s: pd.Series) -> np.ndarray:
+    # 32 bits per cell: a missed change needs a collision on that exact cell (2^-32)
+    return (_hash_strings(_normalized_cells(s)) >> np.uint64(32)).astype(np.uint32)
+
+
+# ==========================
+#  Fingerprints
+# ==========================
+class RowFingerprint:
+    """
+    What the next upload needs to diff against this one, without the CSV:
+    the key values, their hashes and one normalized hash per cell.
+    Stored on DataUpload.row_fingerprint (roughly 8 + 4 * columns bytes per row).
+    """
+    def __init__(self, key: str, keys: List[str], key_hashes: np.ndarray, columns: List[str], cell_hashes: np.ndarray):
+        self.key = key
+        self.keys = keys
+        self.key_hashes = key_hashes
+        self.columns = columns
+        self.cell_hashes = cell_hashes  # (rows, columns) uint32
+
+    def column_hashes(self, column: str) -> np.ndarray:
+        return self.cell_hashes[:, self.columns.index(column)]
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            key=np.array([self.key]),
+            keys=np.frombuffer("\x00".join(self.keys).encode("utf-8"), dtype=np.uint8),
+            key_hashes=self.key_hashes,
+            columns=np.array(self.columns, dtype=str),
+            cell_hashes=self.cell_hashes,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "RowFingerprint":
+        with np.load(io.BytesIO(raw), allow_pickle=False) as data:
+            keys_blob = data["keys"].tobytes().decode("utf-8")
+            key_hashes = data["key_hashes"]
+            return cls(
+                key=str(data["key"][0]),
+                keys=keys_blob.split("\x00") if key_hashes.size else [],
+                key_hashes=key_hashes,
+                columns=[str(c) for c in data["columns"]],
+                cell_hashes=data["cell_hashes"],
+            )
+
+
+def row_fingerprint(df: pd.DataFrame, key: str) -> Optional[RowFingerprint]:
+    """None when `key` is missing or not unique."""
+    if key not in df.columns:
+        return None
+
+    keys = _key_strings(df[key])
+    key_hashes = _hash_strings(keys)
+    if np.unique(key_hashes).size != key_hashes.size:
+        return None
+
+    columns = [str(c) for c in df.columns if c != key]
+    cell_hashes = np.empty((len(df), len(columns)), dtype=np.uint32)
+    for i, col in enumerate(c for c in df.columns if c != key):
+        cell_hashes[:, i] = _cell_hashes(df[col])
+
+    return RowFingerprint(str(key), keys.tolist(), key_hashes, columns, cell_hashes)
+
+
+# ==========================
+#  Diff
+# ==========================
+def diff_fingerprints(previous: RowFingerprint, current: RowFingerprint) -> Optional[Dict[str, Any]]:
+    """
+    Row-level diff of two fingerprints taken on the same key.
+
+    Keys are aligned with a sort-merge join (np.intersect1d on the uint64
+    key hashes); matched rows are then compared column by column on the
+    stored cell hashes. Returns None when the fingerprints use different keys.
+    """
+    if previous.key != current.key:
+        return None
+
+    _, prev_pos, curr_pos = np.intersect1d(
+        previous.key_hashes, current.key_hashes, assume_unique=True, return_indices=True
+    )
+
+    inserted_mask = np.ones(current.key_hashes.size, dtype=bool)
+    inserted_mask[curr_pos] = False
+    deleted_mask = np.ones(previous.key_hashes.size, dtype=bool)
+    deleted_mask[prev_pos] = False
+
+    # Compare only columns present in both uploads; schema changes are reported separately
+    common_cols = [c for c in current.columns if c in previous.columns]
+
+    updated_mask = np.zeros(len(curr_pos), dtype=bool)
+    changed_cells_by_column: Dict[str, int] = {}
+
+    for col in common_cols:
+        changed = previous.column_hashes(col)[prev_pos] != current.column_hashes(col)[curr_pos]
+        updated_mask |= changed
+        changed_total = int(changed.sum())
+        if changed_total:
+            changed_cells_by_column[col] = changed_total
+
+    def sample(keys: List[str], positions: np.ndarray) -> List[str]:
+        return [keys[i] for i in positions[:ROW_DIFF_SAMPLE_KEYS]]
+
+    inserted_pos = np.flatnonzero(inserted_mask)
+    deleted_pos = np.flatnonzero(deleted_mask)
+    updated_pos = np.sort(curr_pos[updated_mask])
+
+    return {
+        "key_column": current.key,
+        "inserted_rows": int(inserted_pos.size),
+        "deleted_rows": int(deleted_pos.size),
+        "updated_rows": int(updated_pos.size),
+        "unchanged_rows": int(len(curr_pos) - updated_pos.size),
+        "changed_cells_by_column": changed_cells_by_column,
+        "sample_inserted_keys": sample(current.keys, inserted_pos),
+        "sample_deleted_keys": sample(previous.keys, deleted_pos),
+        "sample_updated_keys": sample(current.keys, updated_pos),
+    }
+
+
+def diff_rows(previous_df: pd.DataFrame, current_df: pd.DataFrame, key: str) -> Optional[Dict[str, Any]]:
+    """Row-level diff keyed on `key`; None when `key` is missing or not unique in either frame."""
+    previous = row_fingerprint(previous_df, key)
+    current = row_fingerprint(current_df, key)
+    if previous is None or current is None:
+        return None
+    return diff_fingerprints(previous, current)
+
+
+def has_row_changes(row_diff: Optional[Dict[str, Any]]) -> bool:
+    if not row_diff:
+        return False
+    return bool(row_diff["inserted_rows"] or row_diff["deleted_rows"] or row_diff["updated_rows"])
+
+
+def summarize_row_diff(row_diff: Dict[str, Any]) -> str:
+    """One-line notification text, e.g. '+12 rows, -3 rows, 7 updated (by order_id)'."""
+    parts = []
+    if row_diff["inserted_rows"]:
+        parts.append(f"+{row_diff['inserted_rows']} rows")
+    if row_diff["deleted_rows"]:
+        parts.append(f"-{row_diff['deleted_rows']} rows")
+    if row_diff["updated_rows"]:
+        parts.append(f"{row_diff['updated_rows']} updated")
+    return f"{', '.join(parts)} (by {row_diff['key_column']})"
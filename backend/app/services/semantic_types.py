@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.services.fingerprints import column_fingerprint
+
+# One sample per column, shared by every detector
+SAMPLE_SIZE = 200
+
+
+# ==========================
+#  Detectors
+# ==========================
+class SemanticDetector:
+    """
+    Base class for a semantic column type. `hits` gets the shared string
+    sample and returns a boolean Series; the type matches when the hit
+    ratio reaches `min_ratio`.
+    """
+    name = "base"
+    min_ratio = 0.8
+
+    def hits(self, sample: pd.Series) -> pd.Series:
+        raise NotImplementedError
+
+    def matches(self, sample: pd.Series) -> bool:
+        return bool(self.hits(sample).mean() >= self.min_ratio)
+
+
+class RegexDetector(SemanticDetector):
+    def __init__(self, name: str, pattern: str, min_ratio: float = 0.8, flags: int = 0):
+        self.name = name
+        self.pattern = re.compile(pattern, flags)
+        self.min_ratio = min_ratio
+
+    def hits(self, sample: pd.Series) -> pd.Series:
+        return sample.str.fullmatch(self.pattern).fillna(False).astype(bool)
+
+
+class NameDetector(RegexDetector):
+    """Person-style names: letters, spaces and . - ' with 2-40 characters."""
+    def __init__(self):
+        super().__init__("name", r"[A-Za-z\s\.\-']+", min_ratio=0.6)
+
+    def hits(self, sample: pd.Series) -> pd.Series:
+        lengths = sample.str.len()
+        return super().hits(sample) & lengths.between(2, 40)
+
+
+class DateDetector(SemanticDetector):
+    """Values with a date separator that pandas can parse."""
+    name = "date"
+    _separator = re.compile(r".*\d.*[-/.:\s].*\d.*")
+
+    def hits(self, sample: pd.Series) -> pd.Series:
+        candidate = sample.str.fullmatch(self._separator).fillna(False).astype(bool)
+        if not candidate.any():
+            return candidate
+        parsed = pd.to_datetime(sample.where(candidate), errors="coerce", format="mixed")
+        return candidate & parsed.notna()
+
+
+_detectors: List[SemanticDetector] = [
+    RegexDetector("uuid", r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}"),
+    RegexDetector("email", r"[^@\s]+@[^@\s]+\.[^@\s]+", min_ratio=0.6),
+    RegexDetector("url", r"(?:https?://|www\.)[^\s]+", flags=re.IGNORECASE),
+    RegexDetector("currency", r"[-+]?\s?(?:[$€£¥₹]|USD|EUR|GBP|INR)\s?[-+]?\d[\d,]*(?:\.\d+)?|[-+]?\d[\d,]*(?:\.\d+)?\s?(?:[$€£¥₹]|USD|EUR|GBP|INR)"),
+    # dates before phone: "2024-01-05" also fits the phone shape
+    DateDetector(),
+    RegexDetector("phone", r"\+?\d{1,3}?[\s.\-]?\(?\d{2,4}\)?(?:[\s.\-]?\d{2,4}){2,3}"),
+    NameDetector(),
+]
+
+
+def register_detector(detector: SemanticDetector, before: Optional[str] = None) -> None:
+    """Add a detector; first match wins, so `before` places it ahead of an existing one."""
+    if before:
+        for i, existing in enumerate(_detectors):
+            if existing.name == before:
+                _detectors.insert(i, detector)
+                return
+    _detectors.append(detector)
+
+
+def get_detectors() -> List[SemanticDetector]:
+    return list(_detectors)
+
+
+# ==========================
+#  Detection
+# ==========================
+def column_sample(s: pd.Series, size: int = SAMPLE_SIZE) -> pd.Series:
+    return s.dropna().head(size).astype(str).str.strip()
+
+
+def detect_column_type(s: pd.Series) -> Optional[str]:
+    # Numeric columns were already coerced by the parser; nothing textual to detect
+    if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+        return None
+
+    sample = column_sample(s)
+    if sample.empty:
+        return None
+
+    for detector in _detectors:
+        if detector.matches(sample):
+            return detector.name
+    return None
+
+
+def detect_semantic_types(
+    df: pd.DataFrame,
+    cache: Optional[Dict[str, Dict[str, Any]]] = None,
+    fingerprints: Optional[Dict[str, str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    {column: {"type": <name or None>, "fingerprint": <hash>}}.
+    Columns whose fingerprint matches the cache (previous upload) keep
+    their cached type without re-running the detectors. Pass
+    `fingerprints` when column hashes were already computed.
+    """
+    cache = cache or {}
+    fingerprints = fingerprints or {}
+    results: Dict[str, Dict[str, Any]] = {}
+
+    for col in df.columns:
+        s = df[col]
+        fingerprint = fingerprints.get(str(col)) or column_fingerprint(s)
+
+        cached = cache.get(str(col))
+        if isinstance(cached, dict) and cached.get("fingerprint") == fingerprint:
+            results[str(col)] = cached
+            continue
+
+        results[str(col)] = {"type": detect_column_type(s), "fingerprint": fingerprint}
+
+    return results
@@ -0,0 +1,123 @@
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+try:
+    from prometheus_client import Histogram
+except ImportError:  # optional: timings are still stored on the upload and logged
+    Histogram = None
+
+logger = logging.getLogger(__name__)
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 5e6, 1e7, 5e7, 1e8)
+ROW_BUCKETS = (10, 100, 1_000, 5_000, 10_000, 25_000, 50_000, 100_000)
+COLUMN_BUCKETS = (1, 5, 10, 20, 50, 100, 200, 500)
+
+METRICS_AVAILABLE = Histogram is not None
+
+# Labelled by upload_type / source, not workspace: per-workspace breakdowns live in
+# analysis_results["timings"] where they can be grouped with SQL.
+# Inline mode (production) serves these from the API's /metrics. Celery workers
+# only export them when started with PROMETHEUS_MULTIPROC_DIR + CELERY_METRICS_PORT
+# (see celery_worker.start_metrics_exporter); otherwise they stay in the worker.
+if METRICS_AVAILABLE:
+    PIPELINE_STAGE_SECONDS = Histogram(
+        "datapulse_pipeline_stage_seconds", "Wall time per ingestion pipeline stage.",
+        ["stage", "upload_type"], buckets=STAGE_BUCKETS,
+    )
+    PIPELINE_INPUT_BYTES = Histogram(
+        "datapulse_pipeline_input_bytes", "CSV bytes per processed upload.",
+        ["upload_type"], buckets=SIZE_BUCKETS,
+    )
+    PIPELINE_ROWS = Histogram(
+        "datapulse_pipeline_rows", "Rows per processed upload.",
+        ["upload_type"], buckets=ROW_BUCKETS,
+    )
+    PIPELINE_COLUMNS = Histogram(
+        "datapulse_pipeline_columns", "Columns per processed upload.",
+        ["upload_type"], buckets=COLUMN_BUCKETS,
+    )
+    FETCH_STAGE_SECONDS = Histogram(
+        "datapulse_fetch_stage_seconds", "Wall time per poller stage (API / DB fetchers).",
+        ["stage", "source"], buckets=STAGE_BUCKETS,
+    )
+
+
+class StageTimer:
+    """
+    Wall-clock milliseconds per named stage, in the order the stages ran.
+    A stage entered twice accumulates. Also carries the size counters
+    (bytes / rows / columns) that come with the job.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.breakdown: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = round(self.stages.get(name, 0.0) + seconds * 1000, 2)
+
+    def count(self, **counters: int) -> None:
+        self.counters.update({key: int(value) for key, value in counters.items() if value is not None})
+
+    @property
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+    def slowest(self) -> Optional[str]:
+        return max(self.stages, key=self.stages.get) if self.stages else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Shape stored under analysis_results["timings"]."""
+        timings: Dict[str, Any] = {
+            "stages_ms": dict(self.stages),
+            "total_ms": self.total_ms,
+            "slowest_stage": self.slowest(),
+            **self.counters,
+        }
+        if self.breakdown:
+            timings["profile_breakdown_ms"] = dict(self.breakdown)
+        return timings
+
+    def summary(self) -> str:
+        return " | ".join(f"{name} {ms:.0f}ms" for name, ms in self.stages.items())
+
+
+def export_pipeline_metrics(timer: StageTimer, upload_type: Optional[str]) -> None:
+    if not METRICS_AVAILABLE:
+        return
+    label = upload_type or "unknown"
+    try:
+        for name, ms in timer.stages.items():
+            PIPELINE_STAGE_SECONDS.labels(name, label).observe(ms / 1000)
+        if "bytes" in timer.counters:
+            PIPELINE_INPUT_BYTES.labels(label).observe(timer.counters["bytes"])
+        if "rows" in timer.counters:
+            PIPELINE_ROWS.labels(label).observe(timer.counters["rows"])
+        if "columns" in timer.counters:
+            PIPELINE_COLUMNS.labels(label).observe(timer.counters["columns"])
+    except Exception as e:
+        logger.debug(f"Pipeline metrics export failed: {e}")
+
+
+def export_fetch_metrics(timer: StageTimer, source: str, workspace_id: Optional[str] = None) -> None:
+    """Called once a fetcher has stored its upload; the pipeline takes over from there."""
+    logger.info(f"⏱️ [{source.upper()} FETCHER] {workspace_id} stages: {timer.summary()} (total {timer.total_ms:.0f}ms)")
+    if not METRICS_AVAILABLE:
+        return
+    try:
+        for name, ms in timer.stages.items():
+            FETCH_STAGE_SECONDS.labels(name, source).observe(ms / 1000)
+    except Exception as e:
+        logger.debug(f"Fetch metrics export failed: {e}")
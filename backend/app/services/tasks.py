@@ -4,15 +4,14 @@ import asyncio
 import requests
 import logging
 import datetime as dt
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only
 from sqlalchemy import create_engine, text
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
-from io import BytesIO
 import google.generativeai as genai
 import pytz
-import operator 
 import threading
+import time
 from urllib.parse import quote_plus
 from io import StringIO
 import numpy as np 
@@ -21,19 +20,22 @@ from app.core.database import SessionLocal
 from app.models.workspace import Workspace
 from app.models.data_upload import DataUpload
 from app.models.user import User
-from app.models.notification import Notification
-from app.models.alert_rule import AlertRule
 from app.models.feedback import Feedback
-from app.models.workspace_user_settings import WorkspaceUserSettings
 from app.services.email_service import send_detailed_alert_email, send_threshold_alert_email, send_otp_email
 from app.core.connection_manager import manager
+from app.core.workspace_config_cache import workspace_config_cache
 import concurrent.futures
 import json
 import re
 from sqlalchemy.exc import OperationalError, InterfaceError
 
-from app.services.data_quality import analyze_dataframe_quality
-from app.services.storage_service import download_file_bytes
+from app.services.pipeline import (
+    PipelineExecutor,
+    run_csv_pipeline,
+    is_fetch_due,
+)
+from app.services.profiling import profile_in_process
+from app.services.stage_timing import StageTimer, export_fetch_metrics
 from app.services.storage_service import upload_csv_bytes
 from app.services.upload_limits import is_workspace_upload_limit_reached
 
@@ -55,17 +57,6 @@ if GEMINI_API_KEY:
     except Exception as e:
         logger.error(f"⚠️ Failed to initialize Gemini AI: {e}")
 
-def convert_utc_to_ist_str(utc_dt):
-    if not utc_dt: return "N/A"
-    try:
-        ist_zone = pytz.timezone('Asia/Kolkata')
-        aware_utc_dt = pytz.utc.localize(utc_dt) if utc_dt.tzinfo is None else utc_dt
-        ist_dt = aware_utc_dt.astimezone(ist_zone)
-        return ist_dt.strftime("%B %d, %Y, %I:%M %p %Z")
-    except Exception:
-        return "Invalid Date"
-
-
 AI_SYSTEM_PROMPT = """
 SYSTEM PROMPT (DO NOT CHANGE OUTPUT FORMAT):
 You are a Senior Data Analyst generating insights for a production SaaS dashboard.
@@ -138,145 +129,6 @@ def run_async_safely(coro: Coroutine[Any, Any, Any], loop: asyncio.AbstractEvent
         except Exception as final_error:
              logger.error(f"🔥 [WORKER] Async execution completely failed: {final_error}")
 
-def check_alert_rules(
-    db: Session, 
-    workspace: Workspace, 
-    current_upload: DataUpload, 
-    analysis_results: dict, 
-    loop: asyncio.AbstractEventLoop = None
-) -> None:
-
-    logger.info(f"🔍 [ENGINE] Scanning rules for Workspace: {workspace.name}...")
-
-    rules = db.query(AlertRule).filter(
-        AlertRule.workspace_id == workspace.id, 
-        AlertRule.is_active == True
-    ).all()
-    
-    if not rules:
-        logger.info("-> No active alert rules found.")
-        return
-
-    stats = analysis_results.get("summary_stats", {})
-    if not stats:
-        logger.warning("-> Engine aborted: No statistics found in upload.")
-        return
-    execution_fingerprint = f"upload_{current_upload.id}_ws_{workspace.id}"
-
-    already_processed = db.query(Notification).filter(
-        Notification.workspace_id == workspace.id,
-        Notification.idempotency_key == execution_fingerprint
-    ).first()
-
-    if already_processed:
-        logger.info(f"🛡️ [GUARD] Already processed {execution_fingerprint}. Skipping.")
-        return
-
-    ops = {
-        'greater_than': operator.gt,
-        'less_than': operator.lt,
-        'equals': operator.eq,
-        'not_equals': operator.ne
-    }
-
-    triggered_alerts = []
-    users_map = {str(u.id): u for u in (workspace.team_members + [workspace.owner])}
-    users_to_notify = list(users_map.values())
-
-
-    for rule in rules:
-        try:
-            col_stats = stats.get(rule.column_name)
-            if not col_stats:
-                continue 
-            
-            actual_value_raw = col_stats.get(rule.metric)
-            if actual_value_raw is None:
-                continue
-
-            actual_value = round(float(actual_value_raw), 4)
-            threshold_value = round(float(rule.value), 4)
-
-            compare_func = ops.get(rule.condition)
-            if not compare_func or not compare_func(actual_value, threshold_value):
-                continue
-
-            triggered_alerts.append({
-                "rule_id": str(rule.id),
-                "column_name": rule.column_name,
-                "metric": rule.metric.replace('50%', 'median').upper(),
-                "condition": rule.condition.replace('_', ' '),
-                "threshold": threshold_value,
-                "actual": actual_value
-            })
-
-        except Exception as e:
-            logger.error(f"⚠️ Error evaluating rule {rule.id}: {e}")
-            continue
-        
-    if triggered_alerts:
-        try:
-            summary_msg = f"Alert: {len(triggered_alerts)} violations detected in '{workspace.name}'."
-            
-            for user in users_to_notify:
-                new_notif = Notification(
-                    user_id=user.id,
-                    workspace_id=workspace.id,
-                    message=summary_msg,
-                    idempotency_key=execution_fingerprint 
-                )
-                db.add(new_notif)
-            db.commit()
-            logger.info(f"💾 Records committed for fingerprint: {execution_fingerprint}")
-
-        except Exception as e:
-            db.rollback()
-            logger.error(f"❌ Database error, aborting: {e}")
-            return
-
-        user_ids = [u.id for u in users_to_notify]
-
-        enabled_settings = db.query(WorkspaceUserSettings).filter(
-            WorkspaceUserSettings.workspace_id == workspace.id,
-            WorkspaceUserSettings.user_id.in_(user_ids),
-            WorkspaceUserSettings.email_notifications_enabled == True,
-        ).all()
-
-        enabled_user_ids = {s.user_id for s in enabled_settings}
-
-        recipients = [
-            user.email for user in users_to_notify
-            if user.id in enabled_user_ids
-        ]
-
-        timestamp_to_use = current_upload.uploaded_at or datetime.now(timezone.utc)
-        email_context = { 
-            "workspace_name": workspace.name, 
-            "triggered_alerts": triggered_alerts, 
-            "file_name": current_upload.file_path,
-            "upload_time": convert_utc_to_ist_str(timestamp_to_use),
-            "workspace_id": str(workspace.id),
-            "idempotency_key": execution_fingerprint
-        }
-
-        for user in users_to_notify:
-            run_async_safely(
-                manager.push_to_user(
-                    user_id=str(user.id),
-                    message={"type": "NEW_NOTIFICATION_ALERT", "count": len(triggered_alerts)}
-                ),
-                loop
-            )
-
-        if recipients:
-            run_async_safely(send_threshold_alert_email(recipients, email_context), loop)
-
-        
-        logger.info(f"✅ Side effects sent for {len(triggered_alerts)} alerts.")
-    else:
-        logger.info("✅ Scan complete: No violations found.")
-
-
 def kill_poller(
     db: Session,
     workspace_id: str,
@@ -288,7 +140,10 @@ def kill_poller(
     terminal = False
 
     try:
-        ws = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+        # Only the failure bookkeeping; the encrypted columns stay unloaded
+        ws = db.query(Workspace).options(
+            load_only(Workspace.id, Workspace.name, Workspace.is_polling_active, Workspace.failure_count)
+        ).filter(Workspace.id == workspace_id).first()
         if not ws:
             return
 
@@ -353,15 +208,12 @@ def fetch_api_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
     logger.info(f"🤖 [API FETCHER] Starting API fetch: {workspace_id}")
 
     MAX_BYTES = 5 * 1024 * 1024
+    timer = StageTimer()
 
-    # 1) DB: read workspace config fast, then CLOSE DB
-    db: Session = SessionLocal()
+    # 1) Workspace config from the cache (no session held during the HTTP call)
     try:
-        workspace = (
-            db.query(Workspace)
-            .filter(Workspace.id == workspace_id)
-            .first()
-        )
+        with timer.stage("config"):
+            workspace = workspace_config_cache.get(workspace_id)
 
         if not workspace or not workspace.is_polling_active:
             return
@@ -373,8 +225,6 @@ def fetch_api_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
     except Exception as e:
         logger.error(f"🔥 [API FETCHER] Failed to read workspace: {e}", exc_info=True)
         return
-    finally:
-        db.close()
 
     # Validation (no DB needed)
     if not api_url or not api_url.startswith("http"):
@@ -411,6 +261,7 @@ def fetch_api_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
     headers = {header_name: header_value} if header_name and header_value else {}
 
     # 2) NETWORK: do the slow API call WITHOUT holding DB session
+    network_started = time.perf_counter()
     try:
         response = requests.get(api_url, headers=headers, timeout=(10, 30), stream=True)
 
@@ -473,6 +324,7 @@ def fetch_api_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
                 return
 
         content = b"".join(chunks)
+        timer.add("source_fetch", time.perf_counter() - network_started)
 
     except requests.exceptions.HTTPError as http_err:
         db2: Session = SessionLocal()
@@ -521,7 +373,8 @@ def fetch_api_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
 
     # 3) PARSE: still no DB needed
     try:
-        data = json.loads(content)
+        with timer.stage("json_parse"):
+            data = json.loads(content)
     except Exception as e:
         db2: Session = SessionLocal()
         try:
@@ -555,8 +408,9 @@ def fetch_api_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
 
     # 4) BUILD CSV: still no DB
     try:
-        df = pd.json_normalize(data)
-        csv_content = df.to_csv(index=False)
+        with timer.stage("to_csv"):
+            df = pd.json_normalize(data)
+            csv_content = df.to_csv(index=False)
     except Exception as e:
         logger.error(f"🔥 [API FETCHER] CSV build failed: {e}", exc_info=True)
         db2: Session = SessionLocal()
@@ -576,8 +430,10 @@ def fetch_api_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
     # 5) DB: write upload + update workspace fast, then CLOSE DB
     db3: Session = SessionLocal()
     try:
+        # Fresh row for the poll bookkeeping only (polling may have been disabled mid-fetch)
         workspace2 = (
             db3.query(Workspace)
+            .options(load_only(Workspace.id, Workspace.is_polling_active, Workspace.last_polled_at, Workspace.failure_count))
             .filter(Workspace.id == workspace_id)
             .first()
         )
@@ -615,7 +471,9 @@ def fetch_api_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
 
         storage_path = f"workspaces/{workspace2.id}/uploads/{new_upload.id}.csv"
 
-        upload_csv_bytes(storage_path, csv_bytes)
+        with timer.stage("store"):
+            upload_csv_bytes(storage_path, csv_bytes)
+        timer.count(bytes=len(csv_bytes), rows=len(df), columns=len(df.columns))
 
         new_upload.storage_path = storage_path
         new_upload.file_url = None  # private bucket
@@ -656,6 +514,8 @@ def fetch_api_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
     finally:
         db3.close()
 
+    export_fetch_metrics(timer, "api", workspace_id)
+
     # 6) Kick CSV processing AFTER DB is closed
     try:
         process_csv_task(str(new_upload.id), loop)
@@ -671,9 +531,11 @@ def fetch_db_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
 
     db: Session = SessionLocal()
     user_engine = None
+    timer = StageTimer()
 
     try:
-        workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
+        with timer.stage("config"):
+            workspace = workspace_config_cache.get(workspace_id)
 
         if not workspace:
             logger.warning(f"-> [DB FETCHER] Workspace {workspace_id} not found.")
@@ -796,7 +658,8 @@ def fetch_db_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
                     # Not all DBs allow these (permissions). Don't kill job for this.
                     pass
 
-                df = pd.read_sql(text(safe_query), connection)
+                with timer.stage("source_fetch"):
+                    df = pd.read_sql(text(safe_query), connection)
 
             if len(df) > MAX_ROWS:
                 kill_poller(
@@ -890,8 +753,9 @@ def fetch_db_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
             return
 
         # ✅ Store as CSV upload
-        csv_content = df.to_csv(index=False)
-        csv_bytes = csv_content.encode("utf-8")
+        with timer.stage("to_csv"):
+            csv_content = df.to_csv(index=False)
+            csv_bytes = csv_content.encode("utf-8")
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         file_name = f"{timestamp}_db_query.csv"
@@ -908,13 +772,19 @@ def fetch_db_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
         db.flush()  # get id
 
         storage_path = f"workspaces/{workspace.id}/uploads/{new_upload.id}.csv"
-        upload_csv_bytes(storage_path, csv_bytes)
+        with timer.stage("store"):
+            upload_csv_bytes(storage_path, csv_bytes)
+        timer.count(bytes=len(csv_bytes), rows=len(df), columns=len(df.columns))
 
         new_upload.storage_path = storage_path
         new_upload.file_url = None
 
-        workspace.last_polled_at = datetime.now(timezone.utc)
-        workspace.failure_count = 0
+        polled = db.query(Workspace).options(
+            load_only(Workspace.id, Workspace.last_polled_at, Workspace.failure_count)
+        ).filter(Workspace.id == workspace.id).first()
+        if polled:
+            polled.last_polled_at = datetime.now(timezone.utc)
+            polled.failure_count = 0
 
         db.commit()
         db.refresh(new_upload)
@@ -925,6 +795,7 @@ def fetch_db_data(workspace_id: str, loop: asyncio.AbstractEventLoop = None):
             except RuntimeError:
                 loop = None
 
+        export_fetch_metrics(timer, "db", workspace_id)
         process_csv_task(str(new_upload.id), loop)
 
 
@@ -987,31 +858,10 @@ def schedule_data_fetches() -> None:
             return
 
         triggered_count = 0
-        buffer = timedelta(seconds=180)
 
         for ws in workspaces:
             try:
-                is_due = False
-                last_polled = ws.last_polled_at
-                interval = ws.polling_interval
-
-                if not last_polled:
-                    is_due = True
-                elif interval == "30min":
-                    if (now - last_polled) >= (timedelta(minutes=15) - buffer):
-                        is_due = True
-                elif interval == "hourly":
-                    if (now - last_polled) >= (timedelta(hours=1) - buffer):
-                        is_due = True
-                elif interval == "3hours":
-                    if (now - last_polled) >= (timedelta(hours=3) - buffer):
-                        is_due = True
-                elif interval == "12hours":
-                    if (now - last_polled) >= (timedelta(hours=12) - buffer):
-                        is_due = True
-                elif interval == "daily":
-                    if (now - last_polled) >= (timedelta(days=1) - buffer):
-                        is_due = True
+                is_due = is_fetch_due(ws.polling_interval, ws.last_polled_at, now)
 
                 if is_due:
                     logger.info(f"🎯 SIGNAL: Offloading '{ws.name}' ({ws.id}) to ThreadPool...")
@@ -1052,10 +902,9 @@ def process_data_fetch_task(workspace_id: str, loop: asyncio.AbstractEventLoop =
             except Exception:
                 loop = None
 
-    db = SessionLocal()
     try:
-        ws = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-        
+        ws = workspace_config_cache.get(workspace_id)
+
         if not ws or not ws.is_polling_active:
             logger.warning(f"-> [GATE] Aborting. Workspace {workspace_id} is gone or inactive.")
             return
@@ -1070,22 +919,10 @@ def process_data_fetch_task(workspace_id: str, loop: asyncio.AbstractEventLoop =
             
     except Exception as e:
         logger.error(f"🔥 [GATE] Internal Gate Failure: {e}")
-    finally:
-        db.close()
         
 # ======================
 #  The "Analyzer Robot" 
 # ======================
-def clean_nan(obj):
-    if isinstance(obj, dict):
-        return {k: clean_nan(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [clean_nan(v) for v in obj]
-    elif isinstance(obj, float):
-        if np.isnan(obj) or np.isinf(obj):
-            return None
-    return obj
-
 EMAIL_SEM = threading.BoundedSemaphore(3)
 
 def _run_email_in_background(recipients, email_context):
@@ -1109,328 +946,42 @@ def _run_email_in_background(recipients, email_context):
         EMAIL_SEM.release()
 
 
+class InlineExecutor(PipelineExecutor):
+    """
+    Runs pipeline side effects from the API process' thread pool.
+    Realtime pushes go straight to the in-process ConnectionManager; in
+    development Celery owns realtime delivery via the Redis relay.
+    """
+    name = "inline"
 
-def process_csv_task(upload_id: str, loop: asyncio.AbstractEventLoop = None):
-    logger.info(f"🚀 [WORKER] Starting REAL processing for upload ID: {upload_id}...")
-    db: Session = SessionLocal()
+    def __init__(self, loop: asyncio.AbstractEventLoop = None):
+        self.loop = loop
 
-    workspace_id_str = None
-    status_message = "job_error"
-    new_notifications_created = False
-    error_msg = None
+    def broadcast_to_workspace(self, workspace_id: str, payload: dict) -> None:
+        if APP_MODE == "production":
+            run_async_safely(manager.broadcast_to_workspace(workspace_id, payload), self.loop)
 
-    # SAFE LIMIT: Prevent OOM on Render Free Tier (512MB)
-    MAX_ROWS = 25000
+    def push_to_user(self, user_id: str, message: dict) -> None:
+        if APP_MODE == "production":
+            run_async_safely(manager.push_to_user(user_id=user_id, message=message), self.loop)
 
-    users_to_notify = []  # prevent UnboundLocalError
+    def send_change_email(self, recipients, email_context) -> None:
+        threading.Thread(
+            target=_run_email_in_background,
+            args=(recipients, email_context),
+            daemon=True,
+        ).start()
 
-    try:
-        current_upload = db.query(DataUpload).filter(DataUpload.id == upload_id).first()
-        if not current_upload:
-            logger.warning(f"[WORKER] Upload ID {upload_id} not found.")
-            return
+    def send_threshold_email(self, recipients, email_context) -> None:
+        run_async_safely(send_threshold_alert_email(recipients, email_context), self.loop)
 
-        workspace_id_str = str(current_upload.workspace_id)
+    def run_profile(self, df: pd.DataFrame, previous: dict = None) -> dict:
+        # Keep pandas CPU work off the API process' GIL
+        return profile_in_process(df, previous)
 
-        # ==========================================================
-        # 1) LOAD CSV BYTES
-        # ==========================================================
-        csv_bytes: bytes | None = None
 
-        if current_upload.storage_path:
-            try:
-                csv_bytes = download_file_bytes(current_upload.storage_path)
-            except Exception as e:
-                logger.error(f"❌ [WORKER] Failed to download CSV from storage: {e}", exc_info=True)
-                return
-
-        # fallback for old uploads (still stored in DB)
-        if csv_bytes is None and current_upload.file_content:
-            try:
-                csv_bytes = current_upload.file_content.encode("utf-8")
-            except Exception as e:
-                logger.error(f"❌ [WORKER] Failed to encode DB CSV content: {e}", exc_info=True)
-                return
-
-        if not csv_bytes:
-            logger.warning(f"[WORKER] No CSV content found for upload {upload_id}.")
-            return
-
-        # ==========================================================
-        # 2) PARSE CSV (row cap for RAM safety)
-        # ==========================================================
-        is_truncated = False
-
-        try:
-            df = pd.read_csv(BytesIO(csv_bytes), nrows=MAX_ROWS + 1)
-            del csv_bytes
-
-            if len(df) > MAX_ROWS:
-                is_truncated = True
-                logger.warning(f"⚠️ [WORKER] Truncating file {upload_id} to {MAX_ROWS} rows for RAM safety.")
-                df = df.head(MAX_ROWS)
-
-            # ✅ safer conversion (no deprecated errors="ignore")
-            for col in df.columns:
-                try:
-                    df[col] = pd.to_numeric(df[col])
-                except Exception:
-                    # keep original as-is (string/object/etc)
-                    pass
-
-        except Exception as e:
-            logger.error(f"❌ Failed to parse CSV: {e}", exc_info=True)
-            status_message = "job_error"
-            return {"status": "error", "message": "Failed to parse CSV"}
-
-        # ==========================================================
-        # 3) SCHEMA + ROW COUNT CHANGE DETECTION
-        # ==========================================================
-        new_schema = {col: str(dtype) for col, dtype in df.dtypes.items()}
-        new_row_count = int(len(df))
-        new_col_count = int(len(df.columns))
-
-        previous_upload = (
-            db.query(DataUpload)
-            .filter(
-                DataUpload.workspace_id == current_upload.workspace_id,
-                DataUpload.upload_type == current_upload.upload_type,
-                DataUpload.id != current_upload.id,
-            )
-            .order_by(DataUpload.uploaded_at.desc())
-            .first()
-        )
-
-        schema_has_changed = False
-        row_count_has_changed = False
-        col_count_has_changed = False
-
-        new_cols = set(new_schema.keys())
-        old_cols = set()
-        old_row_count = 0
-        old_col_count = 0
-
-        if previous_upload:
-            old_schema = previous_upload.schema_info or {}
-            old_cols = set(old_schema.keys())
-
-            if old_cols != new_cols:
-                schema_has_changed = True
-
-            try:
-                old_row_count = int((previous_upload.analysis_results or {}).get("row_count", 0))
-            except Exception:
-                old_row_count = 0
-
-            try:
-                old_col_count = int((previous_upload.analysis_results or {}).get("column_count", 0))
-            except Exception:
-                old_col_count = 0
-
-            if old_row_count != new_row_count:
-                row_count_has_changed = True
-
-            if old_col_count != new_col_count:
-                col_count_has_changed = True
-
-        schema_changes_dict = {
-            "added": sorted(list(new_cols - old_cols)),
-            "removed": sorted(list(old_cols - new_cols)),
-        }
-
-        # ==========================================================
-        # 4) STATS + QUALITY
-        # ==========================================================
-        num_df = df.select_dtypes(include="number")
-
-        if num_df.shape[1] > 0:
-            stats_df = num_df.describe()
-            raw_summary = stats_df.to_dict()
-            summary_stats = clean_nan(raw_summary)
-        else:
-            summary_stats = {}
-
-        quality_report, insights = analyze_dataframe_quality(df)
-
-        analysis_results = {
-            "row_count": new_row_count,
-            "column_count": new_col_count,
-            "summary_stats": summary_stats,
-            "is_truncated": is_truncated,
-            "quality_report": quality_report,
-            "insights": insights,
-
-            # ✅ extra fields for frontend change summary
-            "previous_row_count": old_row_count,
-            "previous_column_count": old_col_count,
-            "row_count_changed": row_count_has_changed,
-            "column_count_changed": col_count_has_changed,
-            "schema_has_changed": schema_has_changed,
-            "schema_changes": schema_changes_dict,
-        }
-
-        current_upload.schema_info = new_schema
-        current_upload.analysis_results = analysis_results
-        current_upload.schema_changed_from_previous = schema_has_changed
-
-        # RELEASE RAM
-        del df
-        if "stats_df" in locals():
-            del stats_df
-        del num_df
-
-        # ==========================================================
-        # 5) NOTIFICATIONS + EMAIL + ALERT RULES
-        # ==========================================================
-        workspace = db.query(Workspace).filter(Workspace.id == current_upload.workspace_id).first()
-        if workspace:
-            if schema_has_changed or row_count_has_changed or col_count_has_changed:
-
-                ai_insight_text = None
-
-                change_parts = []
-
-                if schema_has_changed:
-                    added = len(schema_changes_dict.get("added", []))
-                    removed = len(schema_changes_dict.get("removed", []))
-                    if added or removed:
-                        change_parts.append(
-                            f"schema updated (+{added} / -{removed})"
-                        )
-
-                if row_count_has_changed:
-                    change_parts.append(
-                        f"rows {old_row_count} → {new_row_count}"
-                    )
-
-                if col_count_has_changed:
-                    change_parts.append(
-                        f"columns {old_col_count} → {new_col_count}"
-                    )
-
-                change_summary = ", ".join(change_parts)
-
-                notification_message = (
-                    f"Data updated in '{workspace.name}': {change_summary}"
-                )
-
-
-                # ✅ Notify all team members + owner (safe dedupe by user.id)
-                all_users = list(workspace.team_members) + [workspace.owner]
-                users_map = {str(u.id): u for u in all_users}
-                users_to_notify = list(users_map.values())
-
-                for user in users_to_notify:
-                    new_notification = Notification(
-                        user_id=user.id,
-                        workspace_id=workspace.id,
-                        message=notification_message,
-                        ai_insight=ai_insight_text,
-                    )
-                    db.add(new_notification)
-
-                new_notifications_created = True
-                logger.info(f"🔔 [WORKER] Created {len(users_to_notify)} notifications.")
-
-                # Prepare Email context
-                percent_change = "0%"
-                if old_row_count > 0:
-                    percent_change = f"{((new_row_count - old_row_count) / old_row_count) * 100:+.1f}%"
-
-                email_context = {
-                    "workspace_name": workspace.name,
-                    "upload_type": current_upload.upload_type,
-                    "new_file_name": current_upload.file_path,
-                    "old_file_name": previous_upload.file_path if previous_upload else "N/A",
-                    "upload_time_str": convert_utc_to_ist_str(current_upload.uploaded_at),
-                    "owner_info": {"name": workspace.owner.name, "email": workspace.owner.email},
-                    "team_info": [{"name": member.name, "email": member.email} for member in workspace.team_members],
-                    "ai_insight": ai_insight_text,
-                    "schema_changes": schema_changes_dict,
-                    "metric_changes": {
-                        "old_rows": old_row_count,
-                        "new_rows": new_row_count,
-                        "percent_change": percent_change,
-                        "old_cols": old_col_count,
-                        "new_cols": new_col_count,
-                    },
-                }
-
-                user_ids = [u.id for u in users_to_notify]
-
-                enabled_settings = db.query(WorkspaceUserSettings).filter(
-                    WorkspaceUserSettings.workspace_id == workspace.id,
-                    WorkspaceUserSettings.user_id.in_(user_ids),
-                    WorkspaceUserSettings.email_notifications_enabled == True,
-                ).all()
-
-                enabled_user_ids = {s.user_id for s in enabled_settings}
-
-                recipients = [
-                    user.email for user in users_to_notify
-                    if user.id in enabled_user_ids
-                ]
-
-
-                logger.info("[WORKER] Scheduling detailed alert email (non-blocking)...")
-
-                if recipients:
-                    threading.Thread(
-                        target=_run_email_in_background,
-                        args=(recipients, email_context),
-                        daemon=True,
-                    ).start()
-
-            # Check Alerts (keep as-is)
-            check_alert_rules(db, workspace, current_upload, analysis_results, loop)
-
-        db.commit()
-        logger.info(f"💾 [WORKER] Success. Upload {upload_id} committed.")
-
-        # Push notification ping (only in prod)
-        if APP_MODE == "production" and new_notifications_created and users_to_notify:
-            for user in users_to_notify:
-                user_id_str = str(user.id)
-
-                run_async_safely(
-                    manager.push_to_user(
-                        user_id=user_id_str,
-                        message={"type": "NEW_NOTIFICATION_ALERT"},
-                    ),
-                    loop,
-                )
-            logger.info("📡 [WORKER] Pushed NEW_NOTIFICATION_ALERT signal to affected users.")
-
-        status_message = "job_complete"
-        return {"status": "success"}
-
-    except Exception as e:
-        logger.error(f"❌ [WORKER] Processing Error: {e}", exc_info=True)
-        error_msg = str(e)
-        status_message = "job_error"
-        return {"status": "error", "message": error_msg}
-
-    finally:
-        if APP_MODE == "production" and workspace_id_str:
-            payload = {
-                "type": status_message,
-                "workspace_id": workspace_id_str,
-            }
-
-            if status_message == "job_error" and error_msg:
-                payload["error"] = error_msg
-
-            logger.info(f"📡 [WORKER] Broadcasting {status_message} to workspace {workspace_id_str}...")
-
-            run_async_safely(
-                manager.broadcast_to_workspace(workspace_id_str, payload),
-                loop,
-            )
-
-        try:
-            db.close()
-        except Exception:
-            pass
+def process_csv_task(upload_id: str, loop: asyncio.AbstractEventLoop = None):
+    return run_csv_pipeline(upload_id, InlineExecutor(loop))
 
 
 # =====================
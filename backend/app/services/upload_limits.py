@@ -2,18 +2,15 @@ import uuid
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
-from app.models.data_upload import DataUpload
+from app.services.workspace_stats import get_workspace_stats
 
 
 DEFAULT_MAX_UPLOADS_PER_WORKSPACE = 50
 
 
 def get_upload_count(db: Session, workspace_id: uuid.UUID) -> int:
-    return (
-        db.query(DataUpload)
-        .filter(DataUpload.workspace_id == workspace_id)
-        .count()
-    )
+    # Single-row read of the denormalized counter (see services/workspace_stats.py)
+    return get_workspace_stats(db, workspace_id)["upload_count"]
 
 
 def enforce_upload_limit_or_raise(
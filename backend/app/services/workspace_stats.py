@@ -0,0 +1,240 @@
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import event, func, inspect, literal, or_, select, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.alert_rule import AlertRule
+from app.models.data_upload import DataUpload
+from app.models.user import User
+from app.models.workspace import Workspace, workspace_team
+from app.models.workspace_stats import WorkspaceStats
+
+logger = logging.getLogger(__name__)
+
+COUNTER_COLUMNS = ("upload_count", "total_size_bytes", "alert_count", "active_alert_count")
+EMPTY_STATS = {column: 0 for column in COUNTER_COLUMNS}
+
+# Attributes that feed versioned responses (WorkspaceResponse, schema, trend).
+# Updates touching only anything else (last_polled_at, failure_count, ...) keep the ETags valid.
+WORKSPACE_VERSIONED_FIELDS = (
+    "name", "description", "description_last_updated_at", "data_source", "owner_id", "team_members",
+    "api_url", "api_header_name", "polling_interval", "is_polling_active", "tracked_column", "primary_key_column",
+    "db_type", "db_host", "db_port", "db_user", "db_name", "db_query", "is_deleted", "deleted_at",
+)
+# WorkspaceResponse embeds owner / team_members name and email
+USER_VERSIONED_FIELDS = ("name", "email")
+UPLOAD_VERSIONED_FIELDS = (
+    "upload_type", "uploaded_at", "file_size_bytes", "schema_info", "schema_changed_from_previous", "analysis_results",
+)
+
+
+def _changed(target, fields) -> bool:
+    state = inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+# ==========================
+#  Write path (flush listeners)
+# ==========================
+def _apply_delta(connection, workspace_id, **deltas: int) -> None:
+    """
+    Upsert the workspace's counter row by the given deltas and bump its
+    version on the flushing connection, so both commit or roll back with
+    the mutation.
+    """
+    if workspace_id is None:
+        return
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+
+    table = WorkspaceStats.__table__
+    stmt = pg_insert(table).values(
+        workspace_id=workspace_id,
+        version=1,
+        **{column: max(delta, 0) for column, delta in deltas.items()},
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.workspace_id],
+        set_={
+            **{column: func.greatest(table.c[column] + delta, 0) for column, delta in deltas.items()},
+            "version": table.c.version + 1,
+            "updated_at": func.now(),
+        },
+    )
+    connection.execute(stmt)
+
+
+@event.listens_for(DataUpload, "after_insert")
+def _upload_inserted(mapper, connection, target):
+    _apply_delta(connection, target.workspace_id, upload_count=1, total_size_bytes=target.file_size_bytes or 0)
+
+
+@event.listens_for(DataUpload, "after_update")
+def _upload_updated(mapper, connection, target):
+    # pipeline wrote schema_info / analysis_results: version bump only
+    if not _changed(target, UPLOAD_VERSIONED_FIELDS):
+        return
+    history = inspect(target).attrs.file_size_bytes.history
+    delta = 0
+    if history.has_changes():
+        delta = (target.file_size_bytes or 0) - ((history.deleted and history.deleted[0]) or 0)
+    _apply_delta(connection, target.workspace_id, total_size_bytes=delta)
+
+
+@event.listens_for(DataUpload, "after_delete")
+def _upload_deleted(mapper, connection, target):
+    _apply_delta(connection, target.workspace_id, upload_count=-1, total_size_bytes=-(target.file_size_bytes or 0))
+
+
+@event.listens_for(AlertRule, "after_insert")
+def _alert_inserted(mapper, connection, target):
+    _apply_delta(connection, target.workspace_id, alert_count=1, active_alert_count=1 if target.is_active else 0)
+
+
+@event.listens_for(AlertRule, "after_delete")
+def _alert_deleted(mapper, connection, target):
+    _apply_delta(connection, target.workspace_id, alert_count=-1, active_alert_count=-1 if target.is_active else 0)
+
+
+@event.listens_for(AlertRule, "after_update")
+def _alert_updated(mapper, connection, target):
+    history = inspect(target).attrs.is_active.history
+    delta = 0
+    if history.has_changes():
+        was_active = bool(history.deleted and history.deleted[0])
+        delta = int(bool(target.is_active)) - int(was_active)
+    _apply_delta(connection, target.workspace_id, active_alert_count=delta)
+
+
+@event.listens_for(Workspace, "after_update")
+def _workspace_updated(mapper, connection, target):
+    # settings, membership, soft delete: version bump only (poll bookkeeping is skipped)
+    if _changed(target, WORKSPACE_VERSIONED_FIELDS):
+        _apply_delta(connection, target.id)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    # renamed owner / member: bump every workspace that embeds them, in one statement
+    if not _changed(target, USER_VERSIONED_FIELDS):
+        return
+    workspace_ids = union(
+        select(Workspace.id.label("workspace_id")).where(Workspace.owner_id == target.id),
+        select(workspace_team.c.workspace_id).where(workspace_team.c.user_id == target.id),
+    ).subquery()
+
+    table = WorkspaceStats.__table__
+    stmt = pg_insert(table).from_select(
+        ["workspace_id", "version"],
+        select(workspace_ids.c.workspace_id, literal(1)),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.workspace_id],
+        set_={"version": table.c.version + 1, "updated_at": func.now()},
+    )
+    connection.execute(stmt)
+
+
+# ==========================
+#  Read path
+# ==========================
+def get_workspace_version(db: Session, workspace_id) -> int:
+    """
+    Monotonic counter bumped by every upload, analysis, alert-rule and
+    workspace mutation that can change a response. Feeds ETags (see core/http_cache.py).
+    """
+    version = db.query(WorkspaceStats.version).filter(
+        WorkspaceStats.workspace_id == workspace_id
+    ).scalar()
+    return int(version or 0)
+
+
+def get_workspace_stats(db: Session, workspace_id) -> Dict[str, int]:
+    """Single-row read. A workspace without a row has nothing to count yet."""
+    row = db.query(*[getattr(WorkspaceStats, column) for column in COUNTER_COLUMNS]).filter(
+        WorkspaceStats.workspace_id == workspace_id
+    ).first()
+    if not row:
+        return dict(EMPTY_STATS)
+    return dict(zip(COUNTER_COLUMNS, row))
+
+
+# ==========================
+#  Reconciliation
+# ==========================
+def reconcile_workspace_stats(db: Optional[Session] = None) -> int:
+    """
+    Recompute every workspace's counters from the source tables in one
+    INSERT ... SELECT and overwrite rows that drifted (bulk deletes,
+    manual SQL, races). Returns the number of rows corrected.
+    """
+    own_session = db is None
+    db = db or SessionLocal()
+
+    try:
+        uploads = (
+            select(
+                DataUpload.workspace_id.label("workspace_id"),
+                func.count(DataUpload.id).label("upload_count"),
+                func.coalesce(func.sum(DataUpload.file_size_bytes), 0).label("total_size_bytes"),
+            )
+            .group_by(DataUpload.workspace_id)
+            .subquery()
+        )
+        alerts = (
+            select(
+                AlertRule.workspace_id.label("workspace_id"),
+                func.count(AlertRule.id).label("alert_count"),
+                func.count(AlertRule.id).filter(AlertRule.is_active == True).label("active_alert_count"),
+            )
+            .group_by(AlertRule.workspace_id)
+            .subquery()
+        )
+        truth = (
+            select(
+                Workspace.id,
+                func.coalesce(uploads.c.upload_count, 0),
+                func.coalesce(uploads.c.total_size_bytes, 0),
+                func.coalesce(alerts.c.alert_count, 0),
+                func.coalesce(alerts.c.active_alert_count, 0),
+                func.now(),
+                func.now(),
+            )
+            .select_from(Workspace)
+            .outerjoin(uploads, uploads.c.workspace_id == Workspace.id)
+            .outerjoin(alerts, alerts.c.workspace_id == Workspace.id)
+        )
+
+        table = WorkspaceStats.__table__
+        stmt = pg_insert(table).from_select(
+            ["workspace_id", *COUNTER_COLUMNS, "updated_at", "reconciled_at"], truth
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.workspace_id],
+            set_={
+                **{column: stmt.excluded[column] for column in COUNTER_COLUMNS},
+                "version": table.c.version + 1,
+                "updated_at": func.now(),
+                "reconciled_at": func.now(),
+            },
+            where=or_(*[table.c[column] != stmt.excluded[column] for column in COUNTER_COLUMNS]),
+        )
+
+        corrected = db.execute(stmt).rowcount or 0
+        db.commit()
+
+        if corrected:
+            logger.warning(f"🧮 [STATS] Reconciled counters for {corrected} workspaces.")
+        else:
+            logger.info("🧮 [STATS] Workspace counters in sync.")
+        return corrected
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ [STATS] Reconciliation failed: {e}", exc_info=True)
+        return 0
+    finally:
+        if own_session:
+            db.close()
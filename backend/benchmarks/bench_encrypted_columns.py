@@ -0,0 +1,102 @@
+"""
+Fernet cost on workspace reads: deferred secrets vs eager decryption.
+
+Seeds a throwaway owner with N workspaces that all carry an API header
+secret and a DB password, then times the list_workspaces-shaped query
+with the secrets deferred (the model default) and with them undeferred
+(the old eager behaviour), counting Fernet decryptions for each. Runs
+in a transaction that is rolled back, so it is safe against a local dev
+database.
+
+Run from backend/ against a migrated local Postgres:
+    python -m benchmarks.bench_encrypted_columns
+    python -m benchmarks.bench_encrypted_columns --workspaces 500 --repeat 20
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+from sqlalchemy.orm import undefer_group
+
+from app.core.database import SessionLocal
+from app.models import workspace as workspace_model
+from app.models.user import User
+from app.models.workspace import Workspace
+
+
+class CountingFernet:
+    """Wraps the model's Fernet instance to count decrypt() calls."""
+    def __init__(self, inner):
+        self.inner = inner
+        self.decrypts = 0
+
+    def encrypt(self, data):
+        return self.inner.encrypt(data)
+
+    def decrypt(self, token):
+        self.decrypts += 1
+        return self.inner.decrypt(token)
+
+
+def seed(db, workspaces: int):
+    owner = User(id=uuid.uuid4(), email=f"bench-{uuid.uuid4().hex[:12]}@example.invalid", is_verified=True)
+    db.add(owner)
+    db.flush()
+
+    # Table insert still runs EncryptedString.process_bind_param, so rows hold real ciphertext
+    db.execute(Workspace.__table__.insert(), [
+        {"id": uuid.uuid4(), "name": f"bench-{i}", "owner_id": owner.id, "data_source": "API",
+         "api_url": "https://example.invalid/data", "api_header_name": "Authorization",
+         "api_header_value": f"Bearer token-{i}-{uuid.uuid4().hex}", "db_password": f"pw-{uuid.uuid4().hex}",
+         "is_polling_active": False, "is_deleted": False, "failure_count": 0}
+        for i in range(workspaces)
+    ])
+    return owner.id
+
+
+def time_listing(db, owner_id, counter: CountingFernet, repeat: int, eager: bool):
+    timings = []
+    counter.decrypts = 0
+    for _ in range(repeat):
+        db.expunge_all()
+        query = db.query(Workspace).filter(Workspace.owner_id == owner_id, Workspace.is_deleted == False)
+        if eager:
+            query = query.options(undefer_group("secrets"))
+
+        started = time.perf_counter()
+        rows = query.all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), counter.decrypts // repeat, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workspaces", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    counter = CountingFernet(workspace_model.fernet)
+    workspace_model.fernet = counter
+
+    db = SessionLocal()
+    try:
+        owner_id = seed(db, args.workspaces)
+        db.flush()
+
+        eager_ms, eager_decrypts, count = time_listing(db, owner_id, counter, args.repeat, eager=True)
+        lazy_ms, lazy_decrypts, _ = time_listing(db, owner_id, counter, args.repeat, eager=False)
+
+        print(f"{count} workspaces, median of {args.repeat} runs")
+        print(f"  eager (undefer secrets): {eager_ms:8.2f} ms  {eager_decrypts:5d} decrypts/query")
+        print(f"  deferred (default):      {lazy_ms:8.2f} ms  {lazy_decrypts:5d} decrypts/query")
+        if eager_ms:
+            print(f"  saved: {eager_ms - lazy_ms:.2f} ms ({(1 - lazy_ms / eager_ms) * 100:.0f}%)")
+    finally:
+        workspace_model.fernet = counter.inner
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
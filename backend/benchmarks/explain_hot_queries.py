@@ -0,0 +1,169 @@
+"""
+Query-plan audit for the hot read paths.
+
+Seeds a throwaway user / workspace / uploads / notifications / alert rules
+inside a transaction, ANALYZEs the tables, EXPLAINs each hot query and
+fails if any of them sequentially scans its main table. Everything is
+rolled back at the end, so it is safe to point at a local dev database.
+
+Run from backend/ against a migrated local Postgres:
+    python -m benchmarks.explain_hot_queries
+    python -m benchmarks.explain_hot_queries --uploads 20000 --notifications 50000 --verbose
+"""
+import argparse
+import json
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.core.database import SessionLocal
+from app.models.alert_rule import AlertRule
+from app.models.data_upload import DataUpload
+from app.models.notification import Notification
+from app.models.user import User
+from app.models.workspace import Workspace
+
+SEEDED_TABLES = ("users", "workspaces", "data_uploads", "notifications", "alert_rules")
+
+
+def seed(db, uploads: int, notifications: int, workspaces: int):
+    now = datetime.now(timezone.utc)
+    user = User(id=uuid.uuid4(), email=f"explain-{uuid.uuid4().hex[:12]}@example.invalid", is_verified=True)
+    db.add(user)
+    db.flush()
+
+    ws_ids = [uuid.uuid4() for _ in range(workspaces)]
+    db.execute(Workspace.__table__.insert(), [
+        {"id": ws_id, "name": f"explain-{i}", "owner_id": user.id, "is_deleted": i % 10 == 0,
+         "is_polling_active": i % 7 == 0, "failure_count": 0}
+        for i, ws_id in enumerate(ws_ids)
+    ])
+
+    db.execute(DataUpload.__table__.insert(), [
+        {"id": uuid.uuid4(), "workspace_id": ws_ids[i % workspaces],
+         "upload_type": "manual" if i % 3 else "api_poll", "file_path": f"explain-{i}.csv",
+         "uploaded_at": now - timedelta(minutes=i),
+         "analysis_results": {"row_count": i, "distribution_sketches": {}} if i % 2 else {"row_count": i}}
+        for i in range(uploads)
+    ])
+
+    db.execute(Notification.__table__.insert(), [
+        {"id": uuid.uuid4(), "user_id": user.id, "workspace_id": ws_ids[i % workspaces],
+         "message": "explain", "is_read": i % 5 != 0, "created_at": now - timedelta(seconds=i)}
+        for i in range(notifications)
+    ])
+
+    db.execute(AlertRule.__table__.insert(), [
+        {"id": uuid.uuid4(), "workspace_id": ws_ids[i % workspaces], "column_name": "price",
+         "metric": "mean", "condition": "greater_than", "value": float(i), "is_active": i % 2 == 0}
+        for i in range(workspaces * 5)
+    ])
+
+    for table in SEEDED_TABLES:
+        db.execute(text(f"ANALYZE {table}"))
+
+    return user.id, ws_ids[1]
+
+
+def hot_queries(user_id, workspace_id):
+    """(name, statement, table that must not be seq-scanned). Mirrors the endpoints."""
+    return [
+        ("get_workspace_uploads (by type)",
+         select(DataUpload.id, DataUpload.uploaded_at)
+         .where(DataUpload.workspace_id == workspace_id, DataUpload.upload_type == "manual")
+         .order_by(DataUpload.uploaded_at.desc(), DataUpload.id.desc()).limit(20),
+         "data_uploads"),
+        ("get_workspace_uploads (all types) / latest schema",
+         select(DataUpload.id, DataUpload.schema_info)
+         .where(DataUpload.workspace_id == workspace_id)
+         .order_by(DataUpload.uploaded_at.desc(), DataUpload.id.desc()).limit(20),
+         "data_uploads"),
+        ("pipeline previous-upload lookup",
+         select(DataUpload.id)
+         .where(DataUpload.workspace_id == workspace_id, DataUpload.upload_type == "manual",
+                DataUpload.id != uuid.uuid4())
+         .order_by(DataUpload.uploaded_at.desc()).limit(1),
+         "data_uploads"),
+        ("pipeline drift history",
+         select(DataUpload.analysis_results["distribution_sketches"])
+         .where(DataUpload.workspace_id == workspace_id, DataUpload.upload_type == "manual",
+                DataUpload.analysis_results.has_key("distribution_sketches"))
+         .order_by(DataUpload.uploaded_at.desc()).limit(5),
+         "data_uploads"),
+        ("get_notifications",
+         select(Notification.id)
+         .where(Notification.user_id == user_id)
+         .order_by(Notification.created_at.desc(), Notification.id.desc()).limit(20),
+         "notifications"),
+        ("mark_all_as_read (unread rows)",
+         select(Notification.id)
+         .where(Notification.user_id == user_id, Notification.is_read == False),
+         "notifications"),
+        ("check_alert_rules (active plan)",
+         select(AlertRule.id)
+         .where(AlertRule.workspace_id == workspace_id, AlertRule.is_active == True),
+         "alert_rules"),
+        ("get_workspaces (owned)",
+         select(Workspace.id)
+         .where(Workspace.owner_id == user_id, Workspace.is_deleted == False),
+         "workspaces"),
+        ("scheduler (polling workspaces)",
+         select(Workspace.id, Workspace.last_polled_at)
+         .where(Workspace.is_polling_active == True),
+         "workspaces"),
+    ]
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def explain(db, statement):
+    compiled = statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    row = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    plan = row if isinstance(row, list) else json.loads(row)
+    return plan[0]["Plan"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=5000)
+    parser.add_argument("--notifications", type=int, default=10000)
+    parser.add_argument("--workspaces", type=int, default=50)
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    failures = 0
+    try:
+        user_id, workspace_id = seed(db, args.uploads, args.notifications, args.workspaces)
+
+        for name, statement, table in hot_queries(user_id, workspace_id):
+            plan = explain(db, statement)
+            nodes = list(_plan_nodes(plan))
+            seq_scans = [n for n in nodes if n.get("Node Type") == "Seq Scan" and n.get("Relation Name") == table]
+            scans = sorted({f"{n['Node Type']}({n.get('Index Name') or n.get('Relation Name')})"
+                            for n in nodes if "Scan" in n.get("Node Type", "")})
+
+            status = "FAIL" if seq_scans else "ok"
+            failures += bool(seq_scans)
+            print(f"{status:>4}  {name:<50} {', '.join(scans)}")
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+    finally:
+        db.rollback()
+        db.close()
+
+    if failures:
+        print(f"\n{failures} hot queries fall back to sequential scans.")
+        sys.exit(1)
+    print("\nAll hot queries use indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Query-count guard for membership checks and notification fan-out.
+
+Seeds an owner, a workspace and a team inside a transaction, runs each
+scenario for a small and a large team, counts the SQL statements it
+issues and fails if a scenario exceeds its budget or grows with team
+size (an N+1 creeping back). Everything is rolled back at the end.
+
+Run from backend/ against a migrated local Postgres:
+    python -m benchmarks.query_counts
+    python -m benchmarks.query_counts --small 2 --large 40 --verbose
+"""
+import argparse
+import sys
+import uuid
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.core.database import engine, SessionLocal
+from app.core.membership_cache import member_exists
+from app.models.user import User
+from app.models.workspace import Workspace, workspace_team
+from app.models.workspace_user_settings import WorkspaceUserSettings
+from app.services.pipeline import get_email_recipients, get_users_to_notify, get_workspace_with_audience
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+def seed(db, team_size: int):
+    owner = User(id=uuid.uuid4(), email=f"qc-{uuid.uuid4().hex[:12]}@example.invalid", is_verified=True)
+    members = [
+        User(id=uuid.uuid4(), email=f"qc-{uuid.uuid4().hex[:12]}@example.invalid", is_verified=True)
+        for _ in range(team_size)
+    ]
+    db.add_all([owner, *members])
+    db.flush()
+
+    ws_id = uuid.uuid4()
+    db.execute(Workspace.__table__.insert(), [
+        {"id": ws_id, "name": f"qc-{team_size}", "owner_id": owner.id, "is_deleted": False,
+         "is_polling_active": False, "failure_count": 0}
+    ])
+    db.execute(workspace_team.insert(), [{"workspace_id": ws_id, "user_id": m.id} for m in members])
+    db.execute(WorkspaceUserSettings.__table__.insert(), [
+        {"id": uuid.uuid4(), "workspace_id": ws_id, "user_id": user.id, "email_notifications_enabled": i % 2 == 0}
+        for i, user in enumerate([owner, *members])
+    ])
+    db.flush()
+    return owner.id, members[-1].id if members else owner.id, ws_id
+
+
+def scenarios(owner_id, member_id, ws_id):
+    """(name, budget, callable(db)). Mirrors the pipeline fan-out and the API checks."""
+    def fan_out(db):
+        workspace = get_workspace_with_audience(db, ws_id)
+        users = get_users_to_notify(workspace)
+        get_email_recipients(db, workspace, users)
+        [(u.name, u.email) for u in workspace.team_members]
+        (workspace.owner.name, workspace.owner.email)
+
+    def list_owned(db):
+        rows = db.query(Workspace).options(
+            selectinload(Workspace.team_members),
+            joinedload(Workspace.owner),
+        ).filter(Workspace.owner_id == owner_id, Workspace.is_deleted == False).all()
+        for ws in rows:
+            [m.email for m in ws.team_members]
+            ws.owner.email
+
+    return [
+        ("member_exists (team member)", 1, lambda db: member_exists(db, ws_id, member_id)),
+        ("member_exists (owner)", 1, lambda db: member_exists(db, ws_id, owner_id)),
+        ("alert / change fan-out audience", 3, fan_out),
+        ("list_workspaces build", 2, list_owned),
+    ]
+
+
+def measure(db, team_size: int, verbose: bool):
+    owner_id, member_id, ws_id = seed(db, team_size)
+    counts = {}
+    for name, budget, run in scenarios(owner_id, member_id, ws_id):
+        db.expunge_all()
+        with count_queries() as counter:
+            run(db)
+        counts[name] = (counter.count, budget)
+        if verbose:
+            print(f"--- {name} (team={team_size})")
+            for statement in counter.statements:
+                print("   ", " ".join(statement.split())[:160])
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small", type=int, default=2, help="team size for the baseline run")
+    parser.add_argument("--large", type=int, default=25, help="team size that must not add queries")
+    parser.add_argument("--verbose", action="store_true", help="print every statement")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    failures = 0
+    try:
+        small = measure(db, args.small, args.verbose)
+        large = measure(db, args.large, args.verbose)
+
+        for name, (count_small, budget) in small.items():
+            count_large = large[name][0]
+            ok = count_small <= budget and count_large == count_small
+            failures += not ok
+            print(f"{'ok' if ok else 'FAIL':>4}  {name:<36} team={args.small}: {count_small}  "
+                  f"team={args.large}: {count_large}  budget: {budget}")
+    finally:
+        db.rollback()
+        db.close()
+
+    if failures:
+        print(f"\n{failures} scenarios exceed their query budget or scale with team size.")
+        sys.exit(1)
+    print("\nAll scenarios within budget.")
+
+
+if __name__ == "__main__":
+    main()
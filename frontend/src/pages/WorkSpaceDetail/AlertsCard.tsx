@@ -96,6 +96,10 @@ const handleToggleRule = async (ruleId: string) => {
         case 'less_than': return { symbol: '<', label: 'Drops below' };
         case 'equals': return { symbol: '=', label: 'Equals' };
         case 'not_equals': return { symbol: '≠', label: 'Not equal' }; // Ensure this matches Backend
+        case 'between': return { symbol: '∈', label: 'Within range' };
+        case 'outside': return { symbol: '∉', label: 'Outside range' };
+        case 'pct_change_greater_than': return { symbol: 'Δ% >', label: 'Rises by' };
+        case 'pct_change_less_than': return { symbol: 'Δ% <', label: 'Changes by less than' };
         default: return { symbol: '→', label: cond.replace(/_/g, ' ') };
     }
 };
@@ -216,7 +220,10 @@ const activeCount = rules.filter(r => r.is_active).length;
                           </span>
                           <ArrowRight className="hidden sm:block w-3 h-3 text-slate-300" />
                           <span className="font-mono text-[11px] sm:text-xs font-black text-slate-800 bg-amber-50/50 sm:bg-transparent px-1.5 py-0.5 sm:p-0 rounded border border-amber-100/50 sm:border-none">
-                            {symbol} {rule.value}
+                            {symbol} {rule.value_max != null ? `${rule.value} – ${rule.value_max}` : rule.value}
+                            {rule.clauses && rule.clauses.length > 0 && (
+                              <span className="ml-1 text-[10px] font-semibold text-slate-400">+{rule.clauses.length}</span>
+                            )}
                           </span>
                         </div>
                       </div>
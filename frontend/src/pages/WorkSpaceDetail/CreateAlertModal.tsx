@@ -23,6 +23,8 @@ export const CreateAlertModal: React.FC<CreateAlertModalProps> = ({ isOpen, setI
   const [metric, setMetric] = useState('mean');
   const [condition, setCondition] = useState('greater_than');
   const [value, setValue] = useState(0);
+  const [valueMax, setValueMax] = useState(0);
+  const isRange = condition === 'between' || condition === 'outside';
   const [isSaving, setIsSaving] = useState(false);
 
   // State for the dynamic column dropdown
@@ -84,6 +86,7 @@ export const CreateAlertModal: React.FC<CreateAlertModalProps> = ({ isOpen, setI
         metric,
         condition,
         value,
+        ...(isRange ? { value_max: valueMax } : {}),
       };
       await api.post('/alerts/', payload);
       
@@ -218,6 +221,23 @@ export const CreateAlertModal: React.FC<CreateAlertModalProps> = ({ isOpen, setI
                                 <option value="min">Minimum</option>
                                 <option value="max">Maximum</option>
                                 <option value="count">Count</option>
+                                <optgroup label="Over upload history">
+                                  <option value="ma7:mean">Average (7-upload moving avg)</option>
+                                  <option value="zscore:mean">Average z-score vs history</option>
+                                  <option value="pct_change:mean">Average % change</option>
+                                  <option value="pct_change:count">Count % change</option>
+                                  <option value="zscore:max">Maximum z-score vs history</option>
+                                </optgroup>
+                                <optgroup label="Drift vs previous upload">
+                                  <option value="psi">PSI</option>
+                                  <option value="ks">KS distance</option>
+                                  <option value="js">Jensen-Shannon</option>
+                                </optgroup>
+                                <optgroup label="Drift vs rolling baseline">
+                                  <option value="psi_baseline">PSI (baseline)</option>
+                                  <option value="ks_baseline">KS distance (baseline)</option>
+                                  <option value="js_baseline">Jensen-Shannon (baseline)</option>
+                                </optgroup>
                             </select>
                             <ChevronDown className="absolute right-3 top-2.5 h-4 w-4 text-slate-400 pointer-events-none" />
                           </div>
@@ -239,6 +259,10 @@ export const CreateAlertModal: React.FC<CreateAlertModalProps> = ({ isOpen, setI
                                 <option value="less_than">Less than</option>
                                 <option value="equals">Equal to</option>
                                 <option value="not_equals">Not equal</option>
+                                <option value="between">Between</option>
+                                <option value="outside">Outside range</option>
+                                <option value="pct_change_greater_than">% change above</option>
+                                <option value="pct_change_less_than">% change below</option>
                             </select>
                             <ChevronDown className="absolute right-3 top-2.5 h-4 w-4 text-slate-400 pointer-events-none" />
                           </div>
@@ -263,6 +287,25 @@ export const CreateAlertModal: React.FC<CreateAlertModalProps> = ({ isOpen, setI
                         </div>
                       </div>
 
+                      {isRange && (
+                        <div>
+                          <label htmlFor="value_max" className="block text-[10px] font-bold text-slate-500 uppercase tracking-widest mb-2 flex items-center gap-1.5">
+                            <Terminal className="w-3 h-3" /> Upper Bound
+                          </label>
+                          <div className="relative">
+                              <input
+                              type="number"
+                              id="value_max"
+                              value={valueMax}
+                              onChange={e => setValueMax(parseFloat(e.target.value))}
+                              className="block w-full rounded-md border border-slate-200 bg-white px-3 py-2 text-slate-900 text-sm font-mono focus:border-slate-400 focus:ring-4 focus:ring-slate-100 shadow-sm transition-all placeholder:text-slate-300"
+                              step="any"
+                              placeholder="0.00"
+                              />
+                          </div>
+                        </div>
+                      )}
+
                     </div>
                   )}
                 </div>
@@ -3,7 +3,7 @@ import { useAuth } from "../../context/AuthContext";
 import { api } from "../../services/api";
 import { BarChart, Bar, LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, ReferenceLine } from 'recharts';
 import { AlertTriangle, Loader2, Globe, FileText, TrendingUp, LineChart as LineChartIcon, Trash2, ShieldQuestion, Database, ArrowUpRight, ArrowDownRight, Server, Clock, LayoutList, Download, Search, X, ArrowUpDown } from "lucide-react";
-import { Workspace, DataUpload, TrendDataPoint, SummaryStats } from "../../types";
+import { Workspace, DataUpload, TrendDataPoint, SummaryStats, UploadAnalysis } from "../../types";
 import { Tab, Dialog, Transition } from '@headlessui/react';
 import toast from 'react-hot-toast';
 import { AnimatedNumber } from '../../components/AnimatedNumber';
@@ -15,9 +15,16 @@ function classNames(...classes: string[]) {
   return classes.filter(Boolean).join(' ')
 }
 
-const formatChartData = (summaryStats: SummaryStats | null | undefined) => {
+// analysis_results is stored as JSONB (keys re-sorted); schema_info keeps the file's column order
+const formatChartData = (
+  summaryStats: SummaryStats | null | undefined,
+  schema?: Record<string, string> | null
+) => {
   if (!summaryStats) return [];
-  return Object.keys(summaryStats).map(col => ({
+  const columns = schema
+    ? Object.keys(schema).filter(col => col in summaryStats)
+    : Object.keys(summaryStats);
+  return columns.map(col => ({
     name: col,
     mean: summaryStats[col]?.mean,
   })).filter(item => item.mean !== undefined);
@@ -313,7 +320,10 @@ const DetailView: React.FC<{
   isTeamMember?: boolean;
   handleTrackColumn: (col: string) => void;
 }> = ({ selectedUpload, previousUpload, isOwner, isTeamMember, handleTrackColumn }) => {
-  const chartData = formatChartData(selectedUpload?.analysis_results?.summary_stats);
+  const chartData = formatChartData(
+    selectedUpload?.analysis_results?.summary_stats,
+    selectedUpload?.schema_info
+  );
 
   const rowCount = selectedUpload?.analysis_results?.row_count ?? 0;
   const colCount = selectedUpload?.analysis_results?.column_count ?? 0;
@@ -1021,6 +1031,9 @@ export const DataHistoryCard: React.FC<DataHistoryCardProps> = ({
   const [isTrendLoading, setIsTrendLoading] = useState(false);
   const [uploadToDelete, setUploadToDelete] = useState<DataUpload | null>(null);
 
+  // full schema/analysis per upload id, fetched on selection (the list is summary-only)
+  const [analysisById, setAnalysisById] = useState<Record<string, UploadAnalysis>>({});
+
   // ✅ guard: fetch exactly once per workspace.id
   const fetchedForWorkspaceRef = useRef<string | null>(null);
 
@@ -1038,7 +1051,7 @@ export const DataHistoryCard: React.FC<DataHistoryCardProps> = ({
 
     try {
       const res = await api.get<DataUpload[]>(
-        `/workspaces/${workspace.id}/uploads?limit=100`
+        `/workspaces/${workspace.id}/uploads?limit=100&fields=summary`
       );
 
       const allData = res.data || [];
@@ -1118,6 +1131,45 @@ export const DataHistoryCard: React.FC<DataHistoryCardProps> = ({
           .sort((a, b) => new Date(b.uploaded_at).getTime() - new Date(a.uploaded_at).getTime())[0] || null
       : null;
 
+  const selectedUploadId = selectedUpload?.id;
+  const previousUploadId = previousUpload?.id;
+
+  // ✅ lazy-load full analysis for the two uploads the snapshot compares (ETag-cached by the browser)
+  useEffect(() => {
+    const missing = [selectedUploadId, previousUploadId].filter(
+      (id): id is string => !!id && !analysisById[id]
+    );
+    if (missing.length === 0) return;
+
+    let cancelled = false;
+
+    Promise.all(missing.map((id) => api.get<UploadAnalysis>(`/uploads/${id}/analysis`)))
+      .then((responses) => {
+        if (cancelled) return;
+        // still processing: don't cache, the next selection retries
+        const ready = responses.filter((res) => res.data.analysis_results);
+        if (ready.length === 0) return;
+        setAnalysisById((prev) => {
+          const next = { ...prev };
+          for (const res of ready) next[res.data.id] = res.data;
+          return next;
+        });
+      })
+      .catch((error) => console.error("Failed to fetch upload analysis", error));
+
+    return () => {
+      cancelled = true;
+    };
+  }, [selectedUploadId, previousUploadId, analysisById]);
+
+  const withAnalysis = (upload: DataUpload | null): DataUpload | null => {
+    if (!upload) return null;
+    const detail = analysisById[upload.id];
+    return detail
+      ? { ...upload, schema_info: detail.schema_info, analysis_results: detail.analysis_results }
+      : upload;
+  };
+
   const handleTrackColumn = async (columnName: string) => {
     setTrackedColumn(columnName);
     setViewMode("trend");
@@ -1331,8 +1383,8 @@ export const DataHistoryCard: React.FC<DataHistoryCardProps> = ({
             <div className="flex-1 bg-slate-50/30 p-6 lg:p-8 overflow-y-auto custom-scrollbar">
               {viewMode === "snapshot" ? (
                 <DetailView
-                  selectedUpload={selectedUpload}
-                  previousUpload={previousUpload}
+                  selectedUpload={withAnalysis(selectedUpload)}
+                  previousUpload={withAnalysis(previousUpload)}
                   isOwner={isOwner}
                   isTeamMember={isTeamMember}
                   handleTrackColumn={handleTrackColumn}
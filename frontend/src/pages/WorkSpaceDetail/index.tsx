@@ -58,6 +58,8 @@ const WorkspaceDetail: React.FC = () => {
 
 
  const socketRef = useRef<WebSocket | null>(null);
+ // Last event seen on the socket, sent back on reconnect so the server replays only what we missed
+ const lastEventRef = useRef<{ offset: number; epoch: string } | null>(null);
 
 useEffect(() => {
   if (!id || !user) return;
@@ -96,6 +98,11 @@ useEffect(() => {
       wsUrl = `${wsProtocol}://${window.location.host}/api/workspaces/${id}/ws/${Date.now()}`;
     }
 
+    if (lastEventRef.current) {
+      const { offset, epoch } = lastEventRef.current;
+      wsUrl += `?last_offset=${offset}&epoch=${encodeURIComponent(epoch)}`;
+    }
+
     console.log(`🔌 Attempting WS Connection: ${wsUrl}`);
 
     const ws = new WebSocket(wsUrl);
@@ -112,6 +119,21 @@ useEffect(() => {
       try {
         const data = JSON.parse(event.data);
 
+        if (typeof data.offset === "number" && data.epoch) {
+          const last = lastEventRef.current;
+          if (last && last.epoch === data.epoch && data.offset <= last.offset) return;
+          lastEventRef.current = { offset: data.offset, epoch: data.epoch };
+        }
+
+        if (data.type === "resume_state") return;
+
+        if (data.type === "resync_required") {
+          // Server could not replay the gap: fall back to a full refetch
+          fetchWorkspace();
+          setRefreshHistoryKey((prev) => prev + 1);
+          return;
+        }
+
         if (data.type === "job_complete") {
           setIsProcessing(false);
           setRefreshHistoryKey((prev) => prev + 1);
@@ -186,10 +208,11 @@ useEffect(() => {
 
     socketRef.current?.close(1000, "Component unmount");
     socketRef.current = null;
+    lastEventRef.current = null;
 
     document.removeEventListener("visibilitychange", handleVisibilityChange);
   };
-}, [id, user]);
+}, [id, user, fetchWorkspace]);
 
 
   const handleHistoryLoaded = useCallback((manualUploads: DataUpload[], scheduledFetches: DataUpload[]) => {
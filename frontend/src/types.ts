@@ -41,6 +41,32 @@ export type QualityReport = {
   outliers_by_column: Record<string, number>;
 };
 
+export type SemanticType =
+  | "uuid"
+  | "email"
+  | "url"
+  | "currency"
+  | "date"
+  | "phone"
+  | "name";
+
+export type SemanticColumnInfo = {
+  type: SemanticType | string | null;
+  fingerprint: string;
+};
+
+export type RowDiff = {
+  key_column: string;
+  inserted_rows: number;
+  deleted_rows: number;
+  updated_rows: number;
+  unchanged_rows: number;
+  changed_cells_by_column: Record<string, number>;
+  sample_inserted_keys: string[];
+  sample_deleted_keys: string[];
+  sample_updated_keys: string[];
+};
+
 export type AnalysisResults = {
   row_count: number;
   column_count: number;
@@ -48,6 +74,8 @@ export type AnalysisResults = {
   quality_report?: QualityReport;
   insights?: UploadInsight[];
   is_truncated?: boolean;
+  semantic_types?: Record<string, SemanticColumnInfo>;
+  row_diff?: RowDiff | null;
 };
 
 export interface DataUpload {
@@ -60,6 +88,27 @@ export interface DataUpload {
 
   schema_changed_from_previous: boolean;
   upload_type: "manual" | "api_poll" | "db_query";
+
+  // headline stats from ?fields=summary (schema_info / analysis_results are null then)
+  summary?: UploadSummary | null;
+}
+
+export interface UploadSummary {
+  row_count?: number | null;
+  column_count?: number | null;
+  previous_row_count?: number | null;
+  previous_column_count?: number | null;
+  row_count_changed?: boolean | null;
+  column_count_changed?: boolean | null;
+  schema_has_changed?: boolean | null;
+  is_truncated?: boolean | null;
+}
+
+// GET /uploads/{id}/analysis
+export interface UploadAnalysis {
+  id: string;
+  schema_info: { [key: string]: string } | null;
+  analysis_results: AnalysisResults | null;
 }
 
 export interface TrendDataPoint {
@@ -80,6 +129,7 @@ export interface Workspace {
   polling_interval?: string;
   is_polling_active?: boolean;
   tracked_column?: string;
+  primary_key_column?: string | null;
   api_header_name?: string; 
   db_type?: string;
   db_host?: string;
@@ -96,12 +146,22 @@ export interface Workspace {
 }
 
 // In src/types.ts
+export interface AlertClause {
+  column_name: string;
+  metric: string;
+  condition: string;
+  value: number;
+  value_max?: number | null;
+}
+
 export interface AlertRule {
   id: string;
   column_name: string;
   metric: string;
   condition: string;
   value: number;
+  value_max?: number | null;
+  clauses?: AlertClause[] | null;
   is_active: boolean;
 }
 